@@ -2,14 +2,14 @@
 Single frequency sweep object class.
 '''
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
 import datetime
 import warnings
 
 import Functions as func
-import Plotting
 import Utility as utl
+plt=utl.lazyModule('matplotlib.pyplot') # imported on first use
+Plotting=utl.lazyModule('Plotting')
 import readLog
 from readLog import freqSweepLog as fswplog
 
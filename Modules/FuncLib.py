@@ -3,13 +3,14 @@ Fitting function library.
 All Lorentzian-related functions are designed to accept input fromat (f,*p), where p contains all additional parameters.
 Input format (f,p) turns out to be inconvenient for scipy.optimize.curve_fit usage.
 '''
+import os
+import hashlib
 import numpy as np
 from numpy import pi,radians,sin,cos
 import scipy.optimize
 from scipy import fftpack
 import warnings
-from sympy.solvers import solve
-from sympy import Symbol
+from functools import lru_cache
 
 #=======================================================================
 def lrtzX(f,A,d,f0):
@@ -122,6 +123,50 @@ def bgInv3(f,c3):
 	c3=float(c3)
 	return c3/f/f/f
 #=======================================================================
+PLTS2000c=(-6.4430869e-6,4.5557026e-9,-1.3855442e-12) #c1,c2,c3 of PLTS-2000, P(MPa)=sum(ci/T**i)+sum(ai*T**i), T in K.
+PLTS2000a=(3.4467434,-4.4176438,1.5417437e1,-3.5789853e1,7.1499125e1,-1.0414379e2,1.0518538e2,-6.9443767e1,2.6833087e1,-4.5875709) #a0..a9 of PLTS-2000.
+PLTS2000Tmin=315.23959351 #mK, T of the minimal pressure.
+PLTS2000T0=0.680014 #mK, T of the maximal pressure on the low T branch.
+_PLTS2000tables={}
+#=======================================================================
+tableDir=os.environ.get('FUNCLIB_TABLES') #folder of the on-disk lookup table cache, None to keep tables in memory only. Set by the environment so that process-pool workers share it.
+#=======================================================================
+def tableCache(name,params,coef,build,path=None):
+	'''
+	On-disk cache of precomputed lookup tables, e.g. the inverse tables of temperature scales. A table is stored as a .npy file named by the scale name, its parameters, e.g. the resolution n or Pn for tables that depend on it, and a digest of the source coefficients, so that a change of coefficients never loads a stale table. Tables are loaded by memory map, so that process-pool workers share the same pages instead of rebuilding them.
+	Syntax:
+	-------
+	table=tableCache(name,params,coef,build[,path=None])
+	Parameters:
+	-----------
+	name: str, scale name, e.g. 'PLTS2000'.
+	params: dict, table parameters that are part of the key, e.g. {'n':2048}.
+	coef: sequence of numbers or arrays, source coefficients that version the table.
+	build: function without input, returns the table as a float np.array on a cache miss.
+	path: str, cache folder, created if nonexistent; None uses tableDir, and if that is also None the table is built without caching.
+	Returns:
+	--------
+	table: np.array, read-only memory map if cached on disk.
+	Note:
+	-----
+	A missing file is written to a temporary file and renamed, so that workers building the same table at once never read a partial file.
+	'''
+	path=tableDir if path is None else path
+	if path is None:
+		return np.asarray(build(),dtype=float)
+	h=hashlib.sha1()
+	for c in coef:
+		h.update(np.asarray(c,dtype=float).tobytes())
+	key='_'.join([name]+['%s%s'%(k,params[k]) for k in sorted(params)]+[h.hexdigest()[:16]])
+	fn=os.path.join(path,key+'.npy')
+	if not os.path.exists(fn):
+		os.makedirs(path,exist_ok=True)
+		tmp='%s.%d.tmp'%(fn,os.getpid())
+		with open(tmp,'wb') as fo:
+			np.save(fo,np.asarray(build(),dtype=float))
+		os.replace(tmp,fn)
+	return np.load(fn,mmap_mode='r')
+#=======================================================================
 def PLTS2000T2P(T,Pn=34.3934):
 	'''
 	Temperature to pressure in PLTS-2000 scale. Limit is 0.9mK-1K.
@@ -138,24 +183,99 @@ def PLTS2000T2P(T,Pn=34.3934):
 	P: Pressure in bar.
 	'''
 	T=np.array(T,dtype=float)/1000 #convert T to K required by PLTS-2000
-	c3=-1.3855442e-12
-	c2=4.5557026e-9
-	c1=-6.4430869e-6
-	a0=3.4467434
-	a1=-4.4176438
-	a2=1.5417437e1
-	a3=-3.5789853e1
-	a4=7.1499125e1
-	a5=-1.0414379e2
-	a6=1.0518538e2
-	a7=-6.9443767e1
-	a8=2.6833087e1
-	a9=-4.5875709
+	c1,c2,c3=PLTS2000c
+	a0,a1,a2,a3,a4,a5,a6,a7,a8,a9=PLTS2000a
 
 	P=c3/T**3+c2/T**2+c1/T+a0+a1*T+a2*T**2+a3*T**3+a4*T**4+a5*T**5+a6*T**6+a7*T**7+a8*T**8+a9*T**9
 	P=P*10-34.3934+Pn #convert P from MPa(given by PLTS-2000) to bar, and shift it based on a measured Pn.
 	return P
 #=======================================================================
+def PLTS2000dPdT(T):
+	'''
+	Temperature derivative of PLTS2000T2P, independent of Pn.
+	Syntax:
+	-------
+	dPdT=PLTS2000dPdT(T)
+	Parameters:
+	-----------
+	T: Temperature in mK, sequence aware.
+	Returns:
+	--------
+	dPdT: dP/dT in bar/mK.
+	'''
+	T=np.array(T,dtype=float)/1000
+	c1,c2,c3=PLTS2000c
+	a0,a1,a2,a3,a4,a5,a6,a7,a8,a9=PLTS2000a
+	dPdT=-3*c3/T**4-2*c2/T**3-c1/T**2+a1+T*(2*a2+T*(3*a3+T*(4*a4+T*(5*a5+T*(6*a6+T*(7*a7+T*(8*a8+T*9*a9)))))))
+	return dPdT/100 #MPa/K to bar/mK
+#=======================================================================
+def PLTS2000Table(n=2048):
+	'''
+	Tables of P-Pn against T on the two branches of the PLTS-2000 melting curve, used to seed PLTS2000P2T. Since Pn only shifts P, the tables do not depend on Pn and are computed once per n.
+	Syntax:
+	-------
+	(Tlow,ulow),(Thigh,uhigh)=PLTS2000Table([n=2048])
+	Parameters:
+	-----------
+	n: int, number of nodes per branch, geometrically spaced in T.
+	Returns:
+	--------
+	Tlow,ulow: np.array, T in [0.680014,315.23959351]mK ascending and u=P-Pn in bar, decreasing.
+	Thigh,uhigh: np.array, T in [315.23959351,1000]mK ascending and u=P-Pn in bar, increasing.
+	Read-only memory maps when tableDir is set.
+	'''
+	n=int(n)
+	if n not in _PLTS2000tables:
+		def build():
+			Tlow=np.geomspace(PLTS2000T0,PLTS2000Tmin,n)
+			Thigh=np.geomspace(PLTS2000Tmin,1000,n)
+			return np.array([Tlow,PLTS2000T2P(Tlow,Pn=0),Thigh,PLTS2000T2P(Thigh,Pn=0)])
+		t=tableCache('PLTS2000',{'n':n},(PLTS2000c,PLTS2000a,(PLTS2000T0,PLTS2000Tmin,1000)),build)
+		_PLTS2000tables[n]=((t[0],t[1]),(t[2],t[3]))
+	return _PLTS2000tables[n]
+#=======================================================================
+def PLTS2000Invert(u,Tt,ut,maxiter=100):
+	'''
+	Solve PLTS2000T2P(T,Pn=0)==u for T on one monotone branch, vectorized. The root is bracketed by the two table nodes around u, seeded by linear interpolation between them, and polished by Newton steps; a step that leaves the bracket is replaced by bisection.
+	Syntax:
+	-------
+	T=PLTS2000Invert(u,Tt,ut[,maxiter=100])
+	Parameters:
+	-----------
+	u: np.array, P-Pn in bar, within [min(ut),max(ut)].
+	Tt,ut: one branch of PLTS2000Table.
+	maxiter: int, maximal number of iterations.
+	Returns:
+	--------
+	T: np.array, temperature in mK.
+	Note:
+	-----
+	Iteration stops when the Newton step is below 4 machine epsilons of T, or when P is matched to the rounding of PLTS2000T2P. The result is then the root of the rounded PLTS2000T2P to within its rounding divided by |dP/dT|, check PLTS2000P2T for the error bound.
+	'''
+	u=np.array(u,dtype=float)
+	s=1 if ut[-1]>ut[0] else -1 #slope sign of the branch
+	i=np.clip(np.searchsorted(s*ut,s*u),1,Tt.size-1)
+	a=Tt[i-1]
+	b=Tt[i]
+	T=a+(u-ut[i-1])*(b-a)/(ut[i]-ut[i-1])
+	act=np.arange(u.size) #points not converged yet
+	tol=4*np.finfo(float).eps
+	ftol=tol*34.3934 #rounding of P in PLTS2000T2P, bar
+	for _ in range(maxiter):
+		t=T[act]
+		f=PLTS2000T2P(t,Pn=0)-u[act]
+		above=s*f>0 #t is above the root
+		a[act]=np.where(above,a[act],t)
+		b[act]=np.where(above,t,b[act])
+		tn=t-f/PLTS2000dPdT(t)
+		conv=np.abs(f)<=ftol #t is a root within rounding
+		out=~((tn>=a[act])&(tn<=b[act])) #also catches nan
+		tn=np.where(out,np.where(conv,t,(a[act]+b[act])/2),tn)
+		T[act]=tn
+		act=act[~(conv|(np.abs(tn-t)<=tol*t))]
+		if not act.size:
+			break
+	return T
 def PLTS2000P2T(P,Pn=34.3934):
 	'''
 	Pressure to temperature in PLTS-2000 scale. Limit is 0.680014mK-1K.
@@ -172,6 +292,51 @@ def PLTS2000P2T(P,Pn=34.3934):
 	Note:
 	-----
 	P lower than model allowed minimum will be changed to the minimum.
+	P higher than model allowed low T branch max will return Tlow=nan, this model allowed max P happened at T=0.680014mK. Likewise P higher than P(T=1000mK) returns Thigh=nan, and nan P returns nan.
+	The valid range, [0.9,1000]mK, is smaller than the calculable range.
+	The branches are inverted by PLTS2000Invert, seeded from the Pn independent PLTS2000Table in P-Pn; all points are solved together.
+	Error bound: T is the root of the rounded PLTS2000T2P, whose rounding error grows to ~50 ulp(P) near 1000mK; the same holds for PLTS2000P2T_brentq. Compared with the exact T behind P, the error is below 1e-12 relative on [0.9,1000]mK and below 1e-9 relative on [0.6801,0.9]mK. Where dP/dT vanishes, below 0.6801mK (dP/dT=0 at 0.680014mK) and within 15mK of the pressure minimum at 315.23959351mK, T is only determined to about sqrt(2*ulp(P)/|d2P/dT2|), at most 3e-7mK and 1e-5mK, by any method including PLTS2000P2T_brentq. PLTS2000P2TCheck checks these bounds.
+	'''
+	scalar=not(isinstance(P,(list,tuple,np.ndarray)))
+	u=np.array(P,dtype=float)-Pn
+	if scalar:
+		u=u.reshape(1)
+	(Tt0,ut0),(Tt1,ut1)=PLTS2000Table()
+	umin=ut1[0] #minimal pressure in this model, minus Pn.
+	low=u<umin
+	if np.any(low): #check if P is no smaller than model allowed minimum
+		Pmin=umin+Pn
+		warnings.warn('\nPressure must be higher than %.12f..bar.\nInput value will be auto-converted to %.12f..bar.'%(Pmin,Pmin))
+		u=np.where(low,umin,u) #make P as least Pmin
+
+	Tlow=np.full(u.shape,np.nan) #nan where there is no root on the low T branch
+	ok=u<=ut0[0]
+	Tlow[ok]=PLTS2000Invert(u[ok],Tt0,ut0)
+	Thigh=np.full(u.shape,np.nan)
+	ok=u<=ut1[-1]
+	Thigh[ok]=PLTS2000Invert(u[ok],Tt1,ut1)
+
+	if scalar:
+		return np.array([Tlow[0],Thigh[0]]) #return as [Tlow,Thigh]
+	return np.array([Tlow,Thigh]) #return as [[Tlows],[Thighs]]
+#=======================================================================
+#=======================================================================
+def PLTS2000P2T_brentq(P,Pn=34.3934):
+	'''
+	Pressure to temperature in PLTS-2000 scale by one scipy.optimize.brentq root search per branch and point. Reference implementation of PLTS2000P2T, much slower.
+	Syntax:
+	-------
+	T=PLTS2000P2T_brentq(P[,Pn=34.3934])
+	Parameters:
+	-----------
+	P: Pressure in bar, sequence aware.
+	Pn: Neel transition pressure in bar.
+	Returns:
+	--------
+	T: np.array of calculated temperatures. For scalar P input: T=[Tlow,Thigh], for sequence P input: T=[[Tlows],[Thighs]], even if len(P)==1.
+	Note:
+	-----
+	P lower than model allowed minimum will be changed to the minimum.
 	P higher than model allowed low T branch max will return Tlow=nan, this model allowed max P happened at T=0.680014mK.
 	The valid range, [0.9,1000]mK, is smaller than the calculable range.
 	'''
@@ -207,6 +372,50 @@ def PLTS2000P2T(P,Pn=34.3934):
 		T=np.append(T,tt)
 	return np.array([T[0::2],T[1::2]]) #return as [[Tlows],[Thighs]]
 #=======================================================================
+def PLTS2000P2TCheck(n=3000,Pn=34.3934):
+	'''
+	Regression check of PLTS2000P2T against the error bound in its docstring and against PLTS2000P2T_brentq, on n temperatures log-spaced over 0.680014-1000mK and n//10 within 1e-4mK of 0.680014mK.
+	Syntax:
+	-------
+	err=PLTS2000P2TCheck([n=3000,Pn=34.3934])
+	Parameters:
+	-----------
+	n: int, number of temperatures.
+	Pn: Neel transition pressure in bar.
+	Returns:
+	--------
+	err: dict, largest error of T=PLTS2000P2T(PLTS2000T2P(T)) on the branch of T, absolute (mK) on 'cusp' below 0.6801mK and on 'near' within 15mK of the pressure minimum, relative on 'low' [0.6801,0.9]mK and on 'far' the rest of [0.9,1000]mK; 'brentq' largest |T-T_brentq| on both branches, in units of its tolerance.
+	Note:
+	-----
+	Raises AssertionError if a bound is exceeded or the nan pattern differs from PLTS2000P2T_brentq. PLTS2000P2T_brentq is converged to its default xtol=2e-12mK and is also limited by the rounding of P, so the two agree to twice the bound at the root plus xtol.
+	'''
+	Tmin=315.23959351
+	T=np.concatenate((np.linspace(0.680014,0.6801,n//10),np.geomspace(0.680014,1000,n)))
+	P=PLTS2000T2P(T,Pn=Pn)
+	new=PLTS2000P2T(P,Pn=Pn)
+	ref=PLTS2000P2T_brentq(P,Pn=Pn)
+	if not np.array_equal(np.isnan(new),np.isnan(ref)):
+		raise AssertionError('PLTS2000P2T: nan pattern differs from PLTS2000P2T_brentq')
+	Tb=np.where(T<=Tmin,new[0],new[1]) #root on the branch of T
+	cusp=T<0.6801
+	near=np.abs(T-Tmin)<15
+	low=(T>=0.6801)&(T<0.9)
+	far=~(cusp|near|low)
+	bound=lambda X: np.select([X<0.6801,np.abs(X-Tmin)<15,X<0.9],[3e-7,1e-5,1e-9*X],1e-12*X) #mK, at root X
+	e=np.abs(Tb-T)
+	err={'cusp':np.max(e[cusp]),'low':np.max(e[low]/T[low]),'far':np.max(e[far]/T[far]),'near':np.max(e[near])}
+	ok=~np.isnan(ref)
+	err['brentq']=np.max((np.abs(new-ref)/(2*bound(ref)+2e-12))[ok])
+	if np.any(e>bound(T)):
+		raise AssertionError('PLTS2000P2T: error bound exceeded, %s'%err)
+	if err['brentq']>1:
+		raise AssertionError('PLTS2000P2T: differs from PLTS2000P2T_brentq beyond the bound, %s'%err)
+	return err
+#=======================================================================
+floridab0=0.17601979525638645 #kPa, b0=0.2611*0.9**4+(PLTS2000T2P(0.9,Pn=Pn)-Pn)*100, is shifted from the original Florida scale value to match with PLTS2000 tablular values. When T=0.9mK which is the lower bound of PLTS2000 scale, P_florida(T=0.9mK)=P_PLTS2000(T=0.9mK), so that the two scales are continuous at 0.9mK. This value is independent of the choice of Pn.
+floridab4=-0.2611 #kPa/mK**4
+floridaTn=0.9061261416052492 #mK, Tn of the shifted scale, (-b0/b4)**(1/4).
+#=======================================================================
 def floridaT2P(T,Pn=34.3934):
 	'''
 	Florida temperature scale: T(bar)->P(bar). Only valid for T<Tn and T=Tn.
@@ -226,9 +435,7 @@ def floridaT2P(T,Pn=34.3934):
 	'''
 	T=np.array(T,dtype=float)
 	PnkPa=Pn*100 #bar to kPa
-	b0=0.17601979525638645 #b0=0.2611*0.9**4+(PLTS2000T2P(0.9,Pn=Pn)-Pn)*100, is shifted from the original Florida scale value to match with PLTS2000 tablular values. When T=0.9mK which is the lower bound of PLTS2000 scale, P_florida(T=0.9mK)=P_PLTS2000(T=0.9mK), so that the two scales are continuous at 0.9mK. This value is independent of the choice of Pn.
-	b4=-0.2611
-	PkPa=PnkPa+b0+b4*T**4
+	PkPa=PnkPa+floridab0+floridab4*T**4
 	P=PkPa/100 #return in bar
 	return P
 #=======================================================================
@@ -247,86 +454,116 @@ def floridaP2T(P,Pn=34.3934):
 	T: temperature in mK.
 	Note:
 	-----
-	The valid range for the formula is [0.5mK,Tn], here Tn=0.9061261416052492!=0.902mK due to the shift. The solutions within [0,0.5)mK are also returned for the sake of keeping as many number outputs as possible. The scale overlaps with PLTS2000 above 0.9mK, for which the PLTS2000 is preferred over florida scale.
+	The formula is inverted in closed form, T=((P-Pn-b0)/b4)**(1/4) in kPa. The valid range for the formula is [0.5mK,Tn], here Tn=0.9061261416052492!=0.902mK due to the shift. The solutions within [0,0.5)mK are also returned for the sake of keeping as many number outputs as possible. The scale overlaps with PLTS2000 above 0.9mK, for which the PLTS2000 is preferred over florida scale.
 	'''
-#-----------------------------------------------------------------------
-# single run function that solves for T with input P using florida scale with a given Neel transition pressure Pn.
-	def floridaP2T_single(P,Pn):
-		f=lambda T:floridaT2P(T,Pn=Pn)-P
-		if f(0.9061261416052492)>0: #P below its Tn value
-			T=np.nan
-		elif f(0)<0: #P above its zero-T value.
-			T=np.nan
-		else: #P(T=0)>=P>=P(T=Tn)
-			T=scipy.optimize.brentq(f,0,0.9061261416052492) #solve: f=0
-		return T
-#-----------------------------------------------------------------------
-# if P is a scalar, simply do calculation
-	if not(isinstance(P,(list,tuple,np.ndarray))): #input is scalar
-		return floridaP2T_single(P,Pn) #return as [Tlow,Thigh]
-
-# if P is a sequence, do array calculation
-# wrap around floridaP2T_single to accomodate np.array input and output
-	P=np.array(P,dtype=float)
-	wrapFloridaP2T=np.vectorize(floridaP2T_single)
-	T=wrapFloridaP2T(P,Pn)
+	T4=((np.array(P,dtype=float)-Pn)*100-floridab0)/floridab4 #invert P=Pn+b0+b4*T**4 in kPa
+	valid=(T4>=0)&(T4<=floridaTn**4) #P(T=0)>=P>=P(T=Tn), false for nan
+	T=np.full(T4.shape,np.nan)
+	T[valid]=np.sqrt(np.sqrt(T4[valid]))
+	if T.ndim==0: #input is scalar
+		return float(T)
 	return T
 #=======================================================================
 def floridaPLTS2000P2T_single(P,Pn=34.3934):
 	'''
-        Calculate a single T from a single P assuming T<315.24mK, which is the PLTS2000 minimum.
+	Calculate a single T from a single P assuming T<315.24mK, which is the PLTS2000 minimum.
 	Below 0.9mK, it follows florida scale.
-        Above 0.9mK, it follows PLTS2000 scale.
+	Above 0.9mK, it follows PLTS2000 scale.
 	Syntax:
-        -------
+	-------
 	T=floridaPLTS2000P2T_single(P[,Pn=34.3934])
 	Parameters:
 	-----------
 	P: float; Pressure in bar.
-        Pn: float; Neel transition pressure.
-        Returns:
-        --------
+	Pn: float; Neel transition pressure.
+	Returns:
+	--------
 	T: float; Temperature in mK.
-        '''
-	P09=floridaT2P(0.9,Pn=Pn)
-	if P>P09:
-	        T=floridaP2T(P,Pn=Pn)
-	elif P==P09:
-	        T=0.9
-	else:
-		T=PLTS2000P2T(P,Pn=Pn)[0]
-	return T
+	'''
+	return float(floridaPLTS2000P2T(P,Pn=Pn))
 #=======================================================================
 def floridaPLTS2000P2T(P,Pn=34.3934):
 	'''
 	Calculate a sequence of T from a sequence of P assuming T<315.24mK, which is the PLTS2000 minimum.
-        Below 0.9mK, it follows florida scale.
+	Below 0.9mK, it follows florida scale.
 	Above 0.9mK, it follows PLTS2000 scale.
-        Syntax:
-        -------
-	T=floridaPLTS2000P2T_single(P[,Pn=34.3934])
-        Parameters:
+	Syntax:
+	-------
+	T=floridaPLTS2000P2T(P[,Pn=34.3934])
+	Parameters:
 	-----------
-        P: Pressure in bar.
+	P: Pressure in bar, sequence aware.
 	Pn: Neel transition pressure.
-        Returns:
+	Returns:
 	--------
-        T: Temperature in mK.
+	T: np.array of Temperature in mK, same shape as P.
+	Note:
+	-----
+	Points are split by a mask at P(T=0.9mK); the florida side uses the closed form of floridaP2T, the rest the low branch of PLTS2000P2T. Returns nan above P(T=0), and for nan P.
 	'''
-	wrapFloridaPLTS2000P2T=np.vectorize(floridaPLTS2000P2T_single)
-	T=wrapFloridaPLTS2000P2T(P,Pn=Pn)
+	P=np.array(P,dtype=float)
+	P09=floridaT2P(0.9,Pn=Pn)
+	T=np.empty(P.shape)
+	florida=P>P09
+	T[florida]=floridaP2T(P[florida],Pn=Pn)
+	T[P==P09]=0.9
+	plts=~(P>=P09) #including nan
+	if np.any(plts):
+		T[plts]=PLTS2000P2T(P[plts],Pn=Pn)[0]
 	return T
 #=======================================================================
-def he3P2Nu(P,deg=5):
+he3Tables={
+	'Nu':(tuple(np.linspace(0,34,35)),(36.818, 35.715, 34.761, 33.934, 33.215,\
+	32.587, 32.036, 31.547, 31.110, 30.716,\
+	30.357, 30.025, 29.716, 29.426, 29.150,\
+	28.888, 28.638, 28.398, 28.168, 27.949,\
+	27.739, 27.541, 27.354, 27.177, 27.012,\
+	26.857, 26.711, 26.572, 26.438, 26.306,\
+	26.170, 26.025, 25.864, 25.677, 25.456)),#cite Halperin1990,P510, molar volume(cm^3/mol) against P(bar)
+	'Tc':(tuple(np.linspace(0,34,35)),(0.929, 1.061, 1.181, 1.290, 1.388,\
+	1.478, 1.560, 1.636, 1.705, 1.769,\
+	1.828, 1.883, 1.934, 1.981, 2.026,\
+	2.067, 2.106, 2.143, 2.177, 2.209,\
+	2.239, 2.267, 2.293, 2.317, 2.339,\
+	2.360, 2.378, 2.395, 2.411, 2.425,\
+	2.438, 2.451, 2.463, 2.474, 2.486)),# Halperin P510, Tc(mK) against P(bar)
+	'Tab0':(tuple(np.concatenate(([21.22],np.linspace(22,34,13),[34.338,34.358]))),(2.273, 2.262, 2.242, 2.217, 2.191,\
+	2.164, 2.137, 2.111, 2.083, 2.056,\
+	2.027, 1.998, 1.969, 1.941, 1.933,\
+	1.932)),# vollhardt P97, Tab(mK) at B=0 against P(bar)
+}
+#=======================================================================
+@lru_cache(maxsize=32)
+def he3Fit(name,deg=5):
+	'''
+	Polynomial fit of an embedded he3 data table, computed once and cached per (name,deg).
+	Syntax:
+	-------
+	popt=he3Fit(name[,deg=5])
+	Parameters:
+	-----------
+	name: str, key of he3Tables; 'Nu', 'Tc' or 'Tab0'.
+	deg: np.polyfit degree.
+	Returns:
+	--------
+	popt: read-only np.array, fitted polynomial parameters, lower order terms in front.
+	'''
+	x,y=he3Tables[name]
+	popt=np.polyfit(x,y,int(deg))[::-1].copy() #poly fit, lower order terms in front
+	popt.flags.writeable=False
+	return popt
+#=======================================================================
+def he3P2Nu(P,deg=5,popt=None):
 	'''
 	Calculate molar volume(cm^3/mol) from given pressure(bar).
 	Syntax:
 	-------
-	Nu,popt=he3P2Nu(P[,deg=5])
+	Nu,popt=he3P2Nu(P[,deg=5,popt=None])
 	Parameters:
 	-----------
 	P: Pressure in bar.
 	deg: np.polyfit degree, polynomial order to fit the Halperin data.
+	popt: precomputed polynomial parameters, lower order terms in front, e.g. a popt returned by an earlier call; deg is ignored if given.
 	Returns:
 	--------
 	Nu: Molar volume in cm^3/mol.
@@ -334,29 +571,24 @@ def he3P2Nu(P,deg=5):
 	Notes:
 	------
 	deg=5 because test fits show this to be sufficient. deg<5 will cause inaccuracy. deg>5 can be done, but may be unnecessary.
+	The fit is cached by he3Fit, and popt is returned as a copy.
 	'''
-	x=np.linspace(0,34,35)
-	y=[36.818, 35.715, 34.761, 33.934, 33.215,\
-	32.587, 32.036, 31.547, 31.110, 30.716,\
-	30.357, 30.025, 29.716, 29.426, 29.150,\
-	28.888, 28.638, 28.398, 28.168, 27.949,\
-	27.739, 27.541, 27.354, 27.177, 27.012,\
-	26.857, 26.711, 26.572, 26.438, 26.306,\
-	26.170, 26.025, 25.864, 25.677, 25.456]#cite Halperin1990,P510
-	popt=np.polyfit(x,y,deg)[::-1] #poly fit, lower order terms in front
+	if popt is None:
+		popt=he3Fit('Nu',deg)
 	Nu=np.polynomial.polynomial.polyval(P,popt) #molar volume(cm^3/mol)
-	return Nu, popt
+	return Nu, np.array(popt)
 #=======================================================================
-def he3P2Tc(P,deg=5):
+def he3P2Tc(P,deg=5,popt=None):
 	'''
 	Calculate superfluid transition temperature(mK) from given pressure(bar).
 	Syntax:
 	-------
-	Tc,popt=he3P2Tc(P[,deg=5])
+	Tc,popt=he3P2Tc(P[,deg=5,popt=None])
 	Parameters:
 	-----------
 	P: Pressure in bar.
 	deg: np.polyfit degree, polynomial order to fit the Halperin data.
+	popt: precomputed polynomial parameters, lower order terms in front, e.g. a popt returned by an earlier call; deg is ignored if given.
 	Returns:
 	--------
 	Tc: superfluid transition temperature in mK.
@@ -364,29 +596,24 @@ def he3P2Tc(P,deg=5):
 	Notes:
 	------
 	deg=5 because test fits show this to be sufficient. deg<5 will cause inaccuracy. deg>5 can be done, but may be unnecessary.
+	The fit is cached by he3Fit, and popt is returned as a copy.
 	'''
-	p=np.linspace(0,34,35)
-	tc=[0.929, 1.061, 1.181, 1.290, 1.388,\
-	1.478, 1.560, 1.636, 1.705, 1.769,\
-	1.828, 1.883, 1.934, 1.981, 2.026,\
-	2.067, 2.106, 2.143, 2.177, 2.209,\
-        2.239, 2.267, 2.293, 2.317, 2.339,\
-        2.360, 2.378, 2.395, 2.411, 2.425,\
-        2.438, 2.451, 2.463, 2.474, 2.486] # Halperin P510
-	popt=np.polyfit(p,tc,deg)[::-1]
+	if popt is None:
+		popt=he3Fit('Tc',deg)
 	Tc=np.polynomial.polynomial.polyval(P,popt)
-	return Tc, popt
+	return Tc, np.array(popt)
 #=======================================================================
-def he3P2Tab0(P,deg=5):
+def he3P2Tab0(P,deg=5,popt=None):
 	'''
 	Calculate A-B transition temperature(mK) when B=0 from given pressure(bar).
 	Syntax:
 	-------
-	Tab0,popt=he3P2Tab0(P[,deg=5])
+	Tab0,popt=he3P2Tab0(P[,deg=5,popt=None])
 	Parameters:
 	-----------
 	P: Pressure in bar.
 	deg: np.polyfit degree, polynomial order to fit the Vollhardt data.
+	popt: precomputed polynomial parameters, lower order terms in front, e.g. a popt returned by an earlier call; deg is ignored if given.
 	Returns:
 	--------
 	Tab0: A-B transition temperature in mK when B=0. For pressures outside the 21.22-34.538bar range, Tab returns np.nan.
@@ -394,19 +621,47 @@ def he3P2Tab0(P,deg=5):
 	Notes:
 	------
 	deg=5 because test fits show this to be sufficient. deg<5 will cause inaccuracy. deg>5 can be done, but may be unnecessary.
+	The fit is cached by he3Fit, and popt is returned as a copy.
 	'''
-	p=np.concatenate(([21.22],np.linspace(22,34,13),[34.338,34.358]))
-	tab=[2.273, 2.262, 2.242, 2.217, 2.191,\
-	2.164, 2.137, 2.111, 2.083, 2.056,\
-	2.027, 1.998, 1.969, 1.941, 1.933,\
-	1.932] # vollhardt P97
-	popt=np.polyfit(p,tab,deg)[::-1]
+	if popt is None:
+		popt=he3Fit('Tab0',deg)
 
 	P=np.asarray(P)
 	P=np.where(P<21.22,np.nan,P) # no a-b transition below 21.22bar
 	P=np.where(P>34.358,np.nan,P) # solid above 34.358bar
 	Tab=np.polynomial.polynomial.polyval(P,popt)
-	return Tab, popt
+	return Tab, np.array(popt)
+#=======================================================================
+def he3TabcCoef(P):
+	'''
+	Pressure dependent coefficients of the A-B transition model of he3P2Tabc. Reference is [Inseob Hahn thesis in 1993].
+	Syntax:
+	-------
+	Tc,Bc,f=he3TabcCoef(P)
+	Parameters:
+	-----------
+	P: Pressure in bar, sequence aware.
+	Returns:
+	--------
+	Tc: superfluid transition temperature in mK.
+	Bc: critical field in Gauss, the A-B transition vanishes above it.
+	f: tuple (f1,f2,f3,f4,f5), the A-B transition at reduced temperature Y=Tab/Tc satisfies (f1*Y**2+f2*Y**4+f3*Y**6+f4*Y**8)/(1+f5*Y**2)=(1-B**2/Bc**2)**(1/2).
+	'''
+	p=np.asarray(P,dtype=float)/34.338
+	def G(p,p0,p1,p2,p3,q1):
+		return (p0+p1*p+p2*p**2+p3*p**3)/(1+q1*p)
+	Tc=G(p,0.9294,6.659,0.3406,-0.5012,1.9844) # mK
+	tab=G(p,1.5745,-1.1222,0.3242,0,0)
+	g=1/(G(p,0.616,-1.174,0.301,0,0))
+	F0a=G(p,0.303,0.717,0.112,0,3.611)-1
+	Bc=G(p,3391,21500,-8490,0,2.098) # gauss?
+	f3=G(p,1.41,0,0,0,0)
+	f4=G(p,-0.29,-0.41,0,0,0)
+	B0=1.97e4*Tc*(1+F0a) # gauss
+	f5=( 1-f3*tab**6-f4*tab**8-(1-f3-f4)*tab**2+(1+2*f3+3*f4)*(tab**4-tab**2) )/( 1/4/g*(B0/Bc)**2*(tab**4-tab**2) )-1
+	f2=1/4/g*(B0/Bc)**2*(1+f5)-1-2*f3-3*f4
+	f1=1+f5-f2-f3-f4
+	return Tc,Bc,(f1,f2,f3,f4,f5)
 #=======================================================================
 def he3P2Tabc(P,B):
 	'''
@@ -416,6 +671,94 @@ def he3P2Tabc(P,B):
 	Tab,Tc=he3P2Tabc(P,B)
 	Parameters:
 	-----------
+	P: Pressure in bar, sequence aware.
+	B: Magnetic field strength in Gauss, sequence aware, broadcast with P.
+	Returns:
+	--------
+	Tab: A-B transition temperature in mK; 0 where there is no transition, e.g. B above Bc; nan for nan input.
+	Tc: superfluid transition temperature in mK.
+	Both are floats for scalar P and B, otherwise np.arrays of the broadcast shape.
+	Note:
+	-----
+	With s=Y**2=(Tab/Tc)**2 and X2=(1-B**2/Bc**2)**(1/2), the model of he3TabcCoef is the quartic f4*s**4+f3*s**3+f2*s**2+(f1-X2*f5)*s-X2=0, whose roots are the eigenvalues of its companion matrix, solved for all points in one batch. As in he3P2Tabc_sympy, the smallest positive real root is taken; the others are probably Tab>Tc. Each root is polished by one Newton step, and Tab agrees with he3P2Tabc_sympy to 1e-10 relative, the default rtol of he3P2TabcCheck.
+	'''
+	P,B=np.broadcast_arrays(np.asarray(P,dtype=float),np.asarray(B,dtype=float))
+	Tc,Bc,(f1,f2,f3,f4,f5)=he3TabcCoef(P)
+	with np.errstate(invalid='ignore'):
+		X2=np.sqrt(1-B**2/Bc**2) # nan above Bc, no transition
+	c=np.stack((-X2,f1-X2*f5,f2,f3),axis=-1)/f4[...,np.newaxis] # monic quartic, lower order terms in front
+	Tab=np.where(np.isnan(P+B),np.nan,0.)
+	ok=np.all(np.isfinite(c),axis=-1)
+	if np.any(ok):
+		c=c[ok]
+		comp=np.zeros((c.shape[0],4,4))
+		comp[:,1:,:-1]=np.eye(3)
+		comp[:,:,-1]=-c
+		s=np.linalg.eigvals(comp)
+		real=(np.abs(s.imag)<=1e-8*np.maximum(np.abs(s.real),1))&(s.real>0)
+		s=np.where(real,s.real,np.inf)
+		cf=np.concatenate((c,np.ones((c.shape[0],1))),axis=1)
+		q=np.polynomial.polynomial.polyval(s.T,cf.T,tensor=False).T
+		dq=np.polynomial.polynomial.polyval(s.T,(cf[:,1:]*np.arange(1,5)).T,tensor=False).T
+		with np.errstate(invalid='ignore',divide='ignore'):
+			s=np.where(real&(dq!=0),s-q/dq,s) # Newton polish
+		s[np.isclose(1+f5[ok][:,np.newaxis]*s,0)]=np.inf # pole of the rational form
+		smin=np.min(s,axis=1)
+		Tab[ok]=np.where(np.isfinite(smin),Tc[ok]*np.sqrt(smin),0.)
+	if Tab.ndim==0:
+		return float(Tab),float(Tc)
+	return Tab,Tc
+#=======================================================================
+def he3PhaseDiagram(P,B):
+	'''
+	A-B and superfluid transition temperatures of he3P2Tabc on a pressure-field grid.
+	Syntax:
+	-------
+	Tab,Tc=he3PhaseDiagram(P,B)
+	Parameters:
+	-----------
+	P: 1D sequence of pressures in bar.
+	B: 1D sequence of magnetic fields in Gauss.
+	Returns:
+	--------
+	Tab,Tc: np.array of shape (len(P),len(B)) in mK, Tab[i,j] at P[i],B[j].
+	'''
+	P=np.asarray(P,dtype=float).ravel()
+	B=np.asarray(B,dtype=float).ravel()
+	return he3P2Tabc(P[:,np.newaxis],B[np.newaxis,:])
+#=======================================================================
+def he3Phase(T,P,B):
+	'''
+	Superfluid phase of liquid he3 at temperature T, pressure P and magnetic field B, from he3P2Tabc.
+	Syntax:
+	-------
+	phase=he3Phase(T,P,B)
+	Parameters:
+	-----------
+	T: temperature in mK.
+	P: Pressure in bar.
+	B: Magnetic field strength in Gauss.
+	T, P and B are sequence aware and broadcast together.
+	Returns:
+	--------
+	phase: int np.array, 0 for normal (T>=Tc), 1 for A phase (Tab<=T<Tc), 2 for B phase (T<Tab); -1 for nan input.
+	Note:
+	-----
+	Solid and the melting curve are not checked.
+	'''
+	T=np.asarray(T,dtype=float)
+	Tab,Tc=he3P2Tabc(P,B)
+	phase=np.where(T<Tab,2,np.where(T<Tc,1,0))
+	return np.where(np.isnan(T+Tab),-1,phase)
+#=======================================================================
+def he3P2Tabc_sympy(P,B):
+	'''
+	Calculate A-B and superfluid transition temperature(mK) from given pressure and magnetic field by sympy.solve. Reference is [Inseob Hahn thesis in 1993]. Reference implementation of he3P2Tabc, for scalar P and B only, and seconds per point.
+	Syntax:
+	-------
+	Tab,Tc=he3P2Tabc_sympy(P,B)
+	Parameters:
+	-----------
 	P: Pressure in bar.
 	B: Magnetic field strength in Gauss.
 	Returns:
@@ -439,6 +782,8 @@ def he3P2Tabc(P,B):
 	X=(1-B**2/Bc**2)**(1/4)
 	def F(Y):
 	    return (f0+f1*Y**2+f2*Y**4+f3*Y**6+f4*Y**8)/(1+f5*Y**2)-X**2
+	from sympy.solvers import solve # imported here, sympy is slow to import
+	from sympy import Symbol
 	Y=Symbol('Y',real=True) # Y must be real
 	Yroot=solve(F(Y),Y)
 	Yroot=np.array(Yroot)
@@ -449,6 +794,37 @@ def he3P2Tabc(P,B):
 	Tab=float(Tc*root)
 	return Tab, Tc
 #=======================================================================
+def he3P2TabcCheck(n=36,seed=7,rtol=1e-10):
+	'''
+	Regression check of he3P2Tabc against he3P2Tabc_sympy, on n random points with 0<=P<=34.4bar and 0<=B<=20kG and on the corners (P,B)=(0,0),(34.338,0),(21.22,500),(30,20000), the last one without transition.
+	Syntax:
+	-------
+	err=he3P2TabcCheck([n=36,seed=7,rtol=1e-10])
+	Parameters:
+	-----------
+	n: int, number of random points, he3P2Tabc_sympy takes seconds per point.
+	seed: random seed of the points.
+	rtol: relative tolerance of Tab and Tc.
+	Returns:
+	--------
+	err: dict, 'Tab','Tc' largest relative differences, 'nzero' number of points without transition.
+	Note:
+	-----
+	Raises AssertionError if a difference exceeds rtol or the points without transition (Tab=0) differ; Tab=0 must be exact.
+	'''
+	rng=np.random.default_rng(seed)
+	P=np.r_[rng.uniform(0,34.4,n),[0,34.338,21.22,30.]]
+	B=np.r_[rng.uniform(0,20000,n),[0,0,500.,20000]]
+	ref=np.array([he3P2Tabc_sympy(p,b) for p,b in zip(P,B)])
+	Tab,Tc=he3P2Tabc(P,B)
+	zero=ref[:,0]==0
+	if not np.array_equal(Tab==0,zero):
+		raise AssertionError('he3P2Tabc: points without transition differ from he3P2Tabc_sympy')
+	err={'Tab':np.max(np.abs(Tab-ref[:,0])[~zero]/ref[~zero,0]),'Tc':np.max(np.abs(Tc-ref[:,1])/ref[:,1]),'nzero':int(zero.sum())}
+	if err['Tab']>rtol or err['Tc']>rtol:
+		raise AssertionError('he3P2Tabc: differs from he3P2Tabc_sympy beyond rtol, %s'%err)
+	return err
+#=======================================================================
 def domainfft(t):
 	'''
 	Generate FFT f-domain based on t-domain's number of points and its sampling rate.
@@ -603,6 +979,155 @@ def FID0ffts(f,*p,zerofillnum=0):
 		wave0fillfft+=FID0fft(f,*p[i*4:i*4+4:],zerofillnum=zerofillnum)
 	return wave0fillfft
 #=======================================================================
+def _dftSetup(f,zerofillnum=0,bins=None):
+	'''
+	Prepare the quantities shared by FID0dfts and FID0dftsJac.
+	Syntax:
+	-------
+	dt,N,M,m=_dftSetup(f[,zerofillnum=0,bins=None])
+	Parameters:
+	-----------
+	f: Frequency array, before zerofilling.
+	zerofillnum: number of extra zero points appended to FID.
+	bins: indices (or boolean mask of length len(f)+zerofillnum) of the zero-filled FFT bins to be evaluated, None means all bins.
+	Returns:
+	--------
+	dt: time step of the FID, the same as the one generated by domainfft(f).
+	N: number of FID points before zerofilling.
+	M: number of points after zerofilling.
+	m: np.array of int, evaluated bin indices.
+	'''
+	N=len(f)
+	M=N+zerofillnum
+	tstep=(max(f)-min(f))/(N-1) # same steps as domainfft
+	dt=1/tstep/N
+	if bins is None:
+		m=np.arange(M)
+	else:
+		m=np.asarray(bins)
+		if m.dtype==bool:
+			m=np.flatnonzero(m)
+	return dt,N,M,m
+#=======================================================================
+def _dftGeometric(L,NL,N):
+	'''
+	Geometric sum G=sum(exp(k*L),k=0..N-1)=(1-exp(N*L))/(1-exp(L)) and its derivative dG/dL.
+	Syntax:
+	-------
+	G,dG=_dftGeometric(L,NL,N)
+	Parameters:
+	-----------
+	L: complex np.array, log of the common ratio.
+	NL: complex np.array, N*L, with its imaginary part reduced by the caller to avoid rounding.
+	N: int, number of terms.
+	Returns:
+	--------
+	G,dG: complex np.array, the sum and its derivative with respect to L. The removable singularity at exp(L)=1 returns the limits G=N, dG=N(N-1)/2.
+	'''
+	r=np.exp(L)
+	rN=np.exp(NL)
+	one_r=1-r
+	zero=(one_r==0) # only happens when T=inf and f0 lies exactly on the bin
+	one_r=np.where(zero,1,one_r)
+	G=np.where(zero,N,(1-rN)/one_r)
+	dG=np.where(zero,N*(N-1)/2,(-N*rN*one_r+(1-rN)*r)/one_r**2)
+	return G,dG
+#=======================================================================
+def _dftPeaks(f,p,zerofillnum,bins,jac):
+	'''
+	Evaluate the analytic DFT of each FID peak, and optionally its derivatives. Kernel of FID0dfts and FID0dftsJac.
+	The DFT of a truncated exponentially damped cosine is a sum of two geometric series:
+	X[m]=s0/2*(exp(i*phase)*G(L+)+exp(-i*phase)*G(L-)), L+-=-dt/T+-i*2*pi*f0*dt-i*2*pi*m/M, G(L)=(1-exp(N*L))/(1-exp(L)).
+	'''
+	dt,N,M,m=_dftSetup(f,zerofillnum=zerofillnum,bins=bins)
+	q=2*pi*m/M
+	qN=2*pi*((m*N)%M)/M # N*q reduced exactly to [0,2pi) to keep exp(N*L) accurate
+	p=np.array(p,float)
+	numpk=int(p.shape[0]/4) #number of peaks
+	wave=np.zeros(p.shape[1:]+m.shape,complex) # p of shape (4*numpk,K) gives K spectra
+	J=np.zeros((m.size,4*numpk),complex) if jac else None
+	for i in range(0,numpk):
+		s0,T,f0,phase=p[i*4:i*4+4,...,np.newaxis] if p.ndim>1 else p[i*4:i*4+4]
+		a=-dt/T # decay per step
+		w=2*pi*f0*dt # oscillation per step
+		ph=np.exp(1j*radians(phase))
+		Gp,dGp=_dftGeometric(a+1j*(w-q),N*a+1j*((N*w)%(2*pi)-qN),N)
+		Gm,dGm=_dftGeometric(a-1j*(w+q),N*a-1j*((N*w)%(2*pi)+qN),N)
+		unit=(ph*Gp+Gm/ph)/2 # peak with s0=1
+		wave+=s0*unit
+		if jac:
+			J[:,i*4]=unit # d/ds0
+			J[:,i*4+1]=s0/2*(ph*dGp+dGm/ph)*dt/T**2 # d/dT, dL/dT=dt/T^2
+			J[:,i*4+2]=s0/2*(ph*dGp-dGm/ph)*2j*pi*dt # d/df0, dL+-/df0=+-i*2*pi*dt
+			J[:,i*4+3]=s0/2*(ph*Gp-Gm/ph)*1j*pi/180 # d/dphase, phase in degree
+	return wave,J
+#=======================================================================
+def FID0dft(f,s0,T,f0,phase,zerofillnum=0,bins=None):
+	'''
+	Analytic discrete fourier transform of a zero-filled free-induction-decay spectrum, evaluated from a closed geometric-series form instead of an FFT.
+	Syntax:
+	-------
+	wave0filldft=FID0dft(f,s0,T,f0,phase[,zerofillnum=0,bins=None])
+	Parameters:
+	-----------
+	f: Frequency array, before zerofilling.
+	s0: Amplitude of waveform.
+	T: Decay time constant.
+	f0: Frequency of FID's oscillation.
+	phase: Initial phase offset (degree).
+	zerofillnum: number of extra zero points appended to FID.
+	bins: indices (or boolean mask of length len(f)+zerofillnum) of the zero-filled FFT bins to be evaluated, None means all bins.
+	Returns:
+	--------
+	wave0filldft: DFT of zero-filled FID at the requested bins.
+	Note:
+	-----
+	FID0dft(f,*p,zerofillnum=n)==FID0fft(f,*p,zerofillnum=n) to rounding error.
+	'''
+	wave0filldft,_=_dftPeaks(f,[s0,T,f0,phase],zerofillnum,bins,False)
+	return wave0filldft
+#=======================================================================
+def FID0dfts(f,*p,zerofillnum=0,bins=None):
+	'''
+	Analytic DFT of a superposed spectrum of multiple FIDs with the same zerofilling, evaluated only at the requested bins.
+	Syntax:
+	-------
+	wave0filldft=FID0dfts(f,*p[,zerofillnum=0,bins=None])
+	Parameters:
+	-----------
+	f: Frequency array, before zerofilling.
+	p: [s01,T1,f01,phase1,s02,T2,f02,phase2,...], 4xN long array, decribing each FID; each item may also be an array of length K, for K parameter sets at once.
+	zerofillnum: number of extra zero points appended to FID.
+	bins: indices (or boolean mask of length len(f)+zerofillnum) of the zero-filled FFT bins to be evaluated, None means all bins.
+	Returns:
+	--------
+	wave0filldft: DFT of superposed zero-filled FIDs at the requested bins; shape (K,len(bins)) for K parameter sets.
+	Note:
+	-----
+	FID0dfts(f,*p,zerofillnum=n,bins=b)==FID0ffts(f,*p,zerofillnum=n)[b] to rounding error.
+	'''
+	wave0filldft,_=_dftPeaks(f,p,zerofillnum,bins,False)
+	return wave0filldft
+#=======================================================================
+def FID0dftsJac(f,*p,zerofillnum=0,bins=None):
+	'''
+	Analytic derivatives of FID0dfts with respect to its parameters.
+	Syntax:
+	-------
+	J=FID0dftsJac(f,*p[,zerofillnum=0,bins=None])
+	Parameters:
+	-----------
+	f: Frequency array, before zerofilling.
+	p: [s01,T1,f01,phase1,s02,T2,f02,phase2,...], 4xN long array, decribing each FID.
+	zerofillnum: number of extra zero points appended to FID.
+	bins: indices (or boolean mask of length len(f)+zerofillnum) of the zero-filled FFT bins to be evaluated, None means all bins.
+	Returns:
+	--------
+	J: complex 2d np.array, shape (number of bins, len(p)), J[:,j] is the derivative of FID0dfts with respect to p[j]. The phase derivative is per degree.
+	'''
+	_,J=_dftPeaks(f,p,zerofillnum,bins,True)
+	return J
+#=======================================================================
 def CurieWeiss(T,M0,a,T0):
 	'''
 	Curie-Weiss law to calculate the magnetization.
@@ -1,15 +1,20 @@
 '''
 Miscellaneous use functions.
 '''
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import scipy.optimize
+import scipy.ndimage
+import scipy.sparse
+import time
 from scipy import fftpack
+from functools import lru_cache,partial
+from math import factorial
 
 import FuncLib
-import Plotting
 import Utility as utl
+plt=utl.lazyModule('matplotlib.pyplot') # imported on first use
+Plotting=utl.lazyModule('Plotting')
 import readLog
 #=======================================================================
 def paramsize(function):
@@ -95,6 +100,317 @@ def assembleShare(func1,func2,sharenum):
 	
 	return newFunc
 #=======================================================================
+class fusedModel(object):
+	'''
+	Fused, vectorized evaluation of assemble(funcs,folds) or assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum).
+	The FuncLib Lorentzian and background terms are evaluated inline instead of through their functions. Intermediates shared between terms, such as the denominator (d*f)**2+(f0**2-f**2)**2 of every Lorentzian with the same (d,f0), are calculated once per call into reusable work buffers. Powers of f are kept between calls as long as the same f array is passed in, which is what scipy.optimize.curve_fit does. Other functions are called as they are.
+	Syntax:
+	-------
+	model=fusedModel(funcs1,folds1[,funcs2=(),folds2=(),sharenum=0])
+	output=model(f,*p)
+	Parameters:
+	-----------
+	funcs1&2: function lists of models, funcs2 is optional.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	model: callable, model(f,*p) gives the same output as the assembled function, i.e. output1 for one function list and np.concatenate((output1,output2)) for two.
+	self.nparam: int, number of parameters of the model.
+	Note:
+	-----
+	The f array is assumed not to be modified in place between calls.
+	'''
+	_kinds={FuncLib.lrtzX:('X',0),FuncLib.lrtzY:('Y',0),FuncLib.lrtzXph:('Xph',0),FuncLib.lrtzYph:('Yph',0),FuncLib.lrtzRR:('RR',0),FuncLib.lrtzvX:('X',1),FuncLib.lrtzvY:('Y',1),FuncLib.lrtzvXph:('Xph',1),FuncLib.lrtzvYph:('Yph',1),FuncLib.bgCon:('bg',0),FuncLib.bgLin:('bg',1),FuncLib.bgSq:('bg',2),FuncLib.bgCub:('bg',3),FuncLib.bgInv:('bg',-1),FuncLib.bgInv2:('bg',-2),FuncLib.bgInv3:('bg',-3)} # (kind,1 for velocity Lorentzian/power of f for background)
+	def __init__(self,funcs1,folds1,funcs2=(),folds2=(),sharenum=0):
+		self._terms=termIndex(funcs1,folds1,funcs2,folds2,sharenum)
+		self._nchannel=2 if len(funcs2) else 1
+		self.nparam=1+max([pidx.max() for _,_,_,pidx in self._terms]) if self._terms else 0
+		self._f=None
+#-----------------------------------------------------------------------
+	def __getstate__(self):
+		'''
+		Pickle without the f-dependent cache and work buffers.
+		'''
+		state=self.__dict__.copy()
+		state['_f']=None
+		state.pop('_fpow',None)
+		state.pop('_buf',None)
+		return state
+#-----------------------------------------------------------------------
+	def _prepare(self,f):
+		'''
+		Reset the f-dependent cache and the work buffers for a new f.
+		'''
+		self._f=f
+		self._fpow={1:f,2:f*f}
+		self._buf=[]
+#-----------------------------------------------------------------------
+	def _power(self,n):
+		'''
+		f**n, calculated once per f.
+		'''
+		if n not in self._fpow:
+			self._fpow[n]=self._f**n
+		return self._fpow[n]
+#-----------------------------------------------------------------------
+	def _lrtz(self,slot,d,f0,velocity):
+		'''
+		Fill work buffer slot with [d*f/D,(f0**2-f**2)/D,1/D], D=(d*f)**2+(f0**2-f**2)**2, multiplied by f if velocity.
+		'''
+		while len(self._buf)<=slot:
+			self._buf.append(np.empty((4,)+self._f.shape))
+		X,Y,invD,tmp=self._buf[slot]
+		np.multiply(self._f,d,out=X)
+		np.subtract(f0*f0,self._fpow[2],out=Y)
+		np.multiply(X,X,out=invD)
+		np.multiply(Y,Y,out=tmp)
+		invD+=tmp
+		np.divide(1.,invD,out=invD)
+		X*=invD
+		Y*=invD
+		if velocity:
+			X*=self._f
+			Y*=self._f
+		return X,Y,invD
+#-----------------------------------------------------------------------
+	def __call__(self,f,*p):
+		if len(p)!=self.nparam:
+			raise TypeError('fusedModel takes %d parameters, %d given'%(self.nparam,len(p)))
+		f=np.asarray(f,dtype=float) # no copy, so that the same f is recognized
+		scalar=(f.ndim==0)
+		f=np.atleast_1d(f)
+		if f is not self._f:
+			self._prepare(f)
+		p=np.array(p,float)
+		m=f.size
+		output=np.zeros(self._nchannel*m)
+		shared=dict() # (d,f0,velocity) => buffer slot, within this call
+		for ch,func,fold,pidx in self._terms:
+			out=output[ch*m:(ch+1)*m]
+			kind=self._kinds.get(func)
+			if kind is None: # not a fusable function
+				out+=fold*func(f,*p[pidx])
+				continue
+			name,n=kind
+			if name=='bg':
+				out+=fold*p[pidx[0]]*(self._power(n) if n else 1.)
+				continue
+			A,d,f0=p[pidx[:3]]
+			key=(d,f0,n)
+			if key not in shared:
+				shared[key]=len(shared)
+			X,Y,invD=self._lrtz(shared[key],d,f0,n)
+			a=fold*A/(2*np.pi if n else 4*np.pi**2)
+			if name=='X':
+				out+=a*X
+			elif name=='Y':
+				out+=a*Y
+			elif name=='RR':
+				out+=fold*(A/4/np.pi**2)**2*invD
+			else:
+				phase=np.radians(p[pidx[3]])
+				c=np.cos(phase)
+				s=np.sin(phase)
+				if name=='Xph':
+					out+=a*c*X-a*s*Y
+				else:
+					out+=a*s*X+a*c*Y
+		if scalar and self._nchannel==1:
+			return output[0]
+		return output
+#-----------------------------------------------------------------------
+	def batch(self,f,P):
+		'''
+		Evaluate the model for several parameter sets in one call, e.g. to screen the starting points of multiStartFit.
+		Syntax:
+		-------
+		output=model.batch(f,P)
+		Parameters:
+		-----------
+		f: np.array, frequency.
+		P: 2d array, one parameter set per row.
+		Returns:
+		--------
+		output: 2d array, row k is model(f,*P[k]).
+		'''
+		f=np.atleast_1d(np.asarray(f,dtype=float))
+		P=np.atleast_2d(np.asarray(P,dtype=float))
+		if P.shape[1]!=self.nparam:
+			raise TypeError('%s takes %d parameters, %d given'%(type(self).__name__,self.nparam,P.shape[1]))
+		m=f.size
+		f2=f*f
+		output=np.zeros((P.shape[0],self._nchannel*m))
+		shared=dict() # (d index,f0 index,velocity) => (X,Y,invD), within this call
+		for ch,func,fold,pidx in self._terms:
+			out=output[:,ch*m:(ch+1)*m]
+			kind=self._kinds.get(func)
+			if kind is None: # not a fusable function
+				out+=fold*np.array([func(f,*p[pidx]) for p in P])
+				continue
+			name,n=kind
+			if name=='bg':
+				out+=fold*P[:,pidx[0],np.newaxis]*(f**n if n else 1.)
+				continue
+			A=P[:,pidx[0],np.newaxis]
+			key=(pidx[1],pidx[2],n)
+			if key not in shared:
+				d,f0=P[:,pidx[1],np.newaxis],P[:,pidx[2],np.newaxis]
+				X=d*f
+				Y=f0*f0-f2
+				invD=1/(X*X+Y*Y)
+				X*=invD
+				Y*=invD
+				if n:
+					X*=f
+					Y*=f
+				shared[key]=X,Y,invD
+			X,Y,invD=shared[key]
+			a=fold*A/(2*np.pi if n else 4*np.pi**2)
+			if name=='X':
+				out+=a*X
+			elif name=='Y':
+				out+=a*Y
+			elif name=='RR':
+				out+=fold*(A/4/np.pi**2)**2*invD
+			else:
+				phase=np.radians(P[:,pidx[3],np.newaxis])
+				c=np.cos(phase)
+				s=np.sin(phase)
+				if name=='Xph':
+					out+=a*c*X-a*s*Y
+				else:
+					out+=a*s*X+a*c*Y
+		return output
+#=======================================================================
+def fuse(funcs,folds):
+	'''
+	Fused version of assemble(funcs,folds), check fusedModel.
+	Syntax:
+	-------
+	newfunc=fuse(funcs,folds)
+	Parameters:
+	-----------
+	funcs: functions list, these functions will be added up.
+	folds: folds list, must have len(folds)==len(funcs).
+	Returns:
+	--------
+	newfunc: fusedModel, newfunc(f,*p)==assemble(funcs,folds)(f,*p).
+	'''
+	return fusedModel(funcs,folds)
+#=======================================================================
+def fuseShare(funcs1,folds1,funcs2,folds2,sharenum):
+	'''
+	Fused version of assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum), check fusedModel. Lorentzians sharing (d,f0) between the two channels share one denominator.
+	Syntax:
+	-------
+	newfunc=fuseShare(funcs1,folds1,funcs2,folds2,sharenum)
+	Parameters:
+	-----------
+	funcs1&2: function lists of models for simultaneous fitting.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	newfunc: fusedModel, newfunc(f,*p)==assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum)(f,*p).
+	'''
+	return fusedModel(funcs1,folds1,funcs2,folds2,sharenum)
+#=======================================================================
+class complexModel(fusedModel):
+	'''
+	Complex-response version of assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum) for x-&y-channels.
+	Every x-channel FuncLib Lorentzian that has a y-channel partner with the same parameters (lrtzX&lrtzY, lrtzXph&lrtzYph and their velocity versions) is evaluated once as the complex response A*exp(i*phase)/(4*pi**2)/(d*f-i*(f0**2-f**2)), whose real and imaginary parts are the x- and y-channel terms. The remaining terms, e.g. backgrounds, form the real and imaginary parts of a complex background.
+	Syntax:
+	-------
+	model=complexModel(funcs1,folds1,funcs2,folds2,sharenum)
+	z=model.complex(f,*p)
+	output=model(f,*p)
+	Parameters:
+	-----------
+	funcs1&2: function lists of models for simultaneous fitting, funcs1 is the x-channel.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	z: complex np.array, x-channel+1j*y-channel.
+	output: np.concatenate((z.real,z.imag)), the same as the assembled function, so that p and popt keep their layout.
+	Note:
+	-----
+	Folds of a Lorentzian pair are applied to the real and imaginary parts separately.
+	'''
+	_pairs={('X','Y'),('Xph','Yph')}
+	def __init__(self,funcs1,folds1,funcs2,folds2,sharenum):
+		fusedModel.__init__(self,funcs1,folds1,funcs2,folds2,sharenum)
+		self._resonances=[] # (fold1,fold2,velocity,pidx)
+		rest=list(range(len(self._terms))) # terms not paired yet
+		for i,(ch1,func1,fold1,pidx1) in enumerate(self._terms):
+			k1=self._kinds.get(func1)
+			if ch1!=0 or k1 is None:
+				continue
+			for j in rest:
+				ch2,func2,fold2,pidx2=self._terms[j]
+				k2=self._kinds.get(func2)
+				if ch2==1 and k2 is not None and (k1[0],k2[0]) in self._pairs and k1[1]==k2[1] and np.array_equal(pidx1,pidx2):
+					self._resonances.append((fold1,fold2,k1[1],pidx1))
+					rest.remove(i)
+					rest.remove(j)
+					break
+		self._rest=[self._terms[i] for i in rest]
+#-----------------------------------------------------------------------
+	def complex(self,f,*p):
+		if len(p)!=self.nparam:
+			raise TypeError('complexModel takes %d parameters, %d given'%(self.nparam,len(p)))
+		f=np.atleast_1d(np.asarray(f,dtype=float))
+		if f is not self._f:
+			self._prepare(f)
+		p=np.array(p,float)
+		z=np.zeros(f.size,dtype=complex)
+		for fold1,fold2,n,pidx in self._resonances:
+			A,d,f0=p[pidx[:3]]
+			a=A/(2*np.pi if n else 4*np.pi**2)
+			if pidx.size>3: # with phase
+				a=a*np.exp(1j*np.radians(p[pidx[3]]))
+			w=a/(d*f-1j*(f0*f0-self._fpow[2]))
+			if n:
+				w*=f
+			if fold1==fold2:
+				z+=fold1*w
+			else:
+				z.real+=fold1*w.real
+				z.imag+=fold2*w.imag
+		for ch,func,fold,pidx in self._rest:
+			kind=self._kinds.get(func)
+			if kind is not None and kind[0]=='bg':
+				term=fold*p[pidx[0]]*(self._power(kind[1]) if kind[1] else 1.)
+			else:
+				term=fold*func(f,*p[pidx])
+			if ch:
+				z.imag+=term
+			else:
+				z.real+=term
+		return z
+#-----------------------------------------------------------------------
+	def __call__(self,f,*p):
+		z=self.complex(f,*p)
+		return np.concatenate((z.real,z.imag))
+#=======================================================================
+def complexShare(funcs1,folds1,funcs2,folds2,sharenum):
+	'''
+	Complex-response version of assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum), check complexModel.
+	Syntax:
+	-------
+	newfunc=complexShare(funcs1,folds1,funcs2,folds2,sharenum)
+	Parameters:
+	-----------
+	funcs1&2: function lists of models for simultaneous fitting, funcs1 is the x-channel.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	newfunc: complexModel, newfunc(f,*p)==assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum)(f,*p).
+	'''
+	return complexModel(funcs1,folds1,funcs2,folds2,sharenum)
+#=======================================================================
 def paramUnfold(popt,funcs1,folds1,funcs2,folds2,sharenum):
 	'''
 	Translate popt based on funcs1,folds1,funcs2,folds2 to remove effect of folds1&2 in popt.
@@ -132,6 +448,166 @@ def paramUnfold(popt,funcs1,folds1,funcs2,folds2,sharenum):
 	popt=np.concatenate((popt1,popt2[sharenum:]))
 	return popt,popt1,popt2
 #=======================================================================
+def termIndex(funcs1,folds1,funcs2=(),folds2=(),sharenum=0):
+	'''
+	Split the model built by assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum) into its terms, and locate each term's parameters in the full parameter list. With funcs2 empty, the model is assemble(funcs1,folds1).
+	Syntax:
+	-------
+	terms=termIndex(funcs1,folds1[,funcs2=(),folds2=(),sharenum=0])
+	Parameters:
+	-----------
+	funcs1&2: function lists of models for simultaneous fitting.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	terms: list of (channel,func,fold,pidx), channel=0/1 for funcs1/2, pidx is np.array of indices of the term's parameters in the full parameter list.
+	'''
+	terms=[]
+	i=0
+	for func,fold in zip(funcs1,folds1):
+		ps=paramsize(func)
+		terms.append((0,func,fold,np.arange(i,i+ps)))
+		i+=ps
+	pnum1=i
+	i=0
+	for func,fold in zip(funcs2,folds2):
+		ps=paramsize(func)
+		j=np.arange(i,i+ps)
+		terms.append((1,func,fold,np.where(j<sharenum,j,j-sharenum+pnum1))) # shared parameters are in front
+		i+=ps
+	return terms
+#=======================================================================
+def linearTerms(funcs1,folds1,funcs2,folds2,sharenum):
+	'''
+	Split the model built by assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum) into its terms, and find the parameters that enter the model linearly.
+	A parameter is linear if it is the amplitude of a FuncLib Lorentzian (except lrtzRR) or the coefficient of a FuncLib background term, in every term that uses it.
+	Syntax:
+	-------
+	terms,linidx=linearTerms(funcs1,folds1,funcs2,folds2,sharenum)
+	Parameters:
+	-----------
+	funcs1&2: function lists of models for simultaneous fitting.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	Returns:
+	--------
+	terms: list of (channel,func,fold,pidx), channel=0/1 for funcs1/2, pidx is np.array of indices of the term's parameters in the full parameter list.
+	linidx: np.array, indices of the linear parameters in the full parameter list.
+	'''
+	linfuncs=[FuncLib.lrtzX,FuncLib.lrtzY,FuncLib.lrtzXph,FuncLib.lrtzYph,FuncLib.lrtzvX,FuncLib.lrtzvY,FuncLib.lrtzvXph,FuncLib.lrtzvYph,FuncLib.bgCon,FuncLib.bgLin,FuncLib.bgSq,FuncLib.bgCub,FuncLib.bgInv,FuncLib.bgInv2,FuncLib.bgInv3] # functions whose 1st parameter is a linear prefactor
+	terms=termIndex(funcs1,folds1,funcs2,folds2,sharenum)
+
+	linear=set()
+	nonlinear=set()
+	for _,func,_,pidx in terms:
+		if func in linfuncs:
+			linear.add(pidx[0])
+			nonlinear.update(pidx[1:])
+		else:
+			nonlinear.update(pidx)
+	linidx=np.array(sorted(linear-nonlinear),dtype=int)
+	return terms,linidx
+#=======================================================================
+def varpro_1simfit(x,y,funcs1,folds1,funcs2,folds2,sharenum,p0,bounds=(-np.inf,np.inf),full_output=False):
+	'''
+	Variable projection fit of the model used by lrtz_1simfit. The linear parameters (Lorentzian amplitudes and background coefficients, see linearTerms) are solved exactly by linear least squares for every trial of the nonlinear parameters, so that the nonlinear solver only searches d, f0, phase, etc.
+	Syntax:
+	-------
+	popt,pcov[,info]=varpro_1simfit(x,y,funcs1,folds1,funcs2,folds2,sharenum,p0[,bounds=(-np.inf,np.inf),full_output=False])
+	Parameters:
+	-----------
+	x: np.array, frequency.
+	y: np.array, concatenated x-&y-channel signal, len(y)==2*len(x).
+	funcs1&2: function lists of models for simultaneous fitting.
+	folds1&2: function fold lists, corresponding to terms in funcs1&2.
+	sharenum: number of parameters shared by funcs1&2.
+	p0: initial parameters guess, the linear parameters in p0 are not used.
+	bounds: parameters bounds, check scipy.optimize.curve_fit input. Only the bounds of the nonlinear parameters are honored.
+	full_output: boolean, if True, also return info.
+	Returns:
+	--------
+	popt: fitted parameters, in the same layout as the popt from scipy.optimize.curve_fit(assembleShare(..),x,y,p0).
+	pcov: 2d array, the estimated covariance of popt, calculated the same way as scipy.optimize.curve_fit does.
+	info: dict, 'nfev' is the number of residual evaluations used by the nonlinear solver, 'status' and 'message' are its exit status and message (check scipy.optimize.least_squares), 'success' whether it converged, 'cost' the sum of squared residuals; only returned if full_output=True.
+	'''
+	x=np.asarray(x,float)
+	y=np.asarray(y,float)
+	p0=np.array(p0,float)
+	n=p0.size
+	m=x.size
+	terms,linidx=linearTerms(funcs1,folds1,funcs2,folds2,sharenum)
+	nlidx=np.setdiff1d(np.arange(n),linidx)
+	linpos={j:k for k,j in enumerate(linidx)} # column of each linear parameter
+	lb,ub=utl.prepare_bounds(bounds,n)
+	lb,ub=lb[nlidx],ub[nlidx]
+
+	# columns from terms without nonlinear parameters do not change during the fit
+	const=np.zeros((2*m,linidx.size))
+	for ch,func,fold,pidx in terms:
+		if pidx.size==1 and pidx[0] in linpos:
+			const[ch*m:(ch+1)*m,linpos[pidx[0]]]+=fold*func(x,1.)
+
+	def basis(p): # model=Phi.dot(p[linidx])+b0
+		Phi=const.copy()
+		b0=np.zeros(2*m)
+		for ch,func,fold,pidx in terms:
+			if pidx[0] in linpos:
+				if pidx.size>1:
+					Phi[ch*m:(ch+1)*m,linpos[pidx[0]]]+=fold*func(x,1.,*p[pidx[1:]])
+			else:
+				b0[ch*m:(ch+1)*m]+=fold*func(x,*p[pidx])
+		return Phi,b0
+
+	def project(theta): # solve linear parameters for given nonlinear ones
+		p=p0.copy()
+		p[nlidx]=theta
+		Phi,b0=basis(p)
+		p[linidx]=np.linalg.lstsq(Phi,y-b0,rcond=None)[0]
+		return p,Phi,b0
+
+	yscale=np.abs(y).max()
+	if yscale==0:
+		yscale=1.
+	def residual(theta): # in units of max|y|, the gradient tolerance of least_squares is absolute and would stop at once on small signals
+		p,Phi,b0=project(theta)
+		return (Phi.dot(p[linidx])+b0-y)/yscale
+
+	bounded=np.any(np.isfinite(lb))|np.any(np.isfinite(ub))
+	theta0=np.clip(p0[nlidx],lb,ub)
+	result=scipy.optimize.least_squares(residual,theta0,bounds=(lb,ub),method='trf' if bounded else 'lm')
+	popt,Phi,b0=project(result.x)
+	res=Phi.dot(popt[linidx])+b0-y
+
+	# full Jacobian: exact columns for linear parameters, central differences for the others
+	J=np.zeros((2*m,n))
+	J[:,linidx]=Phi
+	for j in nlidx:
+		h=np.cbrt(np.finfo(float).eps)*max(1.,abs(popt[j])) # optimal step of central differences
+		pp=popt.copy()
+		pm=popt.copy()
+		pp[j]+=h
+		pm[j]-=h
+		Phip,b0p=basis(pp)
+		Phim,b0m=basis(pm)
+		J[:,j]=(Phip.dot(popt[linidx])+b0p-Phim.dot(popt[linidx])-b0m)/2/h
+
+	# covariance, the same recipe as scipy.optimize.curve_fit, with the columns of J scaled to unit norm first so that small but well determined columns (e.g. phase) are not cut by the singular value threshold
+	scale=np.linalg.norm(J,axis=0)
+	scale[scale==0]=1.
+	_,s,VT=np.linalg.svd(J/scale,full_matrices=False)
+	threshold=np.finfo(float).eps*max(J.shape)*s[0]
+	s=s[s>threshold]
+	VT=VT[:s.size]
+	pcov=np.dot(VT.T/s**2,VT)/np.outer(scale,scale)
+	if y.size>n:
+		pcov=pcov*np.sum(res**2)/(y.size-n)
+	else:
+		pcov.fill(np.inf)
+	if full_output:
+		return popt,pcov,{'nfev':result.nfev,'status':result.status,'message':result.message,'success':result.status>0,'cost':float(res.dot(res))}
+	return popt,pcov
+#=======================================================================
 def paramGuess(data,fitmode='noCorrect'):
 	'''
 	2017-06-22 17:52
@@ -280,12 +756,356 @@ def lrtz1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-np
 
 	return popt,pcov,perr,res,popt1,popt2
 #=======================================================================
-def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10):
+class nmrModel(object):
+	'''
+	Model of the FFT of a zero-filled FID with several peaks within the chosen bins, real and imaginary parts concatenated; the fitting function of nmr_1simfit. Defined at module level so that it can be sent to other processes.
+	Syntax:
+	-------
+	model=nmrModel(zerofillnum,bins[,engine='dft'])
+	output=model(f,*p)
+	J=model.jac(f,*p)
+	Parameters:
+	-----------
+	zerofillnum: int, number of zero-filled points.
+	bins: int np.array, indices of the FFT bins to evaluate.
+	engine: str; 'dft' uses FuncLib.FID0dfts at the bins only, 'fft' uses FuncLib.FID0ffts and picks the bins.
+	Returns:
+	--------
+	output: np.array, [real,imag] of the spectrum at bins.
+	J: np.array, analytic Jacobian of output, only for engine='dft'; self.jac is None for 'fft'.
+	'''
+	def __init__(self,zerofillnum,bins,engine='dft'):
+		if engine not in ('dft','fft'):
+			raise ValueError("engine must be 'dft' or 'fft'")
+		self.zerofillnum=zerofillnum
+		self.bins=bins
+		self.engine=engine
+		if engine=='fft':
+			self.jac=None # finite difference
+#-----------------------------------------------------------------------
+	def __call__(self,f,*p):
+		if self.engine=='dft':
+			wave=FuncLib.FID0dfts(f,*p,zerofillnum=self.zerofillnum,bins=self.bins)
+		else:
+			wave=FuncLib.FID0ffts(f,*p,zerofillnum=self.zerofillnum)[self.bins]
+		return np.append(wave.real,wave.imag)
+#-----------------------------------------------------------------------
+	def batch(self,f,P):
+		'''
+		Evaluate the model for several parameter sets in one call, row k of the output is model(f,*P[k]); check fusedModel.batch.
+		'''
+		P=np.atleast_2d(np.asarray(P,dtype=float))
+		if self.engine=='dft':
+			wave=FuncLib.FID0dfts(f,*P.T,zerofillnum=self.zerofillnum,bins=self.bins)
+			return np.concatenate((wave.real,wave.imag),axis=-1)
+		return np.array([self(f,*p) for p in P])
+#-----------------------------------------------------------------------
+	def jac(self,f,*p):
+		J=FuncLib.FID0dftsJac(f,*p,zerofillnum=self.zerofillnum,bins=self.bins)
+		return np.vstack((J.real,J.imag))
+#=======================================================================
+def startBox(p0,bounds=(-np.inf,np.inf),spread=0.5):
+	'''
+	Box from which the starting points of multiStartFit are drawn.
+	Syntax:
+	-------
+	lb,ub=startBox(p0[,bounds=(-np.inf,np.inf),spread=0.5])
+	Parameters:
+	-----------
+	p0: initial parameters guess.
+	bounds: parameters bounds, check scipy.optimize.curve_fit input.
+	spread: float, for parameters with an infinite bound, the box extends to p0-+spread*|p0| on that side (spread if p0==0).
+	Returns:
+	--------
+	lb,ub: np.array, lower and upper edges of the box.
+	'''
+	p0=np.asarray(p0,dtype=float)
+	lb,ub=utl.prepare_bounds(bounds,p0.size)
+	width=spread*np.where(p0!=0,np.abs(p0),1.)
+	lb=np.where(np.isfinite(lb),lb,np.minimum(p0,ub)-width)
+	ub=np.where(np.isfinite(ub),ub,np.maximum(p0,lb)+width)
+	return lb,ub
+#=======================================================================
+def polishStart(model,x,y,p0,bounds,jac=None,solver='auto',fit=None):
+	'''
+	Local fit from one starting point for multiStartFit, never raises on fit failure.
+	Syntax:
+	-------
+	result=polishStart(model,x,y,p0,bounds[,jac=None,solver='auto',fit=None])
+	Parameters:
+	-----------
+	model,x,y,p0,bounds,jac,solver: curveFit inputs.
+	fit: None or callable, fit(x,y,p0=p0,bounds=bounds) returning popt,pcov,info as curveFit does, used instead of curveFit, e.g. a partial of varpro_1simfit with full_output=True.
+	Returns:
+	--------
+	result: dict, 'p0','popt','pcov','cost' (sum of squared residuals),'nfev','status' (exit status of the fit, 0 if it raised),'success','message'.
+	'''
+	try:
+		if fit is None:
+			popt,pcov,info=curveFit(model,x,y,p0,bounds=bounds,jac=jac,solver=solver)
+		else:
+			popt,pcov,info=fit(x,y,p0=p0,bounds=bounds)
+		return {'p0':p0,'popt':popt,'pcov':pcov,'cost':info['cost'],'nfev':info['nfev'],'status':info['status'],'success':info['success'],'message':info['message']}
+	except (RuntimeError,ValueError) as err:
+		return {'p0':p0,'popt':None,'pcov':None,'cost':np.inf,'nfev':0,'status':0,'success':False,'message':str(err)}
+#=======================================================================
+def multiStartFit(model,x,y,p0,bounds=(-np.inf,np.inf),nstart=64,npolish=4,sampler='lhs',spread=0.5,workers=None,jac=None,solver='auto',fit=None,seed=None):
+	'''
+	Multi-start global search: draw nstart starting points inside bounds, rank them by the cost of the model at each point, and fit from the best npolish of them.
+	Syntax:
+	-------
+	popt,pcov,report=multiStartFit(model,x,y,p0[,bounds=(-np.inf,np.inf),nstart=64,npolish=4,sampler='lhs',spread=0.5,workers=None,jac=None,solver='auto',fit=None,seed=None])
+	Parameters:
+	-----------
+	model,x,y: scipy.optimize.curve_fit inputs.
+	p0: initial parameters guess, always included as one of the starting points.
+	bounds: parameters bounds, check scipy.optimize.curve_fit input; infinite bounds are replaced by startBox for drawing.
+	nstart: int, number of starting points drawn.
+	npolish: int, number of best starting points fitted.
+	sampler: str, 'lhs' for Latin hypercube or 'sobol' for a scrambled Sobol sequence, from scipy.stats.qmc.
+	spread: float, check startBox.
+	workers: int, if larger than 1, the fits run in parallel on a process pool of this size; model, jac and fit must then be picklable, e.g. fusedModel, complexModel, nmrModel.
+	jac: Jacobian function for scipy.optimize.curve_fit.
+	solver: str, curveFit backend of the local fits, 'auto','lm' (unbounded only),'trf' or 'dogbox'.
+	fit: None or callable, local fit used instead of curveFit, check polishStart; the starting points are still screened by the cost of model.
+	seed: random seed of the sampler.
+	Returns:
+	--------
+	popt,pcov: result of the fit with the lowest cost; among fits within 1e-6 relative of the lowest cost, the one closest to p0.
+	report: dict, 'starts' the drawn points (p0 first), 'cost0' their costs, 'polished' list of polishStart results sorted by cost, 'best' the best of them, 'nconverged' number of polished fits that reached the best cost within 1e-6 relative, 'nfev' total model evaluations including the screening.
+	Note:
+	-----
+	The starting points are screened in one vectorized call of model.batch(x,P) if the model has it (fusedModel, complexModel, nmrModel), otherwise one call per point.
+	Raises RuntimeError if none of the fits succeeds.
+	'''
+	from scipy.stats import qmc
+	p0=np.asarray(p0,dtype=float)
+	if solver not in ('auto','lm','trf','dogbox'):
+		raise ValueError("solver must be 'auto', 'lm', 'trf' or 'dogbox'")
+	if solver=='lm' and fit is None and np.any(np.isfinite(utl.prepare_bounds(bounds,p0.size))):
+		raise ValueError("solver 'lm' only works for unbounded problems")
+	lb,ub=startBox(p0,bounds,spread)
+	if sampler=='lhs':
+		u=qmc.LatinHypercube(d=p0.size,seed=seed).random(nstart)
+	elif sampler=='sobol':
+		u=qmc.Sobol(d=p0.size,seed=seed).random_base2(int(np.ceil(np.log2(max(nstart,1)))))[:nstart]
+	else:
+		raise ValueError("sampler must be 'lhs' or 'sobol'")
+	starts=np.vstack((p0,qmc.scale(u,lb,ub)))
+
+	# screen by the cost at the starting points
+	batch=getattr(model,'batch',None)
+	if batch is not None: # vectorized over the starts, in chunks of about 2**16 output values to stay in cache
+		y=np.asarray(y,dtype=float)
+		chunk=max(1,(1<<16)//max(y.size,1))
+		cost0=np.empty(len(starts))
+		for i in range(0,len(starts),chunk):
+			res=batch(x,starts[i:i+chunk])-y
+			cost0[i:i+chunk]=np.einsum('ij,ij->i',res,res)
+	else:
+		cost0=np.empty(len(starts))
+		for i,p in enumerate(starts):
+			res=model(x,*p)-y
+			cost0[i]=res.dot(res)
+	cost0[~np.isfinite(cost0)]=np.inf
+	best=starts[np.argsort(cost0,kind='stable')[:npolish]]
+
+	if workers is not None and workers>1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			polished=list(pool.map(polishStart,*zip(*[(model,x,y,p,bounds,jac,solver,fit) for p in best])))
+	else:
+		polished=[polishStart(model,x,y,p,bounds,jac,solver,fit) for p in best]
+	polished.sort(key=lambda r:r['cost'])
+	if not polished[0]['success']:
+		raise RuntimeError('multiStartFit: no fit succeeded, last message: %s'%polished[0]['message'])
+	cbest=polished[0]['cost']
+	converged=[r for r in polished if r['cost']<=cbest*(1+1e-6)]
+	best=min(converged,key=lambda r:np.sum(((r['popt']-p0)/(ub-lb))**2)) # equivalent minima, e.g. peaks in swapped order, are resolved by the distance to p0
+	report={'starts':starts,'cost0':cost0,'polished':polished,'best':best,
+		'nconverged':len(converged),
+		'nfev':len(starts)+sum(r['nfev'] for r in polished)}
+	return best['popt'],best['pcov'],report
+#=======================================================================
+solvers=('auto','lm','trf','dogbox','varpro') # backends of lrtz_1simfit; nmr_1simfit takes all but 'varpro'
+solverRegistry={'lrtz_1simfit':'auto','nmr_1simfit':'auto'} # default backend per fit, or per (fit,model) after benchmarking
+#=======================================================================
+def modelKey(funcs1,funcs2=()):
+	'''
+	Hashable name of a model built from function lists, used as a key of solverRegistry.
+	Syntax:
+	-------
+	key=modelKey(funcs1[,funcs2=()])
+	Parameters:
+	-----------
+	funcs1&2: function lists of the model.
+	Returns:
+	--------
+	key: tuple, (names of funcs1,names of funcs2).
+	'''
+	return (tuple(f.__name__ for f in funcs1),tuple(f.__name__ for f in funcs2))
+#=======================================================================
+def defaultSolver(fit,model=None):
+	'''
+	Default solver backend of a fit.
+	Syntax:
+	-------
+	solver=defaultSolver(fit[,model=None])
+	Parameters:
+	-----------
+	fit: str, 'lrtz_1simfit' or 'nmr_1simfit'.
+	model: modelKey of the fitted model, or None.
+	Returns:
+	--------
+	solver: str, solverRegistry[(fit,model)] if registered, otherwise solverRegistry[fit], otherwise 'auto'.
+	'''
+	if model is not None and (fit,model) in solverRegistry:
+		return solverRegistry[(fit,model)]
+	return solverRegistry.get(fit,'auto')
+#=======================================================================
+def setDefaultSolver(fit,solver,model=None):
+	'''
+	Register the default solver backend of a fit, for all models or for one model.
+	Syntax:
+	-------
+	setDefaultSolver(fit,solver[,model=None])
+	Parameters:
+	-----------
+	fit: str, 'lrtz_1simfit' or 'nmr_1simfit'.
+	solver: str, one of solvers.
+	model: modelKey of the model the default applies to; None sets the default of all models of fit.
+	'''
+	if solver not in solvers:
+		raise ValueError('solver must be one of %s'%(solvers,))
+	solverRegistry[fit if model is None else (fit,model)]=solver
+	return
+#=======================================================================
+def curveFit(model,x,y,p0,bounds=(-np.inf,np.inf),jac=None,solver='auto'):
+	'''
+	scipy.optimize.curve_fit with a selectable backend and a uniform report.
+	Syntax:
+	-------
+	popt,pcov,info=curveFit(model,x,y,p0[,bounds=(-np.inf,np.inf),jac=None,solver='auto'])
+	Parameters:
+	-----------
+	model,x,y,p0,bounds,jac: scipy.optimize.curve_fit inputs.
+	solver: str, 'auto' lets curve_fit choose ('lm' if unbounded, 'trf' otherwise), 'lm' (MINPACK Levenberg-Marquardt, unbounded only), 'trf' or 'dogbox'.
+	Returns:
+	--------
+	popt,pcov: scipy.optimize.curve_fit outputs.
+	info: dict, 'nfev','status' (ier of curve_fit),'message','success','cost' (sum of squared residuals).
+	'''
+	if solver not in ('auto','lm','trf','dogbox'):
+		raise ValueError("solver must be 'auto', 'lm', 'trf' or 'dogbox'")
+	popt,pcov,infodict,mesg,ier=scipy.optimize.curve_fit(model,x,y,p0=p0,bounds=bounds,jac=jac,method=None if solver=='auto' else solver,full_output=True)
+	fvec=infodict['fvec']
+	return popt,pcov,{'nfev':infodict['nfev'],'status':ier,'message':mesg,'success':ier in (1,2,3,4),'cost':float(fvec.dot(fvec))}
+#=======================================================================
+class countedModel(object):
+	'''
+	Fitting function wrapper that counts and times the evaluations of a model and of its Jacobian; used for fit telemetry.
+	Syntax:
+	-------
+	new=countedModel(model)
+	output=new(f,*p)
+	J=new.jac(f,*p)
+	Parameters:
+	-----------
+	model: fitting function, e.g. fusedModel, complexModel, nmrModel; model.jac and model.batch are wrapped as well if they exist and are not None, each row of a batch counts as one evaluation.
+	Returns:
+	--------
+	new: countedModel, new(f,*p)==model(f,*p). Attributes ncall and njev count the model and Jacobian evaluations, time_s is the time spent in them in seconds.
+	Note:
+	-----
+	Evaluations done in other processes, e.g. multiStartFit with workers>1, are not counted.
+	'''
+	def __init__(self,model):
+		self.model=model
+		if getattr(model,'jac',None) is None:
+			self.jac=None # finite difference
+		if getattr(model,'batch',None) is None:
+			self.batch=None
+		self.reset()
+#-----------------------------------------------------------------------
+	def reset(self):
+		'''
+		Zero the counters.
+		'''
+		self.ncall=0
+		self.njev=0
+		self.time_s=0.
+#-----------------------------------------------------------------------
+	def __call__(self,f,*p):
+		t0=time.perf_counter()
+		output=self.model(f,*p)
+		self.time_s+=time.perf_counter()-t0
+		self.ncall+=1
+		return output
+#-----------------------------------------------------------------------
+	def jac(self,f,*p):
+		t0=time.perf_counter()
+		J=self.model.jac(f,*p)
+		self.time_s+=time.perf_counter()-t0
+		self.njev+=1
+		return J
+#-----------------------------------------------------------------------
+	def batch(self,f,P):
+		t0=time.perf_counter()
+		output=self.model.batch(f,P)
+		self.time_s+=time.perf_counter()-t0
+		self.ncall+=len(output)
+		return output
+#=======================================================================
+def multiresLevels(multires,npoints,nparams):
+	'''
+	Decimation factors of a coarse-to-fine fit, from coarse to fine, always ending with the full resolution.
+	Syntax:
+	-------
+	levels=multiresLevels(multires,npoints,nparams)
+	Parameters:
+	-----------
+	multires: None or list of int, decimation factors of the coarse fits, e.g. (16,4).
+	npoints: int, number of points of the full resolution data.
+	nparams: int, number of fitting parameters.
+	Returns:
+	--------
+	levels: list of int, unique factors in descending order ending with 1. Factors that leave fewer than 2*nparams points are dropped.
+	'''
+	if multires is None:
+		return [1]
+	levels=sorted({int(q) for q in multires if int(q)>1 and npoints//int(q)>=2*nparams},reverse=True)
+	return levels+[1]
+#=======================================================================
+def fitWindow(f,d,f0,k,anchors=None):
+	'''
+	Select the frequencies within k linewidths of a resonance, plus optional anchor ranges.
+	Syntax:
+	-------
+	win=fitWindow(f,d,f0,k[,anchors=None])
+	Parameters:
+	-----------
+	f: np.array, frequencies.
+	d: float, linewidth of the resonance.
+	f0: float, resonance frequency.
+	k: float, half width of the window in units of d.
+	anchors: (lb,ub) format ranges, lb and ub can be a list or a single item; frequencies within any of them are selected as well.
+	Returns:
+	--------
+	win: boolean np.array, True for frequencies within f0+-k*|d| or any anchor range.
+	'''
+	f=np.asarray(f)
+	win=np.abs(f-f0)<=k*np.abs(d)
+	if anchors is not None:
+		_,OrCond=utl.build_condition(anchors,f)
+		win|=np.asarray(OrCond,dtype=bool)
+	return win
+#=======================================================================
+def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,full_output=False,pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10):
 	'''
 	Simultaneously fit x-&y-channels, with x in front. Plot fitted curve if demanded. Function designed for sweep.py.
 	Syntax:
 	-------
-	popt,pcov,perr,res,popt1,popt2[,fig,axes,lines]=lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0[,frange=(-inf,inf),bounds=(-inf,inf),pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10])
+	popt,pcov,perr,res,popt1,popt2[,fig,axes,lines][,info]=lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0[,frange=(-inf,inf),bounds=(-inf,inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,full_output=False,pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10])
 	Parameters:
 	-----------
 	data: sweep class data object.
@@ -296,6 +1116,15 @@ def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-n
 	p0: initial parameters guess.
 	frange: frequency range (low,high) bounds. low/high can be a list or a single items.
 	bounds: parameters bounds, check scipy.optimize.curve_fit input.
+	varpro: boolean, if True, solve the linear parameters (amplitudes, background coefficients) exactly at each step with varpro_1simfit, and only search the nonlinear ones; bounds of the linear parameters are then ignored. The same as solver='varpro'.
+	solver: str, solver backend, one of solvers: 'auto','lm','trf','dogbox' select the scipy.optimize.curve_fit method (check curveFit), 'varpro' is variable projection; None uses defaultSolver('lrtz_1simfit',modelKey(funcs1,funcs2)).
+	window: float k, if given, only the points within frange and f0+-k*d are fitted, check fitWindow.
+	anchors: (lb,ub) ranges of frequency, points within them and frange are fitted in addition to the window, so that the background stays constrained. Only used with window.
+	wincenter: str, where d,f0 of the window come from; 'p0' uses p0[1:3], 'guess' uses paramGuess(data,fitmode).
+	multires: None or list of int, if given, e.g. (16,4), fit every 16th point first, then every 4th point starting from the previous result, and finally all points; popt and pcov are those of the last, full resolution fit.
+	complexmode: boolean, if True, the model is evaluated as one complex response with complexShare, paired x-&y-channel Lorentzians are calculated once; popt, popt1&2 are the same as otherwise. Not used with varpro.
+	multistart: None or dict of multiStartFit options, e.g. dict(nstart=64,npolish=4,workers=4); if given, the (first multires level) fit is a multi-start global search within bounds, whose local fits use solver (variable projection with varpro).
+	full_output: boolean, if True, also return info.
 	pltflag: if non-zero, will plot fitted curves for comparison.
 	figsize: figure size.
 	wspace,hspace: width/horizontal spacing between subplots.
@@ -308,13 +1137,23 @@ def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-n
 	popt: fitted parameters, folds1&2 influence removed.
 	pcov: 2d array, the estimated covariance of popt.
 	perr: standard deviation associated with popt.
-	res: residual = calculated values from popt - data values.
+	res: residual = calculated values from popt - data values, over all points within frange even if window is given.
 	popt1&2: popt separated into two parts corresponding to funcs1&2.
 	+++
 	if pltflag=True:
 	fig: figure handle.
 	axes: 2x2 axes handles array.
 	lines: lines output from Plotting.fitCheck_1sim().
+	+++
+	if full_output=True:
+	info: dict, fit telemetry and diagnostics:
+		'nfev' is the number of model evaluations used by the solver summed over all multires levels;
+		'ncall','njev' and 'model_time_s' are the model and Jacobian evaluations counted by countedModel and the seconds spent in them (0 with varpro, whose basis evaluations are only counted in 'nfev'), 'fit_time_s' is the wall time of the whole fit;
+		'status','message','success' and 'cost' are the solver exit status, its message, whether it converged and the sum of squared residuals over the fitted points, all from the last (full resolution) level;
+		'solver' is the backend used; 'npoints' and 'npoints_full' are the number of frequencies fitted and within frange, 'multistart' is the report of multiStartFit if multistart is given.
+	Note:
+	-----
+	If the window and anchors contain fewer than 2*len(p0) frequencies, all points within frange are fitted.
 	'''
 	if 'g' in fitmode: #determine if gain correct fit is required
 		y1=data.gx
@@ -329,11 +1168,58 @@ def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-n
 	y2=y2[OrCond].values
 
 	y=np.concatenate((y1,y2)) #concatenate two channels to create signal
-	model1=assemble(funcs1,folds1) #create x model
-	model2=assemble(funcs2,folds2) #create y model
-	fitmodel=assembleShare(model1,model2,sharenum)
+	if complexmode:
+		fitmodel=complexShare(funcs1,folds1,funcs2,folds2,sharenum) #x+iy model, real and imaginary parts concatenated
+	else:
+		fitmodel=fuseShare(funcs1,folds1,funcs2,folds2,sharenum) #create x&y model, same as assembleShare(assemble(funcs1,folds1),assemble(funcs2,folds2),sharenum)
 
-	popt,pcov=scipy.optimize.curve_fit(fitmodel,x,y,p0=p0,bounds=bounds) #do fit, len(f)=1/2*len(y)
+	xw,yw=x,y # fitted points
+	if window is not None:
+		if wincenter=='guess':
+			_,d,f0=paramGuess(data,fitmode)
+		else:
+			d,f0=p0[1],p0[2]
+		win=fitWindow(x,d,f0,window,anchors=anchors)
+		if win.sum()>=2*len(p0): # otherwise too few points to constrain the fit
+			xw=x[win]
+			yw=np.concatenate((y1[win],y2[win]))
+
+	if solver is None:
+		solver=defaultSolver('lrtz_1simfit',modelKey(funcs1,funcs2))
+	if varpro:
+		solver='varpro'
+	m=xw.size
+	nfev=0
+	msreport=None
+	counted=countedModel(fitmodel) # telemetry
+	t0=time.perf_counter()
+	for q in multiresLevels(multires,m,len(p0)): # coarse to fine, each level starts from the previous optimum
+		sel=np.arange(q//2,m,q)
+		xs=xw[sel]
+		ys=np.concatenate((yw[:m][sel],yw[m:][sel]))
+		if multistart is not None and msreport is None: # global search on the first level
+			if solver=='varpro': # local fits by variable projection
+				popt,pcov,msreport=multiStartFit(counted,xs,ys,p0,bounds=bounds,fit=partial(varpro_1simfit,funcs1=funcs1,folds1=folds1,funcs2=funcs2,folds2=folds2,sharenum=sharenum,full_output=True),**multistart)
+			else:
+				popt,pcov,msreport=multiStartFit(counted,xs,ys,p0,bounds=bounds,solver=solver,**multistart)
+			best=msreport['best']
+			info={'nfev':msreport['nfev'],'status':best['status'],'message':best['message'],'success':best['success'],'cost':best['cost']}
+		elif solver=='varpro':
+			popt,pcov,info=varpro_1simfit(xs,ys,funcs1,folds1,funcs2,folds2,sharenum,p0,bounds=bounds,full_output=True)
+		else:
+			popt,pcov,info=curveFit(counted,xs,ys,p0,bounds=bounds,solver=solver) #do fit, len(f)=1/2*len(y)
+		nfev+=info['nfev']
+		p0=popt
+	info['fit_time_s']=time.perf_counter()-t0
+	info['solver']=solver
+	info['nfev']=nfev
+	info['ncall']=counted.ncall
+	info['njev']=counted.njev
+	info['model_time_s']=counted.time_s
+	if msreport is not None:
+		info['multistart']=msreport
+	info['npoints']=xw.size
+	info['npoints_full']=x.size
 	perr=np.sqrt(np.diag(pcov)) #standard deviation
 	res=fitmodel(x,*popt)-y #calculate residual before update popt
 
@@ -343,10 +1229,133 @@ def lrtz_1simfit(data,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=(-n
 		fig,axes=plt.subplots(2,2,figsize=figsize)
 		fig.subplots_adjust(wspace=wspace,hspace=hspace)
 		lines=Plotting.fitCheck_1sim(axes,data,fitmode,funcs1,funcs2,sharenum,popt1,popt2,res,frange=frange,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
+		if full_output:
+			return popt,pcov,perr,res,popt1,popt2,fig,axes,lines,info
 		return popt,pcov,perr,res,popt1,popt2,fig,axes,lines
 
+	if full_output:
+		return popt,pcov,perr,res,popt1,popt2,info
 	return popt,pcov,perr,res,popt1,popt2
 #=======================================================================
+def lrtz_globalfit(datas,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,shared,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),complexmode=False,max_nfev=None):
+	'''
+	Global fit of many sweeps with the lrtz_1simfit model, some parameters shared by all sweeps and the others fitted per sweep. The joint problem is solved by scipy.optimize.least_squares with a block-sparse Jacobian; no dense (points x parameters) matrix is built.
+	Syntax:
+	-------
+	popt,perr,info=lrtz_globalfit(datas,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,shared[,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),complexmode=False,max_nfev=None])
+	Parameters:
+	-----------
+	datas: list of sweep.freqSweep objects.
+	fitmode,funcs1,folds1,funcs2,folds2,sharenum,frange,complexmode: lrtz_1simfit inputs, the same for every sweep.
+	p0: initial parameters guess, 1d in the lrtz_1simfit layout for all sweeps, or 2d with one row per sweep; shared parameters start from their mean over the rows.
+	shared: list of int, indices of the parameters shared by all sweeps, e.g. the background coefficients or the phase.
+	bounds: parameters bounds in the lrtz_1simfit layout, the same for every sweep.
+	max_nfev: int, maximum number of residual evaluations, check scipy.optimize.least_squares.
+	Returns:
+	--------
+	popt: np.array, (len(datas),len(p0)) fitted parameters of each sweep after paramUnfold, shared columns are identical.
+	perr: np.array, standard deviations of popt, from the covariance of the joint fit.
+	info: dict, 'nfev','njev','status','message','success','cost' (sum of squared residuals) of the solver, 'fit_time_s' wall time, 'pcov_shared' covariance of the shared parameters, 'res' list of residuals of each sweep (x-channel then y-channel, over frange).
+	Note:
+	-----
+	The Jacobian is estimated by forward differences sweep by sweep and stored as a sparse matrix with only the (shared, own block) columns of each sweep, so each estimate costs len(p0) model evaluations per sweep. The trust region subproblems are solved by lsmr, and the covariance is assembled block by block through the Schur complement of the shared parameters.
+	'''
+	t0=time.perf_counter()
+	nsweep=len(datas)
+	p0=np.array(p0,dtype=float)
+	npar=p0.shape[-1]
+	P0=np.broadcast_to(p0,(nsweep,npar))
+	isshared=np.zeros(npar,dtype=bool)
+	isshared[list(shared)]=True
+	gidx=np.flatnonzero(isshared) # shared parameters
+	lidx=np.flatnonzero(~isshared) # per sweep parameters
+	ng,nl=gidx.size,lidx.size
+
+	xs,ys,models=[],[],[]
+	rows=[0] # first row of each sweep in the joint residual
+	for data in datas:
+		if 'g' in fitmode:
+			y1,y2=data.gx,data.gy
+		else:
+			y1,y2=data.x,data.y
+		_,OrCond=utl.build_condition_series(frange,data.f)
+		xs.append(data.f[OrCond].values)
+		ys.append(np.concatenate((y1[OrCond].values,y2[OrCond].values)))
+		models.append(complexShare(funcs1,folds1,funcs2,folds2,sharenum) if complexmode else fuseShare(funcs1,folds1,funcs2,folds2,sharenum)) # one model per sweep, each keeps its own frequency cache
+		rows.append(rows[-1]+ys[-1].size)
+
+	def unpack(theta):
+		P=np.empty((nsweep,npar))
+		P[:,gidx]=theta[:ng]
+		P[:,lidx]=theta[ng:].reshape(nsweep,nl)
+		return P
+
+	def residual(theta):
+		P=unpack(theta)
+		return np.concatenate([model(x,*p)-y for model,x,y,p in zip(models,xs,ys,P)])
+
+	# the Jacobian is block sparse, sweep k depends on the shared parameters and its own block only; its rows all have the nonzero columns (shared, own block) in this order
+	order=np.concatenate((gidx,lidx))
+	indices=np.concatenate([np.tile(np.concatenate((np.arange(ng),ng+k*nl+np.arange(nl))).astype(np.int32),rows[k+1]-rows[k]) for k in range(nsweep)])
+	indptr=np.arange(0,indices.size+1,ng+nl)
+	plb,pub=utl.prepare_bounds(bounds,npar)
+	eps=np.sqrt(np.finfo(float).eps)
+
+	def jac(theta):
+		P=unpack(theta)
+		data=[]
+		for model,x,p in zip(models,xs,P):
+			base=model(x,*p)
+			Jk=np.empty((base.size,ng+nl))
+			for j,i in enumerate(order): # forward differences, stepping away from the bounds
+				h=eps*max(1.,abs(p[i]))
+				if p[i]+h>pub[i]:
+					h=-h
+				pp=p.copy()
+				pp[i]+=h
+				Jk[:,j]=(model(x,*pp)-base)/h
+			data.append(Jk.ravel())
+		return scipy.sparse.csr_matrix((np.concatenate(data),indices,indptr),shape=(rows[-1],ng+nsweep*nl))
+
+	theta0=np.concatenate((P0[:,gidx].mean(axis=0),P0[:,lidx].ravel()))
+	lb=np.concatenate((plb[gidx],np.tile(plb[lidx],nsweep)))
+	ub=np.concatenate((pub[gidx],np.tile(pub[lidx],nsweep)))
+	result=scipy.optimize.least_squares(residual,theta0,jac=jac,bounds=(lb,ub),method='trf',tr_solver='lsmr',x_scale='jac',max_nfev=max_nfev)
+
+	# covariance blocks: J'J=[[A,B],[B',D]] with D block diagonal, columns scaled to unit norm first as in varpro_1simfit
+	J=result.jac.tocsr()
+	colscale=np.sqrt(np.asarray(J.multiply(J).sum(axis=0)).ravel())
+	colscale[colscale==0]=1.
+	S=np.zeros((ng,ng)) # Schur complement A-sum(B_k*D_k^-1*B_k')
+	Ws,Dinvs=[],[]
+	for k in range(nsweep):
+		cols=np.concatenate((np.arange(ng),ng+k*nl+np.arange(nl)))
+		Jk=J[rows[k]:rows[k+1]][:,cols].toarray()/colscale[cols] # dense block of this sweep only
+		G,L=Jk[:,:ng],Jk[:,ng:]
+		B=G.T.dot(L)
+		Dinv=np.linalg.pinv(L.T.dot(L))
+		W=B.dot(Dinv)
+		S+=G.T.dot(G)-W.dot(B.T)
+		Ws.append(W)
+		Dinvs.append(Dinv)
+	Sinv=np.linalg.pinv(S)
+	nres=rows[-1]
+	s2=2*result.cost/(nres-theta0.size) if nres>theta0.size else np.inf # residual variance
+
+	P=unpack(result.x)
+	perr=np.empty((nsweep,npar))
+	gscale=colscale[:ng]
+	perr[:,gidx]=np.sqrt(s2*np.diag(Sinv))/gscale
+	for k,(W,Dinv) in enumerate(zip(Ws,Dinvs)):
+		lscale=colscale[ng+k*nl:ng+(k+1)*nl]
+		perr[k,lidx]=np.sqrt(s2*np.diag(Dinv+W.T.dot(Sinv).dot(W)))/lscale
+
+	res=[model(x,*p)-y for model,x,y,p in zip(models,xs,ys,P)]
+	popt=np.array([paramUnfold(p.copy(),funcs1,folds1,funcs2,folds2,sharenum)[0] for p in P])
+	info={'nfev':result.nfev,'njev':result.njev,'status':result.status,'message':result.message,'success':result.status>0,'cost':2*result.cost,
+		'fit_time_s':time.perf_counter()-t0,'pcov_shared':s2*Sinv/np.outer(gscale,gscale),'res':res}
+	return popt,perr,info
+#=======================================================================
 def savitzky_golay(y, window_size, order, deriv=0, rate=1):
     '''
 	Smooth (and optionally differentiate) data with a Savitzky-Golay filter.
@@ -376,6 +1385,8 @@ def savitzky_golay(y, window_size, order, deriv=0, rate=1):
     approach is to make for each point a least-square fit with a
     polynomial of high order over a odd-sized window centered at
     the point.
+    This is a wrapper of savgol_filter, which also filters complex and
+    N-D input, and caches the coefficients.
     Examples
     --------
     t = np.linspace(-4, 4, 500)
@@ -396,28 +1407,74 @@ def savitzky_golay(y, window_size, order, deriv=0, rate=1):
        W.H. Press, S.A. Teukolsky, W.T. Vetterling, B.P. Flannery
        Cambridge University Press ISBN-13: 9780521880688
     '''
-    from math import factorial
-    
-    try:
-        window_size = np.abs(np.int(window_size))
-        order = np.abs(np.int(order))
-    except ValueError:
-        raise ValueError("window_size and order have to be of type int")
-    if window_size % 2 != 1 or window_size < 1:
-        raise TypeError("window_size size must be a positive odd number")
-    if window_size < order + 2:
-        raise TypeError("window_size is too small for the polynomials order")
-    order_range = range(order+1)
-    half_window = (window_size -1) // 2
-    # precompute coefficients
-    b = np.mat([[k**i for i in order_range] for k in range(-half_window, half_window+1)])
-    m = np.linalg.pinv(b).A[deriv] * rate**deriv * factorial(deriv)
-    # pad the signal at the extremes with
-    # values taken from the signal itself
-    firstvals = y[0] - np.abs( y[1:half_window+1][::-1] - y[0] )
-    lastvals = y[-1] + np.abs(y[-half_window-1:-1][::-1] - y[-1])
-    y = np.concatenate((firstvals, y, lastvals))
-    return np.convolve( m[::-1], y, mode='valid')
+    return savgol_filter(y,window_size,order,deriv=deriv,rate=rate)
+#=======================================================================
+@lru_cache(maxsize=64)
+def savgolCoeffs(window_size,order,deriv=0,rate=1):
+	'''
+	Savitzky-Golay filter coefficients, cached per (window_size,order,deriv,rate).
+	Syntax:
+	-------
+	m=savgolCoeffs(window_size,order[,deriv=0,rate=1])
+	Parameters:
+	-----------
+	window_size: int; the length of the window. Must be a positive odd integer.
+	order: int; order of the polynomial, must be less than window_size-1.
+	deriv: int; order of the derivative to compute.
+	rate: x spacing reciprocal, the derivative is scaled by rate**deriv.
+	Returns:
+	--------
+	m: 1-D read-only array of length window_size, filtered value at each point is the dot product of m with the window centered at the point.
+	'''
+	try:
+		window_size=np.abs(int(window_size))
+		order=np.abs(int(order))
+	except ValueError:
+		raise ValueError("window_size and order have to be of type int")
+	if window_size%2!=1 or window_size<1:
+		raise TypeError("window_size size must be a positive odd number")
+	if window_size<order+2:
+		raise TypeError("window_size is too small for the polynomials order")
+	half_window=(window_size-1)//2
+	b=np.arange(-half_window,half_window+1)[:,np.newaxis]**np.arange(order+1) # Vandermonde matrix
+	m=np.linalg.pinv(b)[deriv]*rate**deriv*factorial(deriv)
+	m.flags.writeable=False
+	return m
+#=======================================================================
+def savgol_filter(y,window_size,order,deriv=0,rate=1,axis=-1):
+	'''
+	Smooth (and optionally differentiate) data with a Savitzky-Golay filter along one axis, vectorized version of savitzky_golay.
+	Syntax:
+	-------
+	ys=savgol_filter(y,window_size,order[,deriv=0,rate=1,axis=-1])
+	Parameters:
+	-----------
+	y: array_like, real or complex; signals to be filtered, any number of dimensions.
+	window_size,order,deriv,rate: savgolCoeffs inputs.
+	axis: int; axis along which y is filtered, every other axis is treated as a separate signal.
+	Returns:
+	--------
+	ys: ndarray, same shape as y, the smoothed signals (or their deriv-th derivatives).
+	Note:
+	-----
+	The ends are padded with values mirrored about the end points, the same as savitzky_golay. For complex y the real and imaginary parts are padded separately, and both are filtered in the same call.
+	'''
+	y=np.asarray(y)
+	if np.iscomplexobj(y):
+		ys=savgol_filter(np.stack((y.real,y.imag)),window_size,order,deriv=deriv,rate=rate,axis=axis if axis<0 else axis+1)
+		return ys[0]+1j*ys[1]
+	y=y.astype(float,copy=False)
+	m=savgolCoeffs(window_size,order,deriv,rate)
+	half_window=(m.size-1)//2
+	y=np.moveaxis(y,axis,-1)
+	# pad the signal at the extremes with values taken from the signal itself
+	y0=y[...,:1]
+	y1=y[...,-1:]
+	firstvals=y0-np.abs(y[...,half_window:0:-1]-y0)
+	lastvals=y1+np.abs(y[...,-2:-half_window-2:-1]-y1)
+	y=np.concatenate((firstvals,y,lastvals),axis=-1)
+	ys=scipy.ndimage.correlate1d(y,m,axis=-1,mode='constant')[...,half_window:y.shape[-1]-half_window] # keep the unpadded points
+	return np.moveaxis(ys,-1,axis)
 #=======================================================================
 def nmr1simfit(data,p0,window_size,order,sfrange=(-np.inf,np.inf),deriv=0,rate=1,bounds=(-np.inf,np.inf),pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8):
 	'''
@@ -473,18 +1530,23 @@ def nmr1simfit(data,p0,window_size,order,sfrange=(-np.inf,np.inf),deriv=0,rate=1
 
 	return popt,pcov,perr
 #=======================================================================
-def nmr_1simfit(data,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8):
+def nmr_1simfit(data,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),engine='dft',solver=None,multires=None,multistart=None,full_output=False,pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8):
 	'''
 	2019-09-25 15:45
 	Smooth FFT FID and then fit to several peaks for nmr.nmr object class.
 	Syntax:
 	-------
-	popt,pcov,perr=nmr_1simfit(data,p0[,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8])
+	popt,pcov,perr[,fig,axes,lines][,info]=nmr_1simfit(data,p0[,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),engine='dft',solver=None,multires=None,multistart=None,full_output=False,pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8])
 	Parameters:
 	-----------
 	p0: list; initial fitting parameters, format is [s01,T1,f01,phase1,s02,T2,f02,phase2,...], length=4xN.
 	frange: (lb,ub); lower and upper bound of the frequency range for fitting.
 	bounds: Fitting parameter bounds, for scipy.optimize.curve_fit.
+	engine: str; 'dft' evaluates the model from the closed-form FuncLib.FID0dfts only at the bins within frange, and hands its analytic Jacobian to the solver; 'fft' builds the whole zero-filled spectrum with FuncLib.FID0ffts for every evaluation. Both give the same model.
+	solver: str, scipy.optimize.curve_fit backend, 'auto','lm','trf' or 'dogbox', check curveFit; None uses defaultSolver('nmr_1simfit').
+	multires: None or list of int, if given, e.g. (16,4), fit every 16th bin within frange first, then every 4th bin starting from the previous result, and finally all bins; popt and pcov are those of the last, full resolution fit.
+	multistart: None or dict of multiStartFit options, e.g. dict(nstart=64,npolish=4,workers=4); if given, the (first multires level) fit is a multi-start global search within bounds, whose local fits use solver.
+	full_output: boolean, if True, also return info.
 	pltflag: plot flag.
 	figsize,wspace,hspace: figure and subplots spacing settings.
 	marker,markersize,linewidth: Fitted curve plot settings.
@@ -494,23 +1556,40 @@ def nmr_1simfit(data,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=
 	popt: Fitting parameters optimized from p0.
 	pcov: Covariance output from scipy.optimize.curve_fit.
 	perr: Standard deviation associated with popt.
+	info: dict, fit telemetry, 'nfev','ncall','njev','model_time_s','fit_time_s','status','message','success','cost','solver' as in lrtz_1simfit, 'multistart' is the report of multiStartFit if multistart is given; only returned if full_output=True.
 	'''
 	p0=np.asarray(p0)
 	_,OrCond=utl.build_condition(frange,data._f0fill) # prepare to isolate data in the frange only
+	if engine not in ('dft','fft'):
+		raise ValueError("engine must be 'dft' or 'fft'")
+	idx=np.flatnonzero(OrCond) # bins within frange
+	if solver is None:
+		solver=defaultSolver('nmr_1simfit')
 
-	#create function that takes only f and p as inputs
-	#create function calculate real part of FuncLib.FID0fft combined from several peaks
-	def newr(f,*p):
-		return FuncLib.FID0ffts(f,*p,zerofillnum=data._zerofillnum).real[OrCond]
-	#create function calculate imaginary part of FuncLib.FID0fft combined from several peaks	
-	def newi(f,*p):
-		return FuncLib.FID0ffts(f,*p,zerofillnum=data._zerofillnum).imag[OrCond]
-	#create function calculate real and imaginary parts simultaneously, output 1-D array with [real,imag] format
-	def new(f,*p):
-		return np.append(newr(f,*p),newi(f,*p))
-
-	y=np.append(data._fftnmr0fill[OrCond].real,data._fftnmr0fill[OrCond].imag) #fit to data in this frange
-	popt,pcov=scipy.optimize.curve_fit(new,data._f,y,p0=p0,bounds=bounds) # do fit
+	nfev=ncall=njev=0
+	tmodel=0.
+	msreport=None
+	t0=time.perf_counter()
+	for q in multiresLevels(multires,idx.size,p0.size): # coarse to fine, each level starts from the previous optimum
+		bins=idx[q//2::q] # only these bins are fitted at this level
+		new=countedModel(nmrModel(data._zerofillnum,bins,engine=engine)) # [real,imag] of the spectrum at bins, counted for telemetry
+		y=np.append(data._fftnmr0fill[bins].real,data._fftnmr0fill[bins].imag) #fit to data in these bins
+		if multistart is not None and msreport is None: # global search on the first level
+			popt,pcov,msreport=multiStartFit(new,data._f,y,p0,bounds=bounds,jac=new.jac,solver=solver,**multistart)
+			best=msreport['best']
+			nfev+=msreport['nfev']
+			status,message,success,cost=best['status'],best['message'],best['success'],best['cost']
+		else:
+			popt,pcov,fitinfo=curveFit(new,data._f,y,p0,bounds=bounds,jac=new.jac,solver=solver) # do fit
+			nfev+=fitinfo['nfev']
+			status,message,success,cost=fitinfo['status'],fitinfo['message'],fitinfo['success'],fitinfo['cost']
+		ncall+=new.ncall
+		njev+=new.njev
+		tmodel+=new.time_s
+		p0=popt
+	info={'nfev':nfev,'ncall':ncall,'njev':njev,'model_time_s':tmodel,'fit_time_s':time.perf_counter()-t0,'status':status,'message':message,'success':success,'cost':cost,'solver':solver}
+	if msreport is not None:
+		info['multistart']=msreport
 	perr=np.sqrt(np.diag(pcov))
 #--------------------------------plot-----------------------------------
 	if pltflag:
@@ -519,8 +1598,12 @@ def nmr_1simfit(data,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=
 		lines=Plotting.fitCheck_nmr(axes,data,popt,marker=marker,markersize=markersize,linewidth=linewidth,bbox_to_anchor=(0,1),legloc='lower left',legsize=8)
 		lines[0][0].set_zorder(1) #plot FID at bottom
 		lines[0][1].set_zorder(10) #plot fitted FID on top
+		if full_output:
+			return popt,pcov,perr,fig,axes,lines,info
 		return popt,pcov,perr,fig,axes,lines
 
+	if full_output:
+		return popt,pcov,perr,info
 	return popt,pcov,perr
 #=======================================================================
 
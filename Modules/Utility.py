@@ -2,14 +2,77 @@
 Utility use functions. Designed to NOT have dependency on any home-made modules.
 '''
 import os, time
+import importlib
+from functools import lru_cache
 import numpy as np
 from numpy import isnan,exp,log
 import pandas as pd
 import FuncLib
-from pint import UnitRegistry
-ureg=UnitRegistry()
 import scipy.special
 
+psi2bar=0.06894757293168361 #bar/psi, 0.45359237kg*9.80665m/s**2/(0.0254m)**2 in bar, (1*ureg.psi).to(ureg.bar).magnitude to rounding
+
+#=======================================================================
+def __getattr__(name):
+	'''
+	Module attributes created on first use: ureg, the pint UnitRegistry, which takes a noticeable time to build.
+	'''
+	if name=='ureg':
+		global ureg
+		from pint import UnitRegistry
+		ureg=UnitRegistry()
+		return ureg
+	raise AttributeError("module 'Utility' has no attribute '%s'"%name)
+#=======================================================================
+class lazyModule(object):
+	'''
+	Stand-in for a module that is imported on first attribute access, for heavy dependencies such as matplotlib that headless code paths never use.
+	Syntax:
+	-------
+	mod=lazyModule(name)
+	Parameters:
+	-----------
+	name: str, module name for importlib.import_module, e.g. 'matplotlib.pyplot'.
+	Returns:
+	--------
+	mod: lazyModule instance, mod.attr is getattr(module,attr).
+	'''
+	def __init__(self,name):
+		self._name=name
+		self._module=None
+#-----------------------------------------------------------------------
+	def __getattr__(self,attr):
+		if self._module is None:
+			self._module=importlib.import_module(self._name)
+		return getattr(self._module,attr)
+#=======================================================================
+def importTime(module='macro',n=5,path=None,heavy=('pint','sympy','matplotlib')):
+	'''
+	Startup benchmark: time the import of a module in n fresh interpreters.
+	Syntax:
+	-------
+	t,loaded=importTime([module='macro',n=5,path=None,heavy=('pint','sympy','matplotlib')])
+	Parameters:
+	-----------
+	module: str, module to import.
+	n: int, number of interpreters started.
+	path: str, folder put first on sys.path of the interpreters; None is the folder of this file. Pass the Modules folder of another checkout, e.g. one made by 'git worktree add', to time that version.
+	heavy: list of str, modules reported if the import loaded them.
+	Returns:
+	--------
+	t: np.array, import times in seconds, excluding the interpreter startup.
+	loaded: list of str, modules of heavy loaded by the import in any of the interpreters.
+	'''
+	import subprocess,sys
+	path=os.path.dirname(os.path.abspath(__file__)) if path is None else path
+	code='import sys,time;sys.path.insert(0,%r);t=time.perf_counter();import %s;t=time.perf_counter()-t;print(t);print(" ".join(m for m in %r if m in sys.modules))'%(path,module,tuple(heavy))
+	t=np.empty(n)
+	loaded=set()
+	for i in range(n):
+		out=subprocess.run([sys.executable,'-W','ignore','-c',code],capture_output=True,text=True,check=True).stdout.split('\n')
+		t[i]=float(out[0])
+		loaded.update(out[1].split())
+	return t,sorted(loaded)
 #=======================================================================
 def mctC2P(C,p):
 	'''
@@ -26,9 +89,7 @@ def mctC2P(C,p):
 	P: mct pressure, unit is bar.
 	'''
 	Ppsi=np.polynomial.polynomial.polyval(C,p)
-	
-	f=lambda P:(P*ureg.psi).to(ureg.bar).magnitude #converts P from psi to bar, automatically sequence aware thanks to ureg. A direct division is more efficient here, but ureg is implemented in case future configurability is needed.
-	Pbar=f(Ppsi)
+	Pbar=Ppsi*psi2bar #converts P from psi to bar
 	return Pbar
 #=======================================================================
 def mctP2T(P,branch='low',Pn=34.3934):
@@ -44,26 +105,21 @@ def mctP2T(P,branch='low',Pn=34.3934):
 	Pn: Neel transition pressure in bar.
 	Returns:
 	--------
-	T: temperature in mK.
+	T: temperature in mK, np.array of the same shape as P for the 'low' branch.
+	Note:
+	-----
+	The 'low' branch splits P with a mask at P(T=0.9mK): below it, the low branch of FuncLib.PLTS2000P2T, above it, FuncLib.floridaP2T. All points are converted at once.
 	'''
-# if branch=='high':
-	def mctP2Thigh(P,Pn):#sequence aware
-		T=FuncLib.PLTS2000P2T(P,Pn=Pn)[1] #high branch PLTS2000 only
-		return T
-#-----------------------------------------------------------------------
-# if branch=='low'
-	def mctP2Tlow(P,Pn):#only takes scalar input
-		if P<=FuncLib.PLTS2000T2P(0.9,Pn=Pn): #low P side of low branch
-			T=FuncLib.PLTS2000P2T(P,Pn=Pn)[0]
-		else: #high P side of low branch
-			T=FuncLib.floridaP2T(P,Pn=Pn)
-		return T
-#-----------------------------------------------------------------------
 	if branch=='high': #melting curve 'high' branch
-		return mctP2Thigh(P,Pn)
-	else: # 'low' branch
-		f=np.vectorize(mctP2Tlow)
-		return f(P,Pn)
+		return FuncLib.PLTS2000P2T(P,Pn=Pn)[1]
+	# 'low' branch
+	P=np.array(P,dtype=float)
+	T=np.empty(P.shape)
+	plts=~(P>FuncLib.PLTS2000T2P(0.9,Pn=Pn)) #low P side of low branch, including nan
+	if np.any(plts):
+		T[plts]=FuncLib.PLTS2000P2T(P[plts],Pn=Pn)[0]
+	T[~plts]=FuncLib.floridaP2T(P[~plts],Pn=Pn) #high P side of low branch
+	return T
 #=======================================================================
 def mctC2T(C,p,branch='low',Pn=34.3934):
 	'''
@@ -88,29 +144,50 @@ def mctC2T(C,p,branch='low',Pn=34.3934):
 	T=mctP2T(P,branch=branch,Pn=Pn)
 	return T
 #=======================================================================
-def chooseT(Tmc,Tmct):
+def chooseT(Tmc,Tmct,crossover=100.,hysteresis=0.,strict=True,mask=False):
 	'''
 	Syntax:
 	-------
-	Tmm=chooseT(Tmc,Tmct)
+	Tmm=chooseT(Tmc,Tmct[,crossover=100.,hysteresis=0.,strict=True,mask=False])
+	Tmm,fromMct=chooseT(Tmc,Tmct,mask=True)
 	Parameters:
 	-----------
-	Tmc,Tmct: mixing chamber temperature, MCT temperature, units are mK.
+	Tmc,Tmct: mixing chamber temperature, MCT temperature, units are mK; scalars or sequences, broadcast together.
+	crossover: the crossover temperature in mK.
+	hysteresis: half width in mK of a band around crossover for 1D sequences, e.g. a run log in time order. Above crossover+hysteresis Tmc is chosen, below crossover-hysteresis Tmct is chosen, and inside the band the previous choice is kept, so that a temperature hovering at the crossover does not switch the source back and forth. Points inside the band before any choice follow the crossover rule. 0 disables it.
+	strict: bool, if True raise an error when both values of any point are NAN; if False, such points return NAN.
+	mask: bool, if True also return fromMct.
 	Returns:
 	--------
 	Tmm:returns Tmc to Tmm when max(Tmc,Tmct)>100mK
 		returns Tmct to Tmm when both below 100mK
 		if one of them is NAN, returns the other to Tmm
 		if both are NAN, raise an error
-	'''
-	if isnan(Tmc) and isnan(Tmct):
+		float for scalar inputs, otherwise np.array, evaluated elementwise.
+	fromMct: bool or bool np.array, True where Tmm is taken from Tmct.
+	'''
+	Tmc,Tmct=np.broadcast_arrays(np.asarray(Tmc,dtype=float),np.asarray(Tmct,dtype=float))
+	nanMc=isnan(Tmc)
+	nanMct=isnan(Tmct)
+	both=nanMc&nanMct
+	if strict and np.any(both):
 		raise TypeError('Both values are N/A values') #raise error if both values are NAN
-	elif isnan(Tmc) or isnan(Tmct):
-		Tmm=np.nanmax([Tmc,Tmct]) #if one is NAN, return the other to Tmm
-	elif np.maximum(Tmc,Tmct)>100: #b/c in this region, Tmc<Tmct==>this condition is the same as Tmct>100
-		Tmm=Tmc #b/c Tmct switches around 315mK, the delay in manually switch solutions may cause Tmc>Tmct
-	else:
-		Tmm=Tmct
+	Tmax=np.fmax(Tmc,Tmct) #ignores a single NAN
+	useMc=Tmax>crossover #b/c in this region, Tmc<Tmct==>this condition is the same as Tmct>100
+	if hysteresis>0:
+		if Tmax.ndim!=1:
+			raise ValueError('hysteresis requires 1D Tmc,Tmct')
+		state=np.where(Tmax>crossover+hysteresis,1,np.where(Tmax<crossover-hysteresis,0,-1)) #-1 inside the band
+		last=np.maximum.accumulate(np.where(state>=0,np.arange(state.size),-1)) #index of the last point outside the band
+		useMc=np.where(last>=0,state[np.maximum(last,0)]==1,useMc)
+	useMc=(useMc|nanMct)&~nanMc #if one is NAN, return the other to Tmm
+	Tmm=np.where(useMc,Tmc,Tmct) #NAN if both are NAN
+	fromMct=~useMc&~both
+	if Tmm.ndim==0:
+		Tmm=float(Tmm)
+		fromMct=bool(fromMct)
+	if mask:
+		return Tmm,fromMct
 	return Tmm
 #=======================================================================
 def colorCode(iter):
@@ -814,29 +891,15 @@ def tcxR2T(R):
 	T=tcxR2T(R)
 	Parameters:
 	-----------
-	R: a number, the resistance value of the thermometer in Ohm.
+	R: a number, the resistance value of the thermometer in Ohm, sequence aware.
 	Returns:
 	--------
-	T: a number, the measured temperature in Kelvin.
+	T: a number, the measured temperature in Kelvin. NaN if R is outside the Chebyshev fit range.
+	Note:
+	-----
+	Evaluated by the calibCurve sensors['cx1080'].
 	'''
-	ZL=2.19190615742
-	ZU=3.06365212051
-	a0=185.729684
-	a1=-119.272440
-	a2=21.243200
-	a3=-3.132976
-	a4=0.523229
-	a5=-0.092608
-	a6=0.015490
-	a7=-0.003148
-	A=[a0,a1,a2,a3,a4,a5,a6,a7]
-
-	Z=np.log10(R)
-	k=((Z-ZL)-(ZU-Z))/(ZU-ZL)
-	T=0
-	for i in range(0,8):
-		T+=A[i]*np.cos(i*np.arccos(k))
-	return T
+	return sensors['cx1080'](R)
 #=======================================================================
 def dt670v2t(V):
     '''
@@ -873,26 +936,12 @@ def dt670v2t(V):
     Returns:
     --------
     T: (array/list of) float, the measured temperature in Kelvin. If the temperature is out of the 1.4-500K range, NaN is returned.
+    Note:
+    -----
+    Evaluated by the calibCurve sensors['dt670'].
     '''
 
-    p1=np.array([-20565.913782268446, 228730.4194910006, -1119517.6988040218, 3150831.1077316683, -5578744.951300982, 6363503.260132671, -4565985.813483451, 1883378.9740621012, -341630.3678481866])
-    p2=np.array([386892815.6121058, -2175204494.451572, 4891470786.059078, -5499437047.54732, 3091262041.4756904, -694994849.5481056]) 
-    p3=np.array([134033.55576023352, -842414.0610855379, 2315252.7422276624, -3654248.7357260347, 3656374.766135586, -2414328.5685193813, 1060660.0291558076, -304469.54933367047, 54273.374297208655, -5381.362845641886, -195.99048275081765, 536.779755950008])
-    
-    def v2t(V): # single value V to T conversion
-        if V>=1.140817:
-            T=np.polynomial.polynomial.polyval(V,p1[-1::-1])
-        elif V<=1.106244:
-            T=np.polynomial.polynomial.polyval(V,p3[-1::-1])
-        else:
-            T=np.polynomial.polynomial.polyval(V,p2[-1::-1])
-
-        if T<1.4 or T>500: # out of range
-            return np.nan
-        else:
-            return T
-    
-    return np.vectorize(v2t)(V) # allows for array input/output
+    return sensors['dt670'](V)
 #=======================================================================
 def setra206V2P(V):
 	'''
@@ -905,15 +954,15 @@ def setra206V2P(V):
 	P=setra206V2P(V)
 	Parameters:
 	-----------
-	V: a number, DC voltage output of the setra206 gauge.
+	V: a number, DC voltage output of the setra206 gauge, sequence aware.
 	Returns:
 	--------
 	P: float, pressure measured by the gauge.
+	Note:
+	-----
+	Evaluated by the calibCurve sensors['setra206'].
 	'''
-	slope=102.98806383700568
-	intercept=-24.860760933856199
-	P=slope*V+intercept
-	return P
+	return sensors['setra206'](V)
 #=======================================================================
 def setra206P2V(P):
 	'''
@@ -928,11 +977,123 @@ def setra206P2V(P):
 	--------
 	V: float, DC voltage output of the setra206 gauge.
 	'''
-	slope=102.98806383700568
-	intercept=-24.860760933856199
+	slope=setra206Coef[1]
+	intercept=setra206Coef[0]
 	V=(P-intercept)/slope
 	return V
 #=======================================================================
+class calibCurve(object):
+	'''
+	Piecewise calibration curve of a sensor, converting a reading x (e.g. V, Ohm) to a quantity y (e.g. K, psig) for whole arrays at once.
+	Syntax:
+	-------
+	curve=calibCurve(segments[,kind='poly',transform=None,yrange=None,name=''])
+	y=curve(x)
+	Parameters:
+	-----------
+	segments: list of (lo,hi,coef) for kind='poly', or (lo,hi,coef,(zl,zu)) for kind='cheb'. A reading x belongs to the first segment in the list with lo<=x<=hi; coef are lower order terms in front.
+	kind: str; 'poly' gives y=sum(coef[i]*z**i) by Horner's rule, 'cheb' gives y=sum(coef[i]*T_i(k)) by Clenshaw's recurrence, with k=((z-zl)-(zu-z))/(zu-zl), and nan where |k|>1.
+	transform: function applied to x to get z, e.g. np.log10; None for z=x.
+	yrange: (ymin,ymax), y outside it is returned as nan; None for no limit.
+	name: str, description of the sensor.
+	Returns:
+	--------
+	curve: calibCurve instance.
+	y: np.array of the shape of x, float for scalar x; nan where x is nan or in no segment.
+	Note:
+	-----
+	Each segment is evaluated once on the readings it owns, selected by a mask.
+	'''
+	def __init__(self,segments,kind='poly',transform=None,yrange=None,name=''):
+		if kind not in ('poly','cheb'):
+			raise ValueError("kind must be 'poly' or 'cheb'")
+		self.segments=[(float(seg[0]),float(seg[1]),np.array(seg[2],dtype=float))+tuple(seg[3:]) for seg in segments]
+		self.kind=kind
+		self.transform=transform
+		self.yrange=yrange
+		self.name=name
+#-----------------------------------------------------------------------
+	def __call__(self,x):
+		x=np.asarray(x,dtype=float)
+		if self.transform is None:
+			z=x
+		else:
+			with np.errstate(invalid='ignore',divide='ignore'):
+				z=self.transform(x)
+		y=np.full(x.shape,np.nan)
+		left=~np.isnan(x) # readings not assigned to a segment yet
+		for seg in self.segments:
+			lo,hi,coef=seg[:3]
+			m=left&(x>=lo)&(x<=hi)
+			if not np.any(m):
+				continue
+			left&=~m
+			zm=z[m]
+			if self.kind=='poly':
+				y[m]=np.polynomial.polynomial.polyval(zm,coef)
+			else:
+				zl,zu=seg[3]
+				k=((zm-zl)-(zu-zm))/(zu-zl)
+				y[m]=np.where(np.abs(k)<=1,np.polynomial.chebyshev.chebval(k,coef),np.nan)
+		if self.yrange is not None:
+			with np.errstate(invalid='ignore'):
+				y[(y<self.yrange[0])|(y>self.yrange[1])]=np.nan
+		if y.ndim==0:
+			return float(y)
+		return y
+#=======================================================================
+sensors={} # registry of calibCurve instances by sensor name
+#=======================================================================
+def registerSensor(name,curve):
+	'''
+	Add a calibration curve to the sensors registry, replacing any curve of the same name.
+	Syntax:
+	-------
+	curve=registerSensor(name,curve)
+	Parameters:
+	-----------
+	name: str, sensor name.
+	curve: calibCurve instance.
+	Returns:
+	--------
+	curve: the registered curve.
+	'''
+	if not isinstance(curve,calibCurve):
+		raise TypeError('curve must be a calibCurve instance')
+	sensors[name]=curve
+	return curve
+#=======================================================================
+def sensorConvert(data,columns):
+	'''
+	Convert several columns of a log with calibration curves in one pass, e.g. a whole thermometer log.
+	Syntax:
+	-------
+	out=sensorConvert(data,columns)
+	Parameters:
+	-----------
+	data: pandas.DataFrame, e.g. readLog.sweepLog._content.
+	columns: dict, {column:sensor} or {column:(sensor,newname)}; sensor is a key of sensors or a calibCurve, newname is the output column name and defaults to column.
+	Returns:
+	--------
+	out: pandas.DataFrame of the converted columns, with the index of data.
+	'''
+	out={}
+	for col,item in columns.items():
+		sensor,name=item if isinstance(item,tuple) else (item,col)
+		curve=sensors[sensor] if isinstance(sensor,str) else sensor
+		out[name]=curve(data[col].values)
+	return pd.DataFrame(out,index=data.index)
+#=======================================================================
+setra206Coef=(-24.860760933856199,102.98806383700568) # intercept(psig),slope(psig/V) of setra206V2P
+registerSensor('cx1080',calibCurve([(-np.inf,np.inf,[185.729684,-119.272440,21.243200,-3.132976,0.523229,-0.092608,0.015490,-0.003148],(2.19190615742,3.06365212051))],kind='cheb',transform=np.log10,name='CX-1080-CU-HT-20L, R(Ohm) to T(K), tcxR2T'))
+registerSensor('dt670',calibCurve([
+	(1.140817,np.inf,np.array([-20565.913782268446, 228730.4194910006, -1119517.6988040218, 3150831.1077316683, -5578744.951300982, 6363503.260132671, -4565985.813483451, 1883378.9740621012, -341630.3678481866])[::-1]), # p1, T<=23K
+	(-np.inf,1.106244,np.array([134033.55576023352, -842414.0610855379, 2315252.7422276624, -3654248.7357260347, 3656374.766135586, -2414328.5685193813, 1060660.0291558076, -304469.54933367047, 54273.374297208655, -5381.362845641886, -195.99048275081765, 536.779755950008])[::-1]), # p3, T>=30K
+	(-np.inf,np.inf,np.array([386892815.6121058, -2175204494.451572, 4891470786.059078, -5499437047.54732, 3091262041.4756904, -694994849.5481056])[::-1]), # p2, 23K<=T<=30K
+	],yrange=(1.4,500),name='Lakeshore DT-670, V(V) to T(K), dt670v2t'))
+registerSensor('setra206',calibCurve([(-np.inf,np.inf,setra206Coef)],name='Setra 206, V(V) to P(psig), setra206V2P'))
+#=======================================================================
+@lru_cache(maxsize=256)
 def jnp_zeros(m,n):
 	'''
 	Compute zeros of integer-order Bessel function derivative Jn’(x)
@@ -947,6 +1108,9 @@ def jnp_zeros(m,n):
 	Returns:
 	--------
 	jnp0: float, the nth extremum for the Bessel function.
+	Note:
+	-----
+	Cached per (m,n). For many modes use cylCavModes, which computes the zeros of each m once.
 	'''
 	if m==0 and n==0:
 		return 0
@@ -971,3 +1135,77 @@ def cylCav_f0(L,R,c,l,m,n):
 	flmn=1/2/np.pi*c*np.sqrt(kmn**2+kzl**2)
 	return flmn
 #=======================================================================
+#=======================================================================
+def cylCavModes(L,R,c,fmax):
+	'''
+	Table of all acoustic eigenmodes of a cylindrical cavity with 0<f<=fmax, sorted by frequency; the frequencies are those of cylCav_f0.
+	Syntax:
+	-------
+	f,modes=cylCavModes(L,R,c,fmax)
+	Parameters:
+	-----------
+	L: float, length of the cavity.
+	R: float, radius of the cavity.
+	c: float, speed of sound of the medium filling the cavity.
+	fmax: float, highest frequency in the table.
+	Returns:
+	--------
+	f: np.array, ascending eigenfrequencies.
+	modes: int np.array of shape (len(f),3), (l,m,n) of each frequency.
+	Note:
+	-----
+	The zeros of Jm' below 2*pi*fmax*R/c are computed by one scipy.special.jnp_zeros call per m, with n=0 for m=0 as in jnp_zeros, and each (m,n) is broadcast over all l up to 2*L*fmax/c.
+	Use cylCavNear on f to find the modes close to a measured peak.
+	'''
+	kmax=2*np.pi*fmax/c
+	xmax=kmax*R # largest Bessel derivative zero needed
+	lmax=int(np.floor(kmax*L/np.pi))
+	kzl=np.arange(lmax+1)*np.pi/L
+	fs=[]
+	labels=[]
+	m=0
+	while True:
+		nt=int(xmax/np.pi)+2 # zeros are spaced by about pi
+		x=scipy.special.jnp_zeros(m,nt)
+		while x[-1]<=xmax: # not enough zeros yet
+			nt*=2
+			x=scipy.special.jnp_zeros(m,nt)
+		x=x[x<=xmax]
+		if m==0:
+			x=np.concatenate(([0.],x)) # the '0th' extremum of J0
+		if x.size==0: # the first zero grows with m
+			break
+		n=np.arange(x.size)+(m!=0)
+		flmn=c/2/np.pi*np.sqrt((x[:,np.newaxis]/R)**2+kzl[np.newaxis,:]**2) # (n,l)
+		nn,ll=np.broadcast_arrays(n[:,np.newaxis],np.arange(lmax+1)[np.newaxis,:])
+		keep=(flmn<=fmax)&(flmn>0)
+		fs.append(flmn[keep])
+		labels.append(np.stack((ll[keep],np.full(keep.sum(),m),nn[keep]),axis=-1))
+		m+=1
+	f=np.concatenate(fs)
+	modes=np.concatenate(labels).astype(int)
+	order=np.argsort(f,kind='stable')
+	return f[order],modes[order]
+#=======================================================================
+def cylCavNear(f,f0,df):
+	'''
+	Index range of the modes of a sorted frequency table within f0-df<=f<=f0+df, by binary search.
+	Syntax:
+	-------
+	lo,hi=cylCavNear(f,f0,df)
+	Parameters:
+	-----------
+	f: ascending np.array, e.g. output of cylCavModes.
+	f0: float or sequence, measured peak frequencies.
+	df: float or sequence, half width of the window.
+	Returns:
+	--------
+	lo,hi: int or int np.array, f[lo:hi] and modes[lo:hi] are the modes near f0.
+	'''
+	f0=np.asarray(f0,dtype=float)
+	lo=np.searchsorted(f,f0-df,side='left')
+	hi=np.searchsorted(f,f0+df,side='right')
+	if lo.ndim==0:
+		return int(lo),int(hi)
+	return lo,hi
+#=======================================================================
@@ -0,0 +1,192 @@
+'''
+fitCache.py: Ver 1.0.
+On-disk memoization of fit results, keyed by a hash of the data file content, the model and the fitting options. Least recently used entries are evicted when the cache grows over its size limit.
+'''
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+#=======================================================================
+def fileDigest(path):
+	'''
+	sha1 hex digest of a file's content.
+	Syntax:
+	-------
+	digest=fileDigest(path)
+	Parameters:
+	-----------
+	path: str, file path.
+	Returns:
+	--------
+	digest: str, hex digest.
+	'''
+	h=hashlib.sha1()
+	with open(path,'rb') as fo:
+		for chunk in iter(lambda:fo.read(1<<20),b''):
+			h.update(chunk)
+	return h.hexdigest()
+#=======================================================================
+def token(obj):
+	'''
+	Deterministic string representation of fitting inputs, used to build cache keys. Functions are represented by their module and name, arrays by their dtype, shape and content, containers recursively.
+	Syntax:
+	-------
+	s=token(obj)
+	Parameters:
+	-----------
+	obj: object to be represented.
+	Returns:
+	--------
+	s: str.
+	'''
+	if callable(obj) and hasattr(obj,'__name__'):
+		return '%s.%s'%(getattr(obj,'__module__',''),obj.__name__)
+	if isinstance(obj,dict):
+		return '{'+','.join('%s:%s'%(token(k),token(obj[k])) for k in sorted(obj,key=str))+'}'
+	if isinstance(obj,(list,tuple)):
+		return '['+','.join(token(o) for o in obj)+']'
+	if isinstance(obj,np.ndarray) or np.isscalar(obj):
+		a=np.asarray(obj)
+		if a.dtype.kind in 'fciub':
+			return '%s%s%s'%(a.dtype.str,a.shape,a.tobytes().hex())
+		return repr(a.tolist())
+	return repr(obj)
+#=======================================================================
+class fitCache(object):
+	'''
+	On-disk cache of fit results. Each entry is a .npz file named by its key, the access record is kept in index.json under the same folder.
+	Syntax:
+	-------
+	cache=fitCache(path[,maxsize=5e8])
+	Parameters:
+	-----------
+	path: str, cache folder, created if nonexistent.
+	maxsize: float, size limit of all entries in bytes, least recently used entries are removed above this limit.
+	Returns:
+	--------
+	self._path: str, cache folder.
+	self._maxsize: float, size limit in bytes.
+	self._index: dict, {key:{'size':bytes,'atime':epoch seconds}}.
+	self.hits/.misses: int, number of cache hits/misses since creation of the instance.
+	'''
+	def __init__(self,path,maxsize=5e8):
+		self._path=path
+		self._maxsize=maxsize
+		self.hits=0
+		self.misses=0
+		os.makedirs(path,exist_ok=True)
+		self._index=dict()
+		if os.path.isfile(self._indexpath):
+			with open(self._indexpath) as fo:
+				self._index=json.load(fo)
+		# drop records whose entry file is gone
+		self._index={k:v for k,v in self._index.items() if os.path.isfile(self._entrypath(k))}
+#=======================================================================
+	@property
+	def _indexpath(self):
+		'''
+		index file path.
+		'''
+		return os.path.join(self._path,'index.json')
+#-----------------------------------------------------------------------
+	def _entrypath(self,key):
+		'''
+		entry file path.
+		'''
+		return os.path.join(self._path,key+'.npz')
+#-----------------------------------------------------------------------
+	def _save_index(self):
+		'''
+		Write self._index to file, atomically.
+		'''
+		tmp=self._indexpath+'.tmp'
+		with open(tmp,'w') as fo:
+			json.dump(self._index,fo)
+		os.replace(tmp,self._indexpath)
+#=======================================================================
+	@staticmethod
+	def key(*items):
+		'''
+		Build a cache key from fitting inputs.
+		Syntax:
+		-------
+		key=self.key(*items)
+		Parameters:
+		-----------
+		items: anything token() can represent, e.g. fileDigest(path),funcs,folds,p0,frange,bounds.
+		Returns:
+		--------
+		key: str, sha1 hex digest of the items.
+		'''
+		return hashlib.sha1(token(items).encode()).hexdigest()
+#-----------------------------------------------------------------------
+	def get(self,key):
+		'''
+		Load cached arrays.
+		Syntax:
+		-------
+		entry=self.get(key)
+		Parameters:
+		-----------
+		key: str, from self.key().
+		Returns:
+		--------
+		entry: dict of np.array, None if key is not cached.
+		'''
+		if key not in self._index:
+			self.misses+=1
+			return None
+		with np.load(self._entrypath(key)) as npz:
+			entry={name:npz[name] for name in npz.files}
+		self._index[key]['atime']=time.time()
+		self._save_index()
+		self.hits+=1
+		return entry
+#-----------------------------------------------------------------------
+	def put(self,key,**arrays):
+		'''
+		Save arrays under key, then evict least recently used entries if the cache is over its size limit.
+		Syntax:
+		-------
+		self.put(key,**arrays)
+		Parameters:
+		-----------
+		key: str, from self.key().
+		arrays: np.array, e.g. popt=popt,pcov=pcov,res=res.
+		Returns:
+		--------
+		None.
+		'''
+		path=self._entrypath(key)
+		tmp=path+'.tmp.npz'
+		np.savez(tmp,**arrays)
+		os.replace(tmp,path)
+		self._index[key]={'size':os.path.getsize(path),'atime':time.time()}
+		self._evict()
+		self._save_index()
+		return None
+#-----------------------------------------------------------------------
+	def _evict(self):
+		'''
+		Remove least recently used entries until the total size is within self._maxsize.
+		'''
+		total=sum(v['size'] for v in self._index.values())
+		for key in sorted(self._index,key=lambda k:self._index[k]['atime']):
+			if total<=self._maxsize:
+				break
+			total-=self._index[key]['size']
+			os.remove(self._entrypath(key))
+			del self._index[key]
+#-----------------------------------------------------------------------
+	def clear(self):
+		'''
+		Remove all entries.
+		'''
+		for key in list(self._index):
+			os.remove(self._entrypath(key))
+		self._index=dict()
+		self._save_index()
+		return None
+#=======================================================================
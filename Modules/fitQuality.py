@@ -0,0 +1,151 @@
+'''
+fitQuality.py: Ver 1.0.
+Quality gate for consecutive fits. Each fit is checked for a finite covariance, a residual consistent with the noise, and parameters that do not jump away from the previous accepted fits; fits that fail are flagged so that a batch can keep its chain on the last good fit and refit them later.
+'''
+import numpy as np
+from collections import deque
+
+#=======================================================================
+def noiseLevel(res):
+	'''
+	Robust estimate of the white noise standard deviation in a residual, insensitive to smooth misfit.
+	Syntax:
+	-------
+	sigma=noiseLevel(res)
+	Parameters:
+	-----------
+	res: np.array, residual ordered by frequency (or time); complex residuals use both parts.
+	Returns:
+	--------
+	sigma: float, 1.4826*median absolute deviation of the point-to-point differences of res divided by sqrt(2); NaN if res has fewer than 3 points.
+	Note:
+	-----
+	Correlated noise, e.g. from zero filling, is underestimated; qualityGate therefore also compares with the previous accepted fits.
+	'''
+	res=np.asarray(res)
+	if np.iscomplexobj(res):
+		res=np.concatenate((res.real,res.imag))
+	if res.size<3:
+		return np.nan
+	d=np.diff(res)
+	return 1.4826*np.median(np.abs(d-np.median(d)))/np.sqrt(2)
+#=======================================================================
+class qualityGate(object):
+	'''
+	Check each fit of a sequence and keep the history of accepted fits.
+	Syntax:
+	-------
+	gate=qualityGate([rmsmax=3.,jumpmax=8.,k=5,minhist=3,idx=None])
+	ok,flags,metrics=gate.check(res,p,perr[,jump=True])
+	Parameters:
+	-----------
+	rmsmax: float, a fit is flagged if rms(res)/noiseLevel(res) exceeds rmsmax times the median of this ratio over the accepted fits (times 1 before any fit is accepted).
+	jumpmax: float, a fit is flagged if any parameter moves from the last accepted fit by more than jumpmax times its typical step, check check.
+	k: int, number of accepted fits kept in the history.
+	minhist: int, number of accepted fits required before parameter jumps are checked.
+	idx: list of int, indices of the parameters checked for jumps and covariance; None checks all.
+	Returns:
+	--------
+	gate: qualityGate instance, with methods check/accept/reset.
+	'''
+	def __init__(self,rmsmax=3.,jumpmax=8.,k=5,minhist=3,idx=None):
+		self.rmsmax=rmsmax
+		self.jumpmax=jumpmax
+		self.k=int(k)
+		self.minhist=max(int(minhist),2)
+		self.idx=idx
+		self.reset()
+#-----------------------------------------------------------------------
+	def reset(self):
+		'''
+		Forget all accepted fits.
+		'''
+		self._hist=deque(maxlen=self.k)
+		self._herr=None # perr of the last accepted fit
+		self._ratio=deque(maxlen=self.k)
+#-----------------------------------------------------------------------
+	def check(self,res,p,perr,jump=True):
+		'''
+		Check one fit.
+		Syntax:
+		-------
+		ok,flags,metrics=gate.check(res,p,perr[,jump=True])
+		Parameters:
+		-----------
+		res: np.array, residual of the fit.
+		p,perr: fitted parameters and their standard deviations, in the same normalization as the history passed to accept.
+		jump: bool, if False, parameter jumps are not checked, e.g. for a refit after the rest of the sequence is done.
+		Returns:
+		--------
+		ok: bool, True if no check failed.
+		flags: list of str, names of the failed checks: 'pcov' (non-finite or negative variance), 'rms' (residual too large), 'jump' (parameter jump).
+		metrics: dict, 'ratio' rms(res)/noiseLevel(res), 'ratio_ref' the reference it was compared with, 'jump' the largest parameter jump in units of the typical step (NaN if not checked).
+		Note:
+		-----
+		The typical step of a parameter is the root sum square of the median absolute step between consecutive accepted fits and of the standard deviations of the last accepted fit and of this fit.
+		'''
+		p=np.asarray(p,dtype=float)
+		perr=np.asarray(perr,dtype=float)
+		idx=np.arange(p.size) if self.idx is None else np.asarray(self.idx)
+		flags=[]
+		if not np.all(np.isfinite(p[idx])) or not np.all(np.isfinite(perr[idx])) or np.any(perr[idx]<0):
+			flags.append('pcov')
+
+		res=np.asarray(res)
+		sigma=noiseLevel(res)
+		rms=np.sqrt(np.mean(np.abs(res)**2)) if res.size else np.nan
+		ratio=rms/sigma if sigma>0 else (1. if rms==0 else np.inf)
+		ref=max(np.median(self._ratio),1.) if self._ratio else 1.
+		if not ratio<=self.rmsmax*ref: # also catches NaN
+			flags.append('rms')
+
+		jmax=np.nan
+		if jump and len(self._hist)>=self.minhist and 'pcov' not in flags:
+			hist=np.array(self._hist)[:,idx]
+			step=np.median(np.abs(np.diff(hist,axis=0)),axis=0)
+			scale=np.sqrt(step**2+self._herr[idx]**2+perr[idx]**2)
+			scale[scale==0]=np.finfo(float).tiny
+			jmax=float(np.max(np.abs(p[idx]-hist[-1])/scale))
+			if jmax>self.jumpmax:
+				flags.append('jump')
+		return not flags,flags,{'ratio':ratio,'ratio_ref':ref,'jump':jmax}
+#-----------------------------------------------------------------------
+	def accept(self,p,perr,ratio=None):
+		'''
+		Add a good fit to the history.
+		Syntax:
+		-------
+		gate.accept(p,perr[,ratio=None])
+		Parameters:
+		-----------
+		p,perr: fitted parameters and their standard deviations.
+		ratio: float, metrics['ratio'] from check; not recorded if None or not finite.
+		'''
+		self._hist.append(np.array(p,dtype=float))
+		self._herr=np.where(np.isfinite(perr),np.asarray(perr,dtype=float),0.)
+		if ratio is not None and np.isfinite(ratio):
+			self._ratio.append(ratio)
+#=======================================================================
+def makeGate(gate):
+	'''
+	Create a quality gate from a batch input.
+	Syntax:
+	-------
+	gate=makeGate(gate)
+	Parameters:
+	-----------
+	gate: None, True, dict of qualityGate inputs, or qualityGate instance.
+	Returns:
+	--------
+	gate: None if the input is None or False, otherwise a qualityGate instance; True gives the default qualityGate().
+	'''
+	if gate is None or gate is False:
+		return None
+	if gate is True:
+		return qualityGate()
+	if isinstance(gate,dict):
+		return qualityGate(**gate)
+	if isinstance(gate,qualityGate):
+		return gate
+	raise ValueError('gate must be None, True, a dict of qualityGate inputs or a qualityGate instance')
+#=======================================================================
@@ -8,11 +8,14 @@ import re
 import os
 import time
 import ntpath
-import matplotlib.pyplot as plt
 
 import readLog
 import Functions as func
 import Utility as utl
+plt=utl.lazyModule('matplotlib.pyplot') # imported on first use
+import fitCache as fcache
+import warmStart
+import fitQuality
 
 import sweep
 import FreqSweep
@@ -260,29 +263,224 @@ def logMean(logname,frange,colname,droplabels=None,dropAxis=1,drop_track=True,me
 #-----------------------------------------------------------------------
 	return df_Mean,df_Std
 #=======================================================================
-def lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header,header_metadata=None,mainChannel='',fold=dict(),logname=None,correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pMctCalib=None,mctBranch='low',Pn=34.3934,savename=None):
+def checkpointSave(checkpoint,result,ind,po,queue=None,history=None):
+	'''
+	Save the first ind rows of a batch result and the warm-start parameters of the next fit, so that the batch can be resumed by checkpointLoad.
+	Syntax:
+	-------
+	checkpointSave(checkpoint,result,ind,po[,queue=None,history=None])
+	Parameters:
+	-----------
+	checkpoint: str, path of the checkpoint table; the parameters are saved alongside it as checkpoint+'.npz'.
+	result: pandas.DataFrame, batch result, only rows with index<ind are saved.
+	ind: int, number of completed rows.
+	po: parameters to start the next fit with.
+	queue: list of (row,filename,parameters) of the fits waiting for the refit pass, the starting parameters of each are saved by row.
+	history: list of (x,p,perr,ratio) of the fits passed on, in order: x,p,perr as passed to the warm-start predictor's update, and ratio as passed to the quality gate's accept (nan without gate), so that both can be rebuilt on resume.
+	Note:
+	-----
+	Both files are written to a temporary file first and then renamed, so an interruption during saving leaves the previous checkpoint intact.
+	'''
+	tmp=checkpoint+'.tmp'
+	result.iloc[:ind].to_csv(tmp,sep='\t',na_rep=np.nan,index=False,float_format='%.12e')
+	os.replace(tmp,checkpoint)
+	with open(tmp,'wb') as fh:
+		rows=[q[0] for q in queue] if queue else []
+		qpo=np.array([q[2] for q in queue],dtype=float) if queue else np.zeros((0,np.size(po)))
+		hist=history if history else []
+		hx=np.array([h[0] for h in hist],dtype=float)
+		hp=np.array([h[1] for h in hist],dtype=float).reshape(len(hist),np.size(po))
+		he=np.array([h[2] for h in hist],dtype=float).reshape(len(hist),np.size(po))
+		hr=np.array([h[3] for h in hist],dtype=float)
+		np.savez(fh,po=np.asarray(po,dtype=float),ind=ind,queue_row=np.array(rows,dtype=int),queue_po=qpo,hist_x=hx,hist_p=hp,hist_perr=he,hist_ratio=hr)
+	os.replace(tmp,checkpoint+'.npz')
+	return
+#=======================================================================
+def checkpointLoad(checkpoint,result):
+	'''
+	Load a checkpoint written by checkpointSave into an empty batch result.
+	Syntax:
+	-------
+	ind,po,done,queued,history=checkpointLoad(checkpoint,result)
+	Parameters:
+	-----------
+	checkpoint: str, path of the checkpoint table.
+	result: pandas.DataFrame, empty batch result, completed rows are filled in place.
+	Returns:
+	--------
+	ind: int, number of completed rows, 0 if no checkpoint exists.
+	po: parameters to start the next fit with, None if no checkpoint exists.
+	done: set of str, filenames already fitted.
+	queued: dict, starting parameters of the fits waiting for the refit pass, keyed by row.
+	history: list of (x,p,perr,ratio) saved by checkpointSave, to be replayed into the warm-start predictor and the quality gate.
+	Note:
+	-----
+	Empty 'flags' are read back as '', not nan.
+	'''
+	if not (os.path.isfile(checkpoint) and os.path.isfile(checkpoint+'.npz')):
+		return 0,None,set(),{},[]
+	with np.load(checkpoint+'.npz') as side:
+		po=side['po']
+		ind=int(side['ind'])
+		queued=dict(zip(side['queue_row'].tolist(),side['queue_po'])) if 'queue_row' in side.files else {}
+		if 'hist_x' in side.files:
+			hr=side['hist_ratio'] if 'hist_ratio' in side.files else np.full(side['hist_x'].size,np.nan)
+			history=list(zip(side['hist_x'],side['hist_p'],side['hist_perr'],hr))
+		else:
+			history=[]
+	if ind==0:
+		return 0,None,set(),{},[]
+	saved=pd.read_csv(checkpoint,sep='\t').iloc[:ind]
+	if 'flags' in saved.columns: # '' is written as an empty field
+		saved['flags']=saved['flags'].fillna('').astype(str)
+	for cn in result.columns:
+		result.loc[:ind-1,cn]=saved[cn].values
+	return ind,po,set(saved['Filename']),queued,history
+#=======================================================================
+telemetryColumns=['nfev','ncall','njev','fit_time_s','model_time_s','status','success','cost']
+#=======================================================================
+def telemetryRow(info=None):
+	'''
+	Telemetry columns of one batch fit.
+	Syntax:
+	-------
+	row=telemetryRow([info=None])
+	Parameters:
+	-----------
+	info: dict, fitinfo of the data object after the fit, check Functions.lrtz_1simfit; None for a fit loaded from cache.
+	Returns:
+	--------
+	row: list, values for telemetryColumns; a cached fit has no evaluations, zero time, NaN status and cost, and counts as successful.
+	'''
+	if info is None:
+		return [0,0,0,0.,0.,np.nan,True,np.nan]
+	return [info[cn] for cn in telemetryColumns]
+#=======================================================================
+def telemetrySummary(result,slowest=3,verbose=True):
+	'''
+	Aggregate the telemetry columns of a batch result.
+	Syntax:
+	-------
+	summary=telemetrySummary(result[,slowest=3,verbose=True])
+	Parameters:
+	-----------
+	result: pandas.DataFrame, output of lrtz_1simfit_batch or nmr_1simfit_batch with telemetry=True.
+	slowest: int, number of slowest fits listed.
+	verbose: bool, if True, the summary is printed.
+	Returns:
+	--------
+	summary: dict, 'nfits','ncached','nfailed' numbers of fits, fits loaded from cache and fits that did not converge; 'nfev','ncall','fit_time_s','model_time_s' totals; 'mean_time_s','max_time_s' per fit not loaded from cache (nan if all are); 'cost_median'; 'failed' and 'slowest' lists of (Filename,fit_time_s) of the failed and the slowest fits not loaded from cache.
+	'''
+	done=result.dropna(subset=['fit_time_s'])
+	t=done['fit_time_s'].astype(float)
+	cached=done['status'].isna()
+	failed=~done['success'].astype(bool)
+	name=done['Filename'] if 'Filename' in done.columns else pd.Series(done.index,index=done.index)
+	tfit=t[~cached] # cached fits take no time
+	order=tfit.sort_values(ascending=False,kind='stable').index[:slowest]
+	summary={'nfits':len(done),'ncached':int(cached.sum()),'nfailed':int(failed.sum()),
+		'nfev':int(done['nfev'].astype(float).sum()),'ncall':int(done['ncall'].astype(float).sum()),
+		'fit_time_s':float(t.sum()),'model_time_s':float(done['model_time_s'].astype(float).sum()),
+		'mean_time_s':float(tfit.mean()) if len(tfit) else np.nan,'max_time_s':float(tfit.max()) if len(tfit) else np.nan,
+		'cost_median':float(done['cost'].astype(float).median()),
+		'failed':list(zip(name[failed],t[failed])),'slowest':list(zip(name[order],t[order]))}
+	if verbose:
+		fmt=lambda v:'n/a' if np.isnan(v) else '%.3fs'%v
+		print('\n%d fits (%d cached, %d not converged): nfev=%d, ncall=%d, fit time %.3fs (model %.3fs), mean %s, max %s'%(summary['nfits'],summary['ncached'],summary['nfailed'],summary['nfev'],summary['ncall'],summary['fit_time_s'],summary['model_time_s'],fmt(summary['mean_time_s']),fmt(summary['max_time_s'])))
+		print('slowest: '+(', '.join('%s %.3fs'%st for st in summary['slowest']) if summary['slowest'] else 'n/a'))
+		if summary['nfailed']:
+			print('not converged: '+', '.join(str(fn) for fn,_ in summary['failed']))
+	return summary
+#=======================================================================
+qualityColumns=['quality','flags']
+#=======================================================================
+def fitFailure(nparam,t0):
+	'''
+	Placeholder result of a batch fit that raised, used when a quality gate lets the batch continue.
+	Syntax:
+	-------
+	popt,perr,res,info=fitFailure(nparam,t0)
+	Parameters:
+	-----------
+	nparam: int, number of fitted parameters.
+	t0: float, time.perf_counter() at the start of the fit.
+	Returns:
+	--------
+	popt,perr: np.array of NaN.
+	res: empty np.array.
+	info: dict, telemetry of the failed fit, status 0 and success False.
+	'''
+	info={'nfev':0,'ncall':0,'njev':0,'fit_time_s':time.perf_counter()-t0,'model_time_s':0.,'status':0,'success':False,'cost':np.nan}
+	return np.full(nparam,np.nan),np.full(nparam,np.nan),np.array([]),info
+#=======================================================================
+def fillRow(result,ind,header,popt,perr,info=None,quality=None,flags=()):
+	'''
+	Assign the fitted parameters, and the telemetry and quality columns if result has them, to one row of a batch result. Metadata columns are left to the caller.
+	Syntax:
+	-------
+	fillRow(result,ind,header,popt,perr[,info=None,quality=None,flags=()])
+	Parameters:
+	-----------
+	result: pandas.DataFrame, batch result.
+	ind: int, row index.
+	header: list of str, names of the fitted parameters; their standard deviations are in header+'perr'.
+	popt,perr: fitted parameters and their standard deviations.
+	info: dict, fitinfo of the fit, check telemetryRow.
+	quality: str, value of the 'quality' column: 'ok', 'queued' (waiting for the refit pass), 'refit' (passed after refit) or 'flagged' (failed again).
+	flags: list of str, failed checks, check fitQuality.qualityGate.check; 'fit' if the fit raised.
+	'''
+	result.loc[ind,list(header)+[elem+'perr' for elem in header]]=np.append(popt,perr)
+	for cn,val in zip(telemetryColumns,telemetryRow(info)):
+		if cn in result.columns:
+			result.loc[ind,cn]=val
+	if 'quality' in result.columns:
+		result.loc[ind,'quality']=quality
+		result.loc[ind,'flags']=','.join(flags)
+	return
+#=======================================================================
+def lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header,header_metadata=None,mainChannel='',fold=dict(),logname=None,correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,pMctCalib=None,mctBranch='low',Pn=34.3934,cache=None,checkpoint=None,checkpoint_every=10,resume=False,predictor=None,predictor_x='_epoch',report_nfev=False,telemetry=False,summary=False,gate=None,refit=None,savename=None):
 	'''
 	2020-01-20 14:49
 	Fit FreqSweep type data with lrtz_1simfit method consecutively. Parse fitting result of each fit to the next fit.
 	Syntax:
 	-------
-	result=lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header[,header_metadata=None,ftimes=1,xtimes=1,ytimes=1,rtimes=1,correctFunc=utl.gainCorrect,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pMctCalib=None,mctBranch='low',Pn=34.3934,logname=None,savename=None])
+	result=lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header[,header_metadata=None,ftimes=1,xtimes=1,ytimes=1,rtimes=1,correctFunc=utl.gainCorrect,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,pMctCalib=None,mctBranch='low',Pn=34.3934,cache=None,checkpoint=None,checkpoint_every=10,resume=False,predictor=None,predictor_x='_epoch',report_nfev=False,telemetry=False,summary=False,gate=None,refit=None,logname=None,savename=None])
 	Parameters:
 	-----------
 	device: Device code, e.g. 'h1m','TF1201'.
 	filenums: File numbers to be fitted, (filelow,filehigh),fitting is done from filelow to filehigh, both filelow and filehigh can be either a list or a single item.
-	fitmode,funcs1,funcs2,sharenum,folds1,folds2,frange,bounds: lrtz_1simfit fitting inputs.
+	fitmode,funcs1,funcs2,sharenum,folds1,folds2,frange,bounds,varpro: lrtz_1simfit fitting inputs.
+	solver: str, lrtz_1simfit solver backend; None uses Functions.defaultSolver of this model, check solverBenchmark.
+	multires: lrtz_1simfit coarse-to-fine fitting input.
+	complexmode: lrtz_1simfit complex-response model input.
+	multistart: dict, lrtz_1simfit multi-start global search options, only used for the first file fitted, whose starting parameters p0 are the least reliable.
+	window,anchors,wincenter: lrtz_1simfit fitting window inputs, the window follows the parameters of each fit through the batch; the fraction of points kept is printed at the end.
 	p0: Initial fitting parameters for the first file.
 	header: list of str, headers corresponding to p0.
 	header_metadata: list of str, metadata of fitted files read from log.
 	mainChannel,fold,correctFunc,logname: File load parameters; logname is a str representing the full path of the log file.
 	pMctCalib/mctBranch/Pn: parameters to update Tmct from MCT calibration and new Pn in the designated branch of melting curve. mctBranch='low' or 'high'.
+	cache: fitCache.fitCache or str of its folder, if given, fits already done with the same file content, model, p0 and options are loaded from the cache instead of refitted, and new fits are saved to it.
+	checkpoint: str, if given, completed rows and the parameters to start the next fit with are saved to this file (and checkpoint+'.npz') every checkpoint_every files, and when the batch finishes or is interrupted.
+	checkpoint_every: int, number of fitted files between checkpoints.
+	resume: bool, if True and checkpoint exists, files already in it are skipped and the consecutive fit restarts from the saved parameters, predictor and gate history, queued files keep the starting parameters saved with them for the refit pass; otherwise the checkpoint is overwritten.
+	predictor: None, str or warmStart predictor instance, predicts the initial parameters of each fit from the previous fits, check warmStart.makePredictor; None starts each fit from the previous popt. 'linear', 'quadratic' or 'kalman' extrapolate the drift of the parameters along predictor_x.
+	predictor_x: str, position variable of the predictors created from names, 'index' or an attribute of the data such as '_epoch' or 'Tmct'.
+	report_nfev: bool, if True, a column 'nfev' with the number of model evaluations of each fit is appended to result (0 for fits loaded from cache), and the total is printed.
+	telemetry: bool, if True, the columns telemetryColumns (evaluation counts, timings, solver status and cost of each fit, check telemetryRow) are appended to result.
+	summary: bool, if True, telemetry columns are appended and telemetrySummary is printed when the batch finishes.
+	gate: None, True, dict of fitQuality.qualityGate inputs or qualityGate instance, check fitQuality.makeGate. If given, each fit is checked on its residual, its normalized parameters and perr; a fit that fails the gate or raises RuntimeError/ValueError is queued, and the chain continues from the last good fit. The queued files are refitted after the batch, and the columns qualityColumns are appended to result, check fillRow.
+	refit: dict, lrtz_1simfit inputs that override the batch ones in the refit pass; None gives dict(window=None,multistart={}), i.e. a multi-start search over the whole frange.
 	savename: str, result is written to this file.
 	Returns:
 	--------
 	result: pandas.DataFrame, fitted results, contains filename,NMR readings, excitation info as well.
 	'''
 	log=pd.read_csv(logname,delim_whitespace=True)
+	if isinstance(cache,str):
+		cache=fcache.fitCache(cache)
+	if solver is None:
+		solver=func.defaultSolver('lrtz_1simfit',func.modelKey(funcs1,funcs2))
 
 	n=max(np.asarray(filenums[0]).size,np.asarray(filenums[1]).size) #choose the longer one's dimension as n
 	lb,ub=utl.prepare_bounds(filenums,n)
@@ -303,43 +501,217 @@ def lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header,
 	index=np.linspace(0,length-1,length,dtype=int) #create index
 	headerperr=[elem+'perr' for elem in header] #standard deviation headers
 	Header=header_metadata+header+headerperr
+	if telemetry or summary:
+		Header=Header+telemetryColumns
+	elif report_nfev:
+		Header=Header+['nfev']
+	gate=fitQuality.makeGate(gate)
+	if gate is not None:
+		Header=Header+qualityColumns
 	result=pd.DataFrame(index=index,columns=Header) #empty dataframe
+	pred=warmStart.makePredictor(predictor,x=predictor_x)
 
 	ind=0
+	done=set()
+	queue=[] # (row,filename,normalized parameters of the last good fit) of the fits failing the gate
+	history=[] # (x,p,perr,ratio) passed to pred.update and gate.accept, saved with checkpoints
+	if checkpoint is not None and resume: # continue from saved rows and parameters
+		ind,po,done,queued,history=checkpointLoad(checkpoint,result)
+		for x,p,pe,r in history: # rebuild the warm-start predictor and the gate history
+			pred.update(x,p,perr=pe)
+			if gate is not None:
+				gate.accept(p,pe,r)
+		if gate is not None:
+			queue=[(i,result.loc[i,'Filename'],queued.get(i,po)) for i in range(ind) if result.loc[i,'quality']=='queued']
+	ind0=ind
+	npts=npts_full=0 # number of points fitted and within frange, summed over the fits done
 	print('Start-',end='') #progress indicator
+	try:
+		for i in range(0,n):
+			indexl=piece[piece['Filename']==filerange[0][i]].index.values[0]
+			indexu=piece[piece['Filename']==filerange[1][i]].index.values[0]
+			direction=int(np.sign(indexu-indexl+0.5)) # +0.5 so that 0->1
+			piecei=piece.loc[indexl:indexu:direction] # clip piece, order of rows depend on frange pairs, it can go backwards	
+			for filename in piecei['Filename']:
+				if filename in done: # fitted before the checkpoint
+					continue
+				path=dirname+'/'+filename
+				data=fswp(path,mainChannel=mainChannel,fold=fold,correctFunc=correctFunc,logname=logname,normByParam=normByParam)
+				if pMctCalib is not None: # update data.Tmct and its relevant
+					_=data.mctC2T(pMctCalib,branch=mctBranch,Pn=Pn)
+		
+				#scale po according to excitation, this will scale phase as well.
+				norm=getattr(data,normByParam.lower())
+				if ind==0:
+					pstart=p0
+					po=np.array(p0,dtype=float)/norm # normalized p0, the chain restarts from it if this fit fails the gate
+					po[1:4]*=norm
+				else:
+					x=pred.position(data,ind)
+					guess=pred.predict(x)
+					pstart=(po if guess is None else guess)*norm # otherwise continue from the previous good popt
+					pstart[1:4]/=norm # do not normalize d,f0,theta
+
+				# do fit, collect: optimized parameters, std dev, residual.
+				entry=None
+				failed=False
+				ms=multistart if ind==ind0 else None # global search only for the first file fitted
+				if cache is not None: # look up identical fit
+					key=cache.key(fcache.fileDigest(path),'lrtz_1simfit',fitmode,funcs1,folds1,funcs2,folds2,sharenum,pstart,frange,bounds,varpro,solver,window,anchors,wincenter,multires,complexmode,ms,mainChannel,fold,correctFunc,normByParam,norm)
+					entry=cache.get(key)
+				if entry is not None: # cache hit
+					popt,res=entry['popt'],entry['res']
+					perr=np.sqrt(np.diag(entry['pcov']))
+					info=None
+				else:
+					t0=time.perf_counter()
+					try:
+						popt,pcov,perr,res,_,_=data.lrtz_1simfit(fitmode,funcs1,funcs2,sharenum,pstart,folds1=folds1,folds2=folds2,frange=frange,bounds=bounds,varpro=varpro,solver=solver,window=window,anchors=anchors,wincenter=wincenter,multires=multires,complexmode=complexmode,multistart=ms) #fit
+						info=data.fitinfo
+						npts+=data.fitinfo['npoints']
+						npts_full+=data.fitinfo['npoints_full']
+						if cache is not None:
+							cache.put(key,popt=popt,pcov=pcov,res=res)
+					except (RuntimeError,ValueError):
+						if gate is None:
+							raise
+						popt,perr,res,info=fitFailure(len(pstart),t0)
+						failed=True
+				pn=popt/norm #normalized fitted parameters, this will normalize phase as well, thus only applicable when phase and background terms are close to zero.
+				pn[1:4]*=norm # do not normalize d,f0,theta
+				perro=perr/norm # perr normalized the same way
+				perro[1:4]*=norm
+
+				ok,flags,quality=True,[],None
+				if gate is not None: # a bad fit is queued for the refit pass and not passed on
+					if failed:
+						ok,flags=False,['fit']
+					else:
+						ok,flags,metrics=gate.check(res,pn,perro)
+					if ok:
+						gate.accept(pn,perro,metrics['ratio'])
+					else:
+						queue.append((ind,filename,po.copy()))
+					quality='ok' if ok else 'queued'
+				if ok:
+					po=pn # parse to next fit
+					x=pred.position(data,ind)
+					pred.update(x,po,perr=perro)
+					history.append((x,po,perro,metrics['ratio'] if gate is not None else np.nan))
+
+				fillRow(result,ind,header,popt,perr,info,quality,flags) #assign fitted values
+				result.loc[ind]['Filename']=filename
+				result.loc[ind]['Epoch']=data._epoch
+				for name in header_metadata:
+					if name not in ['Filename','Epoch']:
+						result.loc[ind][name]=getattr(data,name.lower())
+				ind+=1
+				print('-%s_%.2f%%-'%(re.sub(r'[^0-9]','',filename)[1::],(ind/length*100)),end='') #update batch progress
+				if checkpoint is not None and (ind-ind0)%checkpoint_every==0:
+					checkpointSave(checkpoint,result,ind,po,queue,history)
+	finally: # also save progress when the batch crashes or is interrupted
+		if checkpoint is not None and ind>ind0:
+			checkpointSave(checkpoint,result,ind,po,queue,history)
+
+	if queue: # refit pass, each flagged file starts from the last good fit before it
+		print('-Refit',end='')
+		opts=dict(frange=frange,bounds=bounds,varpro=varpro,solver=solver,window=window,anchors=anchors,wincenter=wincenter,multires=multires,complexmode=complexmode)
+		opts.update(dict(window=None,multistart={}) if refit is None else refit)
+		for qind,filename,pq in queue:
+			path=dirname+'/'+filename
+			data=fswp(path,mainChannel=mainChannel,fold=fold,correctFunc=correctFunc,logname=logname,normByParam=normByParam)
+			if pMctCalib is not None:
+				_=data.mctC2T(pMctCalib,branch=mctBranch,Pn=Pn)
+			norm=getattr(data,normByParam.lower())
+			pstart=pq*norm
+			pstart[1:4]/=norm
+			t0=time.perf_counter()
+			try:
+				popt,pcov,perr,res,_,_=data.lrtz_1simfit(fitmode,funcs1,funcs2,sharenum,pstart,folds1=folds1,folds2=folds2,**opts)
+				info=data.fitinfo
+				ok,flags,_=gate.check(res,popt,perr,jump=False) # jumps are not checked, the chain has moved on
+			except (RuntimeError,ValueError):
+				popt,perr,res,info=fitFailure(len(pstart),t0)
+				ok,flags=False,['fit']
+			fillRow(result,qind,header,popt,perr,info,'refit' if ok else 'flagged',flags)
+			print('-%s_%s-'%(re.sub(r'[^0-9]','',filename)[1::],'ok' if ok else 'flagged'),end='')
+		if checkpoint is not None:
+			checkpointSave(checkpoint,result,ind,po,queue,history)
+	print('-Finished',end='')
+	if report_nfev and 'nfev' in result.columns:
+		print(' nfev=%d'%result['nfev'].sum(),end='')
+	if window is not None and npts_full>0:
+		print(' window kept %d of %d points (%.1f%%)'%(npts,npts_full,npts/npts_full*100),end='')
+	if summary:
+		_=telemetrySummary(result.iloc[:ind])
+	
+	if savename is not None: #save to specified file
+		if os.path.isfile(savename): #file already exists
+			result.to_csv(savename,sep='\t',mode='a',na_rep=np.nan,index=False,header=False,float_format='%.12e'.format)#append w/o header
+		else: #file doesn't exist
+			result.to_csv(savename,sep='\t',na_rep=np.nan,index=False,float_format='%.12e'.format) #create new file and save
+	return result
+#=======================================================================
+def lrtz_globalfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,shared,header,header_metadata=None,mainChannel='',fold=dict(),logname=None,correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),complexmode=False,max_nfev=None,pMctCalib=None,mctBranch='low',Pn=34.3934,savename=None):
+	'''
+	Fit FreqSweep type data with Functions.lrtz_globalfit, all files in one joint fit in which the parameters listed in shared (e.g. background coefficients or phase) are common to all files and the others are fitted per file.
+	Syntax:
+	-------
+	result=lrtz_globalfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,shared,header[,header_metadata=None,mainChannel='',fold=dict(),logname=None,correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),complexmode=False,max_nfev=None,pMctCalib=None,mctBranch='low',Pn=34.3934,savename=None])
+	Parameters:
+	-----------
+	device,filenums,header,header_metadata,mainChannel,fold,logname,correctFunc,normByParam,pMctCalib,mctBranch,Pn,savename: check lrtz_1simfit_batch.
+	fitmode,funcs1,funcs2,sharenum,folds1,folds2,frange,bounds,complexmode: lrtz_1simfit fitting inputs.
+	p0: initial fitting parameters, 1d for all files or 2d with one row per file in fitting order.
+	shared: list of int, indices of the parameters in p0 shared by all files.
+	max_nfev: int, maximum number of residual evaluations of the joint fit.
+	Returns:
+	--------
+	result: pandas.DataFrame, fitted results, one row per file; shared parameters and their perr are the same in all rows.
+	'''
+	log=pd.read_csv(logname,delim_whitespace=True)
+	if folds1 is None:
+		folds1=np.ones(len(funcs1))
+	if folds2 is None:
+		folds2=np.ones(len(funcs2))
+
+	n=max(np.asarray(filenums[0]).size,np.asarray(filenums[1]).size) #choose the longer one's dimension as n
+	lb,ub=utl.prepare_bounds(filenums,n)
+	filenums=(lb,ub)
+
+	dirname=ntpath.dirname(device)
+	basename=ntpath.basename(device)
+	vmkfn=np.vectorize(utl.mkFilename)#create filenames
+	filerange=(vmkfn(basename,filenums[0]),vmkfn(basename,filenums[1]))
+	_,OrCond=utl.build_condition_dataframe(filerange,log,'Filename') #take union all ranges
+	piece=log[OrCond] #these files will be fitted
+
+	print('Load-',end='') #progress indicator
+	datas=[]
 	for i in range(0,n):
 		indexl=piece[piece['Filename']==filerange[0][i]].index.values[0]
 		indexu=piece[piece['Filename']==filerange[1][i]].index.values[0]
 		direction=int(np.sign(indexu-indexl+0.5)) # +0.5 so that 0->1
-		piecei=piece.loc[indexl:indexu:direction] # clip piece, order of rows depend on frange pairs, it can go backwards	
-		for filename in piecei['Filename']:
+		for filename in piece.loc[indexl:indexu:direction]['Filename']:
 			data=fswp(dirname+'/'+filename,mainChannel=mainChannel,fold=fold,correctFunc=correctFunc,logname=logname,normByParam=normByParam)
 			if pMctCalib is not None: # update data.Tmct and its relevant
 				_=data.mctC2T(pMctCalib,branch=mctBranch,Pn=Pn)
-		
-			#scale po according to excitation, this will scale phase as well.
-			if ind==0:
-				po=p0
-			else:
-				po=po*getattr(data,normByParam.lower())
-				po[1:4]/=getattr(data,normByParam.lower()) # do not normalize d,f0,theta
-
-			# do fit, collect: optimized parameters, std dev, residual.
-			popt,_,perr,res,_,_=data.lrtz_1simfit(fitmode,funcs1,funcs2,sharenum,po,folds1=folds1,folds2=folds2,frange=frange,bounds=bounds) #fit
-			po=popt/getattr(data,normByParam.lower()) #parse normalized fitted parameters to next fit, this will normalize phase as well, thus only applicable when phase and background terms are close to zero.
-			po[1:4]*=getattr(data,normByParam.lower()) # do not normalize d,f0,theta
-
-			condition=[(cn not in header_metadata) for cn in result.columns]
-			result.loc[ind][condition]=np.append(popt,perr) #assign fitted values
-			result.loc[ind]['Filename']=filename
-			result.loc[ind]['Epoch']=data._epoch
-			for name in header_metadata:
-				if name not in ['Filename','Epoch']:
-					result.loc[ind][name]=getattr(data,name.lower())
-			ind+=1
-			print('-%s_%.2f%%-'%(re.sub(r'[^0-9]','',filename)[1::],(ind/length*100)),end='') #update batch progress
-	print('-Finished',end='')
-	
+			datas.append(data)
+	print('%d files-Fit-'%len(datas),end='')
+	popt,perr,info=func.lrtz_globalfit(datas,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,shared,frange=frange,bounds=bounds,complexmode=complexmode,max_nfev=max_nfev)
+	print('-Finished nfev=%d %.1fs %s'%(info['nfev'],info['fit_time_s'],info['message']),end='')
+
+	headerperr=[elem+'perr' for elem in header] #standard deviation headers
+	result=pd.DataFrame(np.hstack((popt,perr)),columns=header+headerperr)
+	for name in (header_metadata or [])[::-1]:
+		if name=='Filename':
+			col=[data._filename for data in datas]
+		elif name=='Epoch':
+			col=[data._epoch for data in datas]
+		else:
+			col=[getattr(data,name.lower()) for data in datas]
+		result.insert(0,name,col)
+
 	if savename is not None: #save to specified file
 		if os.path.isfile(savename): #file already exists
 			result.to_csv(savename,sep='\t',mode='a',na_rep=np.nan,index=False,header=False,float_format='%.12e'.format)#append w/o header
@@ -347,12 +719,32 @@ def lrtz_1simfit_batch(device,filenums,fitmode,funcs1,funcs2,sharenum,p0,header,
 			result.to_csv(savename,sep='\t',na_rep=np.nan,index=False,float_format='%.12e'.format) #create new file and save
 	return result
 #=======================================================================
-def nmr_1simfit_batch(device,filenums,p0,dt=2e-7,zerofillnum=0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),logpath=None,header_metadata=['Filename','_epoch','_zerofillnum','Cmct_pF'],dtLabel='dt_s',savename=None):
+def nmrResidual(data,popt,frange=(-np.inf,np.inf)):
+	'''
+	Residual of an nmr_1simfit fit over the zero-filled spectrum within frange, used by the quality gate of nmr_1simfit_batch.
+	Syntax:
+	-------
+	res=nmrResidual(data,popt[,frange=(-np.inf,np.inf)])
+	Parameters:
+	-----------
+	data: nmr.nmr object.
+	popt: fitted parameters.
+	frange: (lb,ub), frequency range of the fit.
+	Returns:
+	--------
+	res: complex np.array, fitted minus measured spectrum at the bins within frange.
+	'''
+	_,OrCond=utl.build_condition(frange,data._f0fill)
+	bins=np.flatnonzero(OrCond)
+	fit=func.nmrModel(data._zerofillnum,bins)(data._f,*popt)
+	return fit[:bins.size]+1j*fit[bins.size:]-data._fftnmr0fill[bins]
+#=======================================================================
+def nmr_1simfit_batch(device,filenums,p0,dt=2e-7,zerofillnum=0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),solver=None,multires=None,multistart=None,logpath=None,header_metadata=['Filename','_epoch','_zerofillnum','Cmct_pF'],dtLabel='dt_s',cache=None,checkpoint=None,checkpoint_every=10,resume=False,predictor=None,predictor_x='_epoch',report_nfev=False,telemetry=False,summary=False,gate=None,refit=None,savename=None):
 	'''
 	Do nmr_1simfit consecutively. Each fit's optimized parameters, popt, will be transferred to the next file as an input to start fitting with.
 	Syntax:
 	-------
-	result=nmr_1simfit_batch(device,filenums,p0[,dt=2e-7,zerofillnum=0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),logpath=None,dtLabel='dt_s',savename=None)
+	result=nmr_1simfit_batch(device,filenums,p0[,dt=2e-7,zerofillnum=0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),solver=None,multires=None,multistart=None,logpath=None,dtLabel='dt_s',cache=None,checkpoint=None,checkpoint_every=10,resume=False,predictor=None,predictor_x='_epoch',report_nfev=False,telemetry=False,summary=False,gate=None,refit=None,savename=None)
 	Parameters:
 	-----------
 	device: device code.
@@ -362,15 +754,33 @@ def nmr_1simfit_batch(device,filenums,p0,dt=2e-7,zerofillnum=0,frange=(-np.inf,n
 	zerofillnum: Number of zerofilling points for FID signal.
 	frange: (lb,ub); Frequency range lower/upper bounds for FFT FID within which smoothing is done.
 	bounds: scipy.optimize.curve_fit parameter boundaries input.
+	solver: str; solver backend, check Functions.nmr_1simfit; None uses Functions.defaultSolver('nmr_1simfit').
+	multires: list of int; decimation factors of coarse-to-fine fitting, check Functions.nmr_1simfit.
+	multistart: dict; multi-start global search options, check Functions.nmr_1simfit; only used for the first file fitted, whose starting parameters p0 are the least reliable.
 	logpath: str; NMR log file path.
 	header_metadata: list of str, metadata of fitted files read from log.
 	dtLabel: str; the attribute that should contain the time step info.
+	cache: fitCache.fitCache or str of its folder, if given, fits already done with the same file content, number of peaks, p0 and options are loaded from the cache instead of refitted, and new fits are saved to it.
+	checkpoint: str, if given, completed rows and the parameters to start the next fit with are saved to this file (and checkpoint+'.npz') every checkpoint_every files, and when the batch finishes or is interrupted.
+	checkpoint_every: int, number of fitted files between checkpoints.
+	resume: bool, if True and checkpoint exists, files already in it are skipped and the consecutive fit restarts from the saved parameters, predictor and gate history, queued files keep the starting parameters saved with them for the refit pass; otherwise the checkpoint is overwritten.
+	predictor: None, str or warmStart predictor instance, predicts the initial parameters of each fit from the previous fits, check warmStart.makePredictor; None starts each fit from the previous popt. 'linear', 'quadratic' or 'kalman' extrapolate the drift of the parameters along predictor_x.
+	predictor_x: str, position variable of the predictors created from names, 'index' or an attribute of the data such as '_epoch' or 'Tmct'.
+	report_nfev: bool, if True, a column 'nfev' with the number of model evaluations of each fit is appended to result (0 for fits loaded from cache), and the total is printed.
+	telemetry: bool, if True, the columns telemetryColumns (evaluation counts, timings, solver status and cost of each fit, check telemetryRow) are appended to result.
+	summary: bool, if True, telemetry columns are appended and telemetrySummary is printed when the batch finishes.
+	gate: None, True, dict of fitQuality.qualityGate inputs or qualityGate instance, check fitQuality.makeGate. If given, each fit is checked on its spectrum residual within frange (nmrResidual), its parameters and perr; a fit that fails the gate or raises RuntimeError/ValueError is queued, and the chain continues from the last good fit. The queued files are refitted after the batch, and the columns qualityColumns are appended to result, check fillRow.
+	refit: dict, nmr.fit inputs that override the batch ones in the refit pass; None gives dict(multistart={}), a multi-start search.
 	savename: If exists, the output result will be saved to this file.
 	Returns:
 	--------
 	result: pandas.DataFrame, including fitted filenames and associated meta data.
 	'''
 	log=pd.read_csv(logpath,delim_whitespace=True)
+	if isinstance(cache,str):
+		cache=fcache.fitCache(cache)
+	if solver is None:
+		solver=func.defaultSolver('nmr_1simfit')
 	# fetch the log associated with nmr data to be fitted, use union of all ranges
 	dirname=ntpath.dirname(device)
 	basename=ntpath.basename(device)
@@ -388,25 +798,117 @@ def nmr_1simfit_batch(device,filenums,p0,dt=2e-7,zerofillnum=0,frange=(-np.inf,n
 	header0=header_metadata
 	headerperr=[elem+'perr' for elem in header]
 	Header=header0+header+headerperr
+	if telemetry or summary:
+		Header=Header+telemetryColumns
+	elif report_nfev:
+		Header=Header+['nfev']
+	gate=fitQuality.makeGate(gate)
+	if gate is not None:
+		Header=Header+qualityColumns
 	result=pd.DataFrame(index=index,columns=Header) #empty dataframe
+	pred=warmStart.makePredictor(predictor,x=predictor_x)
 	po=p0 #parameter guess for the first file
 	ind=0
+	done=set()
+	queue=[] # (row,filename,parameters of the last good fit) of the fits failing the gate
+	history=[] # (x,p,perr,ratio) passed to pred.update and gate.accept, saved with checkpoints
+	if checkpoint is not None and resume: # continue from saved rows and parameters
+		ind,pc,done,queued,history=checkpointLoad(checkpoint,result)
+		if pc is not None:
+			po=pc
+		for x,p,pe,r in history: # rebuild the warm-start predictor and the gate history
+			pred.update(x,p,perr=pe)
+			if gate is not None:
+				gate.accept(p,pe,r)
+		if gate is not None:
+			queue=[(i,result.loc[i,'Filename'],queued.get(i,po)) for i in range(ind) if result.loc[i,'quality']=='queued']
+	ind0=ind
 	print('Start-',end='') #progress indicator
-	for filename in piece['Filename']:
-		data=nmr(dirname+'/'+filename,zerofillnum=zerofillnum,logpath=logpath,dtLabel=dtLabel,dt=dt)
-		popt,_,perr=data.fit(po,frange=frange,bounds=bounds) # use default pltflag=0
-		po=popt
+	try:
+		for filename in piece['Filename']:
+			if filename in done: # fitted before the checkpoint
+				continue
+			path=dirname+'/'+filename
+			data=nmr(path,zerofillnum=zerofillnum,logpath=logpath,dtLabel=dtLabel,dt=dt)
+			x=pred.position(data,ind)
+			guess=pred.predict(x)
+			pstart=po if guess is None else guess # otherwise continue from the previous good popt
+			entry=None
+			failed=False
+			ms=multistart if ind==ind0 else None # global search only for the first file fitted
+			if cache is not None: # look up identical fit
+				key=cache.key(fcache.fileDigest(path),'nmr_1simfit',len(pstart)//4,pstart,zerofillnum,frange,bounds,solver,multires,ms,data._dt)
+				entry=cache.get(key)
+			if entry is not None: # cache hit
+				popt=entry['popt']
+				perr=np.sqrt(np.diag(entry['pcov']))
+				info=None
+			else:
+				t0=time.perf_counter()
+				try:
+					popt,pcov,perr=data.fit(pstart,frange=frange,bounds=bounds,solver=solver,multires=multires,multistart=ms) # use default pltflag=0
+					info=data.fitinfo
+					if cache is not None:
+						cache.put(key,popt=popt,pcov=pcov)
+				except (RuntimeError,ValueError):
+					if gate is None:
+						raise
+					popt,perr,_,info=fitFailure(len(pstart),t0)
+					failed=True
 
-		condition=[(cn not in header0) for cn in result.columns]
-		result.loc[ind][condition]=np.append(popt,perr) # assign fitted values
-		for h in header_metadata:
-			result.loc[ind][h]=getattr(data,h.lower()) # get metadata
-		#result.loc[ind]['Filename']=data._filename # nmr filename
-		#result.loc[ind]['Epoch']=data._epoch # nmr epoch second
-		#result.loc[ind]['zerofillnum']=zerofillnum # zerofillnum
-		ind+=1
-		print('-%s-%.2f%%-'%(re.sub(r'[^0-9]','',filename)[0::],ind/length*100),end='') #update progress
+			ok,flags,quality=True,[],None
+			if gate is not None: # a bad fit is queued for the refit pass and not passed on
+				if failed:
+					ok,flags=False,['fit']
+				else:
+					ok,flags,metrics=gate.check(nmrResidual(data,popt,frange),popt,perr)
+				if ok:
+					gate.accept(popt,perr,metrics['ratio'])
+				else:
+					queue.append((ind,filename,np.array(po,dtype=float)))
+				quality='ok' if ok else 'queued'
+			if ok:
+				po=popt
+				pred.update(x,popt,perr=perr)
+				history.append((x,popt,perr,metrics['ratio'] if gate is not None else np.nan))
+
+			fillRow(result,ind,header,popt,perr,info,quality,flags) # assign fitted values
+			for h in header_metadata:
+				result.loc[ind][h]=getattr(data,h.lower()) # get metadata
+			#result.loc[ind]['Filename']=data._filename # nmr filename
+			#result.loc[ind]['Epoch']=data._epoch # nmr epoch second
+			#result.loc[ind]['zerofillnum']=zerofillnum # zerofillnum
+			ind+=1
+			print('-%s-%.2f%%-'%(re.sub(r'[^0-9]','',filename)[0::],ind/length*100),end='') #update progress
+			if checkpoint is not None and (ind-ind0)%checkpoint_every==0:
+				checkpointSave(checkpoint,result,ind,po,queue,history)
+	finally: # also save progress when the batch crashes or is interrupted
+		if checkpoint is not None and ind>ind0:
+			checkpointSave(checkpoint,result,ind,po,queue,history)
+
+	if queue: # refit pass, each flagged file starts from the last good fit before it
+		print('-Refit',end='')
+		opts=dict(frange=frange,bounds=bounds,solver=solver,multires=multires)
+		opts.update(dict(multistart={}) if refit is None else refit)
+		for qind,filename,pq in queue:
+			data=nmr(dirname+'/'+filename,zerofillnum=zerofillnum,logpath=logpath,dtLabel=dtLabel,dt=dt)
+			t0=time.perf_counter()
+			try:
+				popt,pcov,perr=data.fit(pq,**opts)
+				info=data.fitinfo
+				ok,flags,_=gate.check(nmrResidual(data,popt,opts['frange']),popt,perr,jump=False) # jumps are not checked, the chain has moved on
+			except (RuntimeError,ValueError):
+				popt,perr,_,info=fitFailure(len(pq),t0)
+				ok,flags=False,['fit']
+			fillRow(result,qind,header,popt,perr,info,'refit' if ok else 'flagged',flags)
+			print('-%s-%s-'%(re.sub(r'[^0-9]','',filename)[0::],'ok' if ok else 'flagged'),end='')
+		if checkpoint is not None:
+			checkpointSave(checkpoint,result,ind,po,queue,history)
 	print('-Finished',end='')
+	if report_nfev and 'nfev' in result.columns:
+		print(' nfev=%d'%result['nfev'].sum(),end='')
+	if summary:
+		_=telemetrySummary(result.iloc[:ind])
 
 	if savename is not None : # save to specified file
 		if os.path.isfile(savename): #file already exists
@@ -415,6 +917,123 @@ def nmr_1simfit_batch(device,filenums,p0,dt=2e-7,zerofillnum=0,frange=(-np.inf,n
 			result.to_csv(savename,sep='\t',na_rep=np.nan,index=False,float_format='%.12e'.format) #create new file and save
 	return result
 #=======================================================================
+def solverBenchmark(fitone,datas,solvers,tol=0.1,costtol=1e-8,repeat=1,verbose=True):
+	'''
+	Run every solver backend on the same files and compare speed, evaluations and agreement.
+	Syntax:
+	-------
+	table,best=solverBenchmark(fitone,datas,solvers[,tol=0.1,costtol=1e-8,repeat=1,verbose=True])
+	Parameters:
+	-----------
+	fitone: function, popt,perr,info=fitone(data,solver) fits one data object with one backend, info is the fitinfo of the data.
+	datas: list of data objects.
+	solvers: list of str, backends to compare.
+	tol: float, a fit agrees with the reference, the lowest-cost fit of the same file, if its popt is within tol*perr of the reference popt,
+	costtol: float, or if its cost exceeds the reference cost by at most costtol relative; this accepts equivalent minima, e.g. a negative amplitude with the phase shifted by 180.
+	repeat: int, each fit is timed repeat times and the fastest is kept.
+	verbose: bool, if True, the table and the choice are printed.
+	Returns:
+	--------
+	table: pandas.DataFrame indexed by solver, 'time_s' total fit time, 'nfev' total evaluations, 'nfail' number of fits that raised or did not converge, 'cost_excess' largest relative cost above the reference, 'dev_sigma' largest deviation from the reference in units of perr, 'ndisagree' number of fits that do not agree, 'ok' whether nfail and ndisagree are 0.
+	best: str, fastest backend with ok True; None if there is none.
+	'''
+	runs={} # solver -> list of (time,nfev,success,popt,perr,cost) per file
+	for solver in solvers:
+		runs[solver]=[]
+		for data in datas:
+			t=np.inf
+			try:
+				for _ in range(repeat):
+					t0=time.perf_counter()
+					popt,perr,info=fitone(data,solver)
+					t=min(t,time.perf_counter()-t0)
+				runs[solver].append((t,info['nfev'],bool(info['success']),np.asarray(popt,dtype=float),np.asarray(perr,dtype=float),info['cost']))
+			except (RuntimeError,ValueError):
+				runs[solver].append((np.nan,0,False,None,None,np.inf))
+
+	rows=[]
+	for solver in solvers:
+		time_s=nfev=nfail=ndis=0
+		excess=dev=0.
+		for i,(t,n,success,popt,perr,cost) in enumerate(runs[solver]):
+			ref=min((runs[sv][i] for sv in solvers),key=lambda r:r[5]) # lowest cost fit of this file
+			time_s+=t
+			nfev+=n
+			if not success or popt is None:
+				nfail+=1
+				continue
+			e=cost/ref[5]-1 if ref[5]>0 else 0.
+			scale=np.where(ref[4]>0,ref[4],np.abs(ref[3])*np.finfo(float).eps+np.finfo(float).tiny)
+			d=float(np.max(np.abs(popt-ref[3])/scale))
+			if d>tol and e>costtol:
+				ndis+=1
+			excess=max(excess,e)
+			dev=max(dev,d)
+		rows.append({'solver':solver,'time_s':time_s,'nfev':nfev,'nfail':nfail,'cost_excess':excess,'dev_sigma':dev,'ndisagree':ndis,'ok':nfail==0 and ndis==0})
+	table=pd.DataFrame(rows).set_index('solver')
+	good=table[table['ok']]
+	best=good['time_s'].idxmin() if len(good) else None
+	if verbose:
+		print(table.to_string())
+		print('fastest acceptable solver: %s'%best)
+	return table,best
+#=======================================================================
+def lrtz_solverBenchmark(paths,fitmode,funcs1,funcs2,sharenum,p0,logname=None,mainChannel='',fold=dict(),correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),options=None,solvers=func.solvers,tol=0.1,costtol=1e-8,repeat=1,register=False,verbose=True):
+	'''
+	Benchmark the solver backends of lrtz_1simfit on a sample of FreqSweep files, and optionally make the fastest acceptable one the default of this model.
+	Syntax:
+	-------
+	table,best=lrtz_solverBenchmark(paths,fitmode,funcs1,funcs2,sharenum,p0[,logname=None,mainChannel='',fold=dict(),correctFunc=utl.gainCorrect,normByParam='VLowVpp',folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),options=None,solvers=Functions.solvers,tol=0.1,costtol=1e-8,repeat=1,register=False,verbose=True])
+	Parameters:
+	-----------
+	paths: list of str, full paths of the sample files.
+	fitmode,funcs1,funcs2,sharenum,p0,folds1,folds2,frange,bounds: lrtz_1simfit fitting inputs, the same p0 for all files.
+	logname,mainChannel,fold,correctFunc,normByParam: File load parameters.
+	options: dict, other lrtz_1simfit inputs, e.g. dict(window=8,multires=(8,)).
+	solvers,tol,costtol,repeat,verbose: check solverBenchmark.
+	register: bool, if True, the best backend becomes the default solver of this model, check Functions.setDefaultSolver.
+	Returns:
+	--------
+	table,best: check solverBenchmark.
+	'''
+	options=dict() if options is None else options
+	datas=[fswp(path,mainChannel=mainChannel,fold=fold,correctFunc=correctFunc,logname=logname,normByParam=normByParam) for path in paths]
+	def fitone(data,solver):
+		popt,_,perr,_,_,_=data.lrtz_1simfit(fitmode,funcs1,funcs2,sharenum,p0,folds1=folds1,folds2=folds2,frange=frange,bounds=bounds,solver=solver,**options)
+		return popt,perr,data.fitinfo
+	table,best=solverBenchmark(fitone,datas,solvers,tol=tol,costtol=costtol,repeat=repeat,verbose=verbose)
+	if register and best is not None:
+		func.setDefaultSolver('lrtz_1simfit',best,func.modelKey(funcs1,funcs2))
+	return table,best
+#=======================================================================
+def nmr_solverBenchmark(paths,p0,zerofillnum=0,logpath=None,dtLabel='dt_s',dt=2e-7,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),options=None,solvers=('auto','lm','trf','dogbox'),tol=0.1,costtol=1e-8,repeat=1,register=False,verbose=True):
+	'''
+	Benchmark the solver backends of nmr_1simfit on a sample of NMR files, and optionally make the fastest acceptable one the default.
+	Syntax:
+	-------
+	table,best=nmr_solverBenchmark(paths,p0[,zerofillnum=0,logpath=None,dtLabel='dt_s',dt=2e-7,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),options=None,solvers=('auto','lm','trf','dogbox'),tol=0.1,costtol=1e-8,repeat=1,register=False,verbose=True])
+	Parameters:
+	-----------
+	paths: list of str, full paths of the sample files.
+	p0,frange,bounds: nmr_1simfit fitting inputs, the same p0 for all files.
+	zerofillnum,logpath,dtLabel,dt: File load parameters, check nmr_1simfit_batch.
+	options: dict, other nmr.fit inputs, e.g. dict(engine='fft').
+	solvers,tol,costtol,repeat,verbose: check solverBenchmark.
+	register: bool, if True, the best backend becomes the default solver of nmr_1simfit, check Functions.setDefaultSolver.
+	Returns:
+	--------
+	table,best: check solverBenchmark.
+	'''
+	options=dict() if options is None else options
+	datas=[nmr(path,zerofillnum=zerofillnum,logpath=logpath,dtLabel=dtLabel,dt=dt) for path in paths]
+	def fitone(data,solver):
+		popt,_,perr=data.fit(p0,frange=frange,bounds=bounds,solver=solver,**options)
+		return popt,perr,data.fitinfo
+	table,best=solverBenchmark(fitone,datas,solvers,tol=tol,costtol=costtol,repeat=repeat,verbose=verbose)
+	if register and best is not None:
+		func.setDefaultSolver('nmr_1simfit',best)
+	return table,best
+#=======================================================================
 def tfBackground(paths,logs,mainChannels,bounds,polyDeg=9,pltflag=False,figsize=(12,5),wspace=0.3,hspace=0.3,fillstyle='full',iter_color=0,iter_marker=0,iter_linestyle=0,markeredgewidth=0.5,markersize=4,linewidth=1,legloc='upper left',bbox_to_anchor=(1,1),legsize=10):
 	'''
 	2019-11-21 18:21
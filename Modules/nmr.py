@@ -1,7 +1,6 @@
 '''
 NMR sweep signal data. There is no recorded time-domain. Time-domain is generated after data reading.
 '''  
-import matplotlib.pyplot as plt
 import numpy as np
 from scipy import fftpack
 import pandas as pd
@@ -10,7 +9,9 @@ import ntpath
 
 import FuncLib
 import Functions as func
-import Plotting
+import Utility as utl
+plt=utl.lazyModule('matplotlib.pyplot') # imported on first use
+Plotting=utl.lazyModule('Plotting')
 import readLog
 from readLog import nmrLog
 from readLog import sweepLog as swplog
@@ -130,18 +131,13 @@ class nmr_old(object):
 		sfftnmr0fill: smoothed FFT of zero-filled nmr FID.
 		Note:
 		-----
-		Check Functions.savitzky_golay for details.
+		Check Functions.savgol_filter for details.
 		'''
 		condition=(self.f0fill>=frange[0])&(self.f0fill<=frange[1])
 		conditionlow=(self.f0fill<frange[0])
 		conditionhigh=(self.f0fill>frange[1])
-		yr=self.fftnmr0fill.real[condition]
-		yi=self.fftnmr0fill.imag[condition]
-		smoothyr=func.savitzky_golay(yr,window_size,order,deriv=deriv,rate=rate)
-		smoothyi=func.savitzky_golay(yi,window_size,order,deriv=deriv,rate=rate)
-		smoothfftnmr0fillr=np.concatenate((self.fftnmr0fill.real[conditionlow], smoothyr, self.fftnmr0fill.real[conditionhigh]))
-		smoothfftnmr0filli=np.concatenate((self.fftnmr0fill.imag[conditionlow], smoothyi, self.fftnmr0fill.imag[conditionhigh]))
-		sfftnmr0fill=smoothfftnmr0fillr+1j*smoothfftnmr0filli
+		smoothy=func.savgol_filter(self.fftnmr0fill[condition],window_size,order,deriv=deriv,rate=rate) # real and imaginary parts together
+		sfftnmr0fill=np.concatenate((self.fftnmr0fill[conditionlow],smoothy,self.fftnmr0fill[conditionhigh]))
 		setattr(self,'sfftnmr0fill',sfftnmr0fill)
 		return sfftnmr0fill
 #=======================================================================
@@ -354,18 +350,22 @@ class nmr(object):
 			line=Plotting.nmr_all(axes,self,iter=iter,fillstyle=fillstyle,markeredgewidth=markeredgewidth,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
 			return fig,axes,line
 #=======================================================================
-	def fit(self,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8):
+	def fit(self,p0,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),engine='dft',solver=None,multires=None,multistart=None,pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8):
 		'''
 		2019-09-25 17:34
 		Fit self._fftnmr0fill to several peaks, each peak described by 4 parameters.	
 		Syntax:
 		-------
-		popt,pcov,perr[,fig,axes,lines]=fit(p0[,bounds=(-inf,inf),pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8])
+		popt,pcov,perr[,fig,axes,lines]=fit(p0[,frange=(-inf,inf),bounds=(-inf,inf),engine='dft',solver=None,multires=None,multistart=None,pltflag=0,figsize=(16,5),wspace=0.4,hspace=0.2,marker='.',markersize=1,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=8])
 		Parameters:
 		-----------
 		p0: Initial fitting parameters, format is [s01,T1,f01,phase1,s02,T2,f02,phase2,...], length=4xN.
 		frange: (lb,ub); lower and upper bound of the frequency range for fitting.
 		bounds: Optimization parameter bounds for scipy.optimize.curve_fit.
+		engine: str; 'dft' or 'fft', model evaluation engine, check func.nmr_1simfit for details.
+		solver: str; solver backend, check func.nmr_1simfit for details.
+		multires: list of int; decimation factors of coarse-to-fine fitting, check func.nmr_1simfit for details.
+		multistart: dict; multi-start global search options, check func.nmr_1simfit and func.multiStartFit.
 		pltflag: plot flag.
 		figsize,wspace,hspace: figure and subplots spacing settings.
 		marker,markersize,linewidth: Fitted curve plot settings.
@@ -380,15 +380,16 @@ class nmr(object):
 		lines: lines output from Plotting.fitChecknmr().
 		Note:
 		-----
-		Create attribute self.popt after running.
+		Create attributes self.popt and self.fitinfo after running, self.fitinfo is the info dict from func.nmr_1simfit, e.g. self.fitinfo['nfev'] is the number of model evaluations.
 		fig/axes/lines: Only output when pltflag=1.
 		'''
 		if pltflag:
-			popt,pcov,perr,fig,axes,lines=func.nmr_1simfit(self,p0,frange=frange,bounds=bounds,pltflag=pltflag,figsize=figsize,wspace=wspace,hspace=hspace,marker=marker,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
+			popt,pcov,perr,fig,axes,lines,info=func.nmr_1simfit(self,p0,frange=frange,bounds=bounds,engine=engine,solver=solver,multires=multires,multistart=multistart,full_output=True,pltflag=pltflag,figsize=figsize,wspace=wspace,hspace=hspace,marker=marker,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
 		else:
-			popt,pcov,perr=func.nmr_1simfit(self,p0,frange=frange,bounds=bounds,pltflag=pltflag)
+			popt,pcov,perr,info=func.nmr_1simfit(self,p0,frange=frange,bounds=bounds,engine=engine,solver=solver,multires=multires,multistart=multistart,full_output=True,pltflag=pltflag)
 
 		setattr(self,'popt',popt)
+		setattr(self,'fitinfo',info)
 
 		if pltflag:
 			return popt,pcov,perr,fig,axes,lines
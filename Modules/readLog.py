@@ -6,6 +6,7 @@ import numpy as np
 import pandas as pd
 import datetime
 import ntpath
+import Utility as utl
 
 #=======================================================================
 class mctLog(object):
@@ -176,6 +177,7 @@ class sweepLog(object):
 	self.item: pandas.Series, each item is one column with the same name (but lower case) in the content.
 	self._datetime: pandas.Series, contains datetime.datetime, combination of date and time.
 	self._epoch: pandas.Series, contains float, epoch seconds calculated from datetime.
+	self._pmct,self._tmct: pandas.Series, mct pressure in bar and temperature in mK, only after self.mctC2T is called.
 	'''
 	def __init__(self,filename):
 		self._filename=ntpath.basename(filename)
@@ -198,4 +200,30 @@ class sweepLog(object):
 			vfindEpoch=np.vectorize(findEpoch)
 			epoch_array=vfindEpoch(self._datetime)
 			self._epoch=pd.Series(epoch_array)
+#-----------------------------------------------------------------------
+	def mctC2T(self,p,branch='low',Pn=34.3934,column='Cmct_pF'):
+		'''
+		Calculate temperature, T, from the capacitance column of the whole log in one pass.
+		Syntax:
+		-------
+		T=mctC2T(p[,branch='low',Pn=34.3934,column='Cmct_pF'])
+		Parameters:
+		-----------
+		p: prefactor parameters for utl.mctC2P. P=p0+p1*C+p2*C^2+...+pn*C^n.
+		branch: the melting curve branch in which the solution is searched for, check utl.mctP2T.
+		Pn: Neel transition pressure in bar.
+		column: str, name of the mct capacitance column in the log, in pF.
+		Returns:
+		--------
+		T: pandas.Series, temperature in mK, one per log row; also saved as self._tmct, and the pressure as self._pmct.
+		Notes:
+		------
+		The returned T may contain np.nan values.
+		'''
+		C=self._content[column].values #numpy array
+		P=utl.mctC2P(C,p)
+		T=utl.mctP2T(P,branch=branch,Pn=Pn)
+		self._pmct=pd.Series(P,index=self._content.index)
+		self._tmct=pd.Series(T,index=self._content.index)
+		return self._tmct
 #=======================================================================
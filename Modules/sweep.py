@@ -4,13 +4,13 @@ Sweep object classes.
 '''
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import ntpath
 
 import readLog
 from readLog import sweepLog as swplog
 import Utility as utl
-import Plotting
+plt=utl.lazyModule('matplotlib.pyplot') # imported on first use
+Plotting=utl.lazyModule('Plotting')
 import Functions as func
 #=======================================================================
 class freqSweep(object):
@@ -213,12 +213,12 @@ class freqSweep(object):
 			lines=Plotting.freqSweep_all(axes,self,pltmode,iter_color=iter_color,iter_marker=iter_marker,iter_linestyle=iter_linestyle,fillstyle=fillstyle,markeredgewidth=markeredgewidth,markersize=markersize,linewidth=linewidth,legflag=legflag,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
 			return fig,axes,lines
 #=======================================================================
-	def lrtz_1simfit(self,fitmode,funcs1,funcs2,sharenum,p0,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10):
+	def lrtz_1simfit(self,fitmode,funcs1,funcs2,sharenum,p0,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10):
 		'''
 		Simultaneously fit x-&y-channels, with x in front. Plot fitted curve if demanded.
 		Syntax:
 		-------
-		popt,pcov,perr,res,popt1,popt2[,fig,axes,lines]=lrtz1simfit(fitmode,funcs1,funcs2,sharenum,p0[,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor(0,1),legsize=10])
+		popt,pcov,perr,res,popt1,popt2[,fig,axes,lines]=lrtz1simfit(fitmode,funcs1,funcs2,sharenum,p0[,folds1=None,folds2=None,frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor(0,1),legsize=10])
 		Parameters:
 		-----------
 		fitmode: only difference is if it contains 'g' or not, 'g' will introduce rolloff gain correct.
@@ -228,6 +228,12 @@ class freqSweep(object):
 		folds1&2: function fold lists, corresponding to terms in funcs1&2.
 		frange: frequency range (low,high) bounds.
 		bounds: parameters bounds, check scipy.optimize.curve_fit input.
+		varpro: boolean, solve the linear parameters by variable projection, check func.lrtz_1simfit.
+		solver: str, solver backend, check func.lrtz_1simfit.
+		window,anchors,wincenter: fit only the points around the resonance, check func.lrtz_1simfit.
+		multires: list of int, decimation factors of coarse-to-fine fitting, check func.lrtz_1simfit.
+		complexmode: boolean, evaluate the x-&y-channels as one complex response, check func.lrtz_1simfit.
+		multistart: dict, multi-start global search options, check func.lrtz_1simfit and func.multiStartFit.
 		pltflag: if non-zero, will plot fitted curves for comparison.
 		figsize: figure size.
 		wspace,hspace: width/horizontal spacing between subplots.
@@ -236,7 +242,7 @@ class freqSweep(object):
 		bbox_to_anchor: legend anchor point.
 		legsize: legend font size.
 		Default for optional inputs:
-			folds1&2=np.ones(len(funcs1&2)),frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10.
+			folds1&2=np.ones(len(funcs1&2)),frange=(-np.inf,np.inf),bounds=(-np.inf,np.inf),varpro=False,solver=None,window=None,anchors=None,wincenter='p0',multires=None,complexmode=False,multistart=None,pltflag=0,figsize=(12,9),wspace=0.4,hspace=0.3,markersize=4,linewidth=1,legloc='lower left',bbox_to_anchor=(0,1),legsize=10.
 		Returns:
 		--------
 		popt: fitted parameters, folds1&2 influence removed.
@@ -250,6 +256,7 @@ class freqSweep(object):
 		Note:
 		-----
 		Sets attributes self.popt/.popt1/.popt2 to popt/popt1/popt2, create these attributes if previously nonexistent.
+		Sets attribute self.fitinfo to the info dict from func.lrtz_1simfit, e.g. self.fitinfo['nfev'] is the number of model evaluations.
 		fig/axes/lines: Only output when pltflag=1.
 		'''
 		if folds1 is None: # assign folds1&2's default values as ones.
@@ -258,13 +265,14 @@ class freqSweep(object):
 			folds2=np.ones(len(funcs2))
 		
 		if pltflag:
-			popt,pcov,perr,res,popt1,popt2,fig,axes,lines=func.lrtz_1simfit(self,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=frange,bounds=bounds,pltflag=pltflag,figsize=figsize,wspace=wspace,hspace=hspace,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
+			popt,pcov,perr,res,popt1,popt2,fig,axes,lines,info=func.lrtz_1simfit(self,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=frange,bounds=bounds,varpro=varpro,solver=solver,window=window,anchors=anchors,wincenter=wincenter,multires=multires,complexmode=complexmode,multistart=multistart,full_output=True,pltflag=pltflag,figsize=figsize,wspace=wspace,hspace=hspace,markersize=markersize,linewidth=linewidth,legloc=legloc,bbox_to_anchor=bbox_to_anchor,legsize=legsize)
 		else:
-			popt,pcov,perr,res,popt1,popt2=func.lrtz_1simfit(self,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=frange,bounds=bounds,pltflag=pltflag)
+			popt,pcov,perr,res,popt1,popt2,info=func.lrtz_1simfit(self,fitmode,funcs1,folds1,funcs2,folds2,sharenum,p0,frange=frange,bounds=bounds,varpro=varpro,solver=solver,window=window,anchors=anchors,wincenter=wincenter,multires=multires,complexmode=complexmode,multistart=multistart,full_output=True,pltflag=pltflag)
 
 		setattr(self,'popt',popt) # set popt,popt1&2 as attributes
 		setattr(self,'popt1',popt1)
 		setattr(self,'popt2',popt2)
+		setattr(self,'fitinfo',info)
 
 		if pltflag:
 			return popt,pcov,perr,res,popt1,popt2,fig,axes,lines
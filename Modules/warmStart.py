@@ -0,0 +1,224 @@
+'''
+warmStart.py: Ver 1.0.
+Warm-start predictors for consecutive fits. A predictor keeps the history of fitted parameters against a position variable (batch index, epoch, Tmct, ...) and extrapolates the initial parameters of the next fit from it.
+'''
+import numpy as np
+from collections import deque
+
+#=======================================================================
+class lastFit(object):
+	'''
+	Predict the next initial parameters as the last fitted parameters. Base class of the other predictors.
+	Syntax:
+	-------
+	pred=lastFit([x='index'])
+	Parameters:
+	-----------
+	x: str, position variable of each fit. 'index' is the position of the file in the batch, any other str is read as the attribute x.lower() of the data object, e.g. '_epoch', 'Tmct'.
+	Returns:
+	--------
+	pred: predictor instance, with methods position/update/predict/reset.
+	'''
+	def __init__(self,x='index'):
+		self.x=x
+		self.reset()
+#-----------------------------------------------------------------------
+	def reset(self):
+		'''
+		Forget all fit history.
+		'''
+		self._last=None
+#-----------------------------------------------------------------------
+	def position(self,data,index):
+		'''
+		Position of a data object in the sequence.
+		Syntax:
+		-------
+		x=pred.position(data,index)
+		Parameters:
+		-----------
+		data: sweep.freqSweep, nmr.nmr, etc. data object.
+		index: int, position of the file in the batch.
+		Returns:
+		--------
+		x: float, index if self.x=='index', otherwise the mean of attribute self.x.lower() of data.
+		'''
+		if self.x=='index':
+			return float(index)
+		return float(np.mean(getattr(data,self.x.lower())))
+#-----------------------------------------------------------------------
+	def update(self,x,p,perr=None):
+		'''
+		Add a fit result to the history.
+		Syntax:
+		-------
+		pred.update(x,p[,perr=None])
+		Parameters:
+		-----------
+		x: float, position of the fit.
+		p: fitted parameters.
+		perr: standard deviation of p, used by predictors that weigh the history.
+		'''
+		self._last=np.array(p,dtype=float)
+#-----------------------------------------------------------------------
+	def predict(self,x):
+		'''
+		Initial parameters of the fit at position x.
+		Syntax:
+		-------
+		p0=pred.predict(x)
+		Parameters:
+		-----------
+		x: float, position of the next fit.
+		Returns:
+		--------
+		p0: np.array, predicted parameters; None if there is no history yet.
+		'''
+		if self._last is None:
+			return None
+		return self._last.copy()
+#=======================================================================
+class polyExtrap(lastFit):
+	'''
+	Predict the next initial parameters by fitting each parameter of the last k fits to a polynomial of position, and extrapolating it to the next position.
+	Syntax:
+	-------
+	pred=polyExtrap([k=3,deg=1,x='index'])
+	Parameters:
+	-----------
+	k: int, number of past fits used.
+	deg: int, polynomial degree, 1 is linear extrapolation. It is reduced automatically while fewer than deg+1 fits are available.
+	x: str, position variable, check lastFit.
+	Note:
+	-----
+	Falls back to the last fitted parameters when the past positions are all equal or the extrapolation is not finite.
+	'''
+	def __init__(self,k=3,deg=1,x='index'):
+		self.k=int(k)
+		self.deg=int(deg)
+		lastFit.__init__(self,x=x)
+#-----------------------------------------------------------------------
+	def reset(self):
+		lastFit.reset(self)
+		self._hist=deque(maxlen=self.k)
+#-----------------------------------------------------------------------
+	def update(self,x,p,perr=None):
+		lastFit.update(self,x,p)
+		self._hist.append((float(x),self._last))
+#-----------------------------------------------------------------------
+	def predict(self,x):
+		if self._last is None:
+			return None
+		xs=np.array([h[0] for h in self._hist])-self._hist[-1][0] # relative to the last position for conditioning
+		deg=min(self.deg,len(self._hist)-1)
+		if deg<1 or np.ptp(xs)==0:
+			return self._last.copy()
+		ps=np.array([h[1] for h in self._hist])
+		coef=np.polyfit(xs/np.ptp(xs),ps,deg) # one polynomial per parameter
+		p0=np.polyval(coef,(x-self._hist[-1][0])/np.ptp(xs))
+		if not np.all(np.isfinite(p0)):
+			return self._last.copy()
+		return p0
+#=======================================================================
+class kalman(lastFit):
+	'''
+	Predict the next initial parameters with a constant-velocity Kalman filter for each parameter. The state of each parameter is its value and its rate of change with position.
+	Syntax:
+	-------
+	pred=kalman([q=1e-3,r=1e-4,x='index'])
+	Parameters:
+	-----------
+	q: float, process noise; the relative change of a parameter's rate over one position step.
+	r: float, relative measurement noise of a fitted parameter, used when perr is not given to update.
+	x: str, position variable, check lastFit.
+	Note:
+	-----
+	Positions are measured in units of the first nonzero position step, so q does not depend on the unit of x.
+	'''
+	def __init__(self,q=1e-3,r=1e-4,x='index'):
+		self.q=q
+		self.r=r
+		lastFit.__init__(self,x=x)
+#-----------------------------------------------------------------------
+	def reset(self):
+		lastFit.reset(self)
+		self._x=None
+		self._s=None # state, (n,2) array of [value,rate]
+		self._P=None # state covariance, (n,2,2) array
+		self._scale=None
+#-----------------------------------------------------------------------
+	def _step(self,x):
+		'''
+		Position step from the last update in units of self._scale.
+		'''
+		dx=float(x)-self._x
+		if self._scale is None:
+			if dx==0:
+				return 0.
+			self._scale=abs(dx)
+		return dx/self._scale
+#-----------------------------------------------------------------------
+	def update(self,x,p,perr=None):
+		lastFit.update(self,x,p)
+		p=self._last
+		tiny=np.finfo(float).tiny
+		if perr is not None and np.all(np.isfinite(perr)):
+			R=np.asarray(perr,dtype=float)**2+tiny
+		else:
+			R=(self.r*np.abs(p))**2+tiny
+		if self._s is None: # value known, rate unknown
+			self._s=np.stack((p,np.zeros_like(p)),axis=-1)
+			self._P=np.zeros((p.size,2,2))
+			self._P[:,0,0]=R
+			self._P[:,1,1]=1e12*(np.abs(p)+1)**2
+			self._x=float(x)
+			return
+		# propagate to x
+		dt=self._step(x)
+		a=abs(dt)
+		F=np.array([[1.,dt],[0.,1.]])
+		Q=np.array([[a**3/3,dt*a/2],[dt*a/2,a]]) # white noise in the rate of change
+		s=self._s.dot(F.T)
+		P=F@self._P@F.T+(self.q*np.abs(p))[:,np.newaxis,np.newaxis]**2*Q
+		# correct with the measurement of the value
+		S=P[:,0,0]+R
+		K=P[:,:,0]/S[:,np.newaxis]
+		self._s=s+K*(p-s[:,0])[:,np.newaxis]
+		self._P=P-K[:,:,np.newaxis]*P[:,np.newaxis,0,:]
+		self._x=float(x)
+#-----------------------------------------------------------------------
+	def predict(self,x):
+		if self._s is None:
+			return None
+		dt=self._step(x)
+		p0=self._s[:,0]+self._s[:,1]*dt
+		if not np.all(np.isfinite(p0)):
+			return self._last.copy()
+		return p0
+#=======================================================================
+def makePredictor(predictor,x='_epoch'):
+	'''
+	Create a warm-start predictor from a short name.
+	Syntax:
+	-------
+	pred=makePredictor(predictor[,x='_epoch'])
+	Parameters:
+	-----------
+	predictor: None, str or predictor instance. None or 'last' gives lastFit, 'linear' gives polyExtrap(k=3,deg=1), 'quadratic' gives polyExtrap(k=4,deg=2), 'kalman' gives kalman(); an instance is returned as is.
+	x: str, position variable for predictors created from names, check lastFit.
+	Returns:
+	--------
+	pred: predictor instance.
+	'''
+	if predictor is None or predictor=='last':
+		return lastFit(x=x)
+	if isinstance(predictor,lastFit):
+		return predictor
+	if predictor=='linear':
+		return polyExtrap(k=3,deg=1,x=x)
+	if predictor=='quadratic':
+		return polyExtrap(k=4,deg=2,x=x)
+	if predictor=='kalman':
+		return kalman(x=x)
+	raise ValueError("predictor must be None, 'last', 'linear', 'quadratic', 'kalman' or a warmStart predictor instance")
+#=======================================================================